@@ -7,8 +7,28 @@ import plotly.express as px
 import streamlit as st
 from dateutil.relativedelta import relativedelta
 
+import instrument
+from log_config import get_logger
+from queries import (
+    load_e1rm,
+    load_recent_prs,
+    load_strength_exercises,
+    load_weekly_tonnage,
+    load_weekly_volume,
+    weekly_breakdown,
+)
+
+# Spans from cache misses below and the rerun total land in this run
+rerun = instrument.start_run("dashboard")
+
+logger = get_logger("dashboard")
+
 DB_PATH = "synced_workouts.db"
-TABLE = "workout_sets_enriched"
+
+# Each DB version caches a few hundred rows per frame; keep a handful of versions
+# plus one figure per filter combination seen recently.
+DATA_CACHE_ENTRIES = 4
+FIGURE_CACHE_ENTRIES = 32
 
 st.set_page_config(page_title="Training Dashboard", layout="wide")
 
@@ -20,54 +40,148 @@ def _db_mtime(path: str) -> float:
         return 0.0
 
 
-@st.cache_data
-def load_data(_mitime: float) -> pd.DataFrame:
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def load_dashboard(db_mtime: float):
+    # Weighted sets per week and muscle group, aggregated in SQLite (muscle_group
+    # arrives categorical), plus the per-week breakdown the donut slices from.
+    with instrument.span("load_dashboard") as span, sqlite3.connect(DB_PATH) as conn:
+        weekly = load_weekly_volume(conn)
+        span.rows = len(weekly)
+    return weekly, weekly_breakdown(weekly)
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES)
+def line_figure(db_mtime: float, groups: tuple):
+    weekly, _ = load_dashboard(db_mtime)
+    weekly_view = weekly[weekly["muscle_group"].isin(groups)]
+
+    fig = px.line(
+        weekly_view,
+        x="week_start",
+        y="volume",
+        color="muscle_group",
+        markers=True,
+        labels={"week_start": "Week", "volume": "Weighted Sets"},
+    )
+    fig.update_traces(opacity=0.75, line=dict(width=2))
+
+    # Default view: last 3 months (but data not truncated; slider lets you zoom)
+    max_date = weekly["week_start"].max()
+    min_date = weekly["week_start"].min()
+    default_start = pd.Timestamp(max_date) - relativedelta(months=3)
+
+    fig.update_xaxes(
+        range=[max(default_start, min_date), max_date],
+        rangeslider=dict(visible=True),
+        rangeselector=dict(
+            buttons=[
+                dict(count=28, step="day", stepmode="backward", label="4W"),
+                dict(count=3, step="month", stepmode="backward", label="3M"),
+                dict(count=6, step="month", stepmode="backward", label="6M"),
+                dict(step="all", label="All"),
+            ]
+        ),
+        tickformat="%b %d\n%Y",
+    )
+
+    fig.update_layout(legend_title_text="Muscle Group")
+    return fig
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES)
+def pie_figure(db_mtime: float, week: pd.Timestamp):
+    _, breakdown = load_dashboard(db_mtime)
+    pie_df = breakdown[week]
+
+    # Donut chart
+    fig_pie = px.pie(
+        pie_df,
+        names="muscle_group",
+        values="volume",
+        hole=0.3,
+    )
+    fig_pie.update_traces(textposition="inside", textinfo="percent+label")
+
+    total_sets = pie_df["volume"].sum()
+    fig_pie.add_annotation(
+        text=(
+            f"{total_sets:.1f} sets"
+            if total_sets % 1
+            else f"{int(total_sets)} sets"
+        ),
+        showarrow=False,
+        font_size=20,
+        x=0.5,
+        y=0.5,
+        xref="paper",
+        yref="paper",
+    )
+    fig_pie.update_layout(legend_title_text="Muscle Group")
+    return fig_pie
+
+
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def load_strength(db_mtime: float):
+    # Exercise list, weekly tonnage of everything and recent PRs; all read from
+    # the tables process_sets keeps, never from the sets themselves
+    with instrument.span("load_strength"), sqlite3.connect(DB_PATH) as conn:
+        return (
+            load_strength_exercises(conn),
+            load_weekly_tonnage(conn),
+            load_recent_prs(conn),
+        )
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES)
+def e1rm_figure(db_mtime: float, exercise: str):
     with sqlite3.connect(DB_PATH) as conn:
-        q = f"""
-        SELECT
-            id,
-            date(date) AS day,
-            exercise_name,
-            set_order,
-            set_index,
-            is_warmup,
-            muscle_group_primary AS muscle_group,
-            muscle_group_secondary
-        FROM {TABLE}
-        WHERE is_warmup = 0
-          AND (muscle_group IS NULL OR muscle_group != 'Rehab')
-        ORDER BY day ASC;
-        """
-        df = pd.read_sql(q, conn, parse_dates=["day"])
-    return df
-
-
-df = load_data(_db_mtime(DB_PATH))
-
-# Compute week starts (Mon)
-df["week_start"] = df["day"] - pd.to_timedelta(df["day"].dt.weekday, unit="d")
-
-# Build weighted rows:
-# - primary rows: weight = 1.0
-# - secondary rows (when present): weight = 0.5, attributed to the secondary group
-primary = df.loc[df["muscle_group"].notna(), ["week_start", "muscle_group"]].copy()
-primary["weight"] = 1.0
-
-secondary = df.loc[
-    df["muscle_group_secondary"].notna(), ["week_start", "muscle_group_secondary"]
-].copy()
-secondary = secondary.rename(columns={"muscle_group_secondary": "muscle_group"})
-secondary["weight"] = 0.5
-
-weighted = pd.concat([primary, secondary], ignore_index=True)
-
-# Aggregate: weighted sets per week per muscle group
-weekly = (
-    weighted.groupby(["week_start", "muscle_group"], as_index=False)["weight"]
-    .sum()
-    .rename(columns={"weight": "volume"})
-    .sort_values("week_start")
-)
+        e1rm = load_e1rm(conn, exercise)
+
+    fig = px.line(
+        e1rm,
+        x="date",
+        y=["e1rm", "best_e1rm"],
+        labels={"date": "Workout", "value": "Estimated 1RM"},
+    )
+    fig.update_traces(line_shape="hv", selector=dict(name="best_e1rm"))
+    prs = e1rm[e1rm["is_pr"] == 1]
+    fig.add_scatter(
+        x=prs["date"],
+        y=prs["e1rm"],
+        mode="markers",
+        name="PR",
+        marker=dict(size=9, symbol="star"),
+        customdata=prs[["weight", "reps", "pr_count"]],
+        hovertemplate="%{customdata[0]} × %{customdata[1]} (PR #%{customdata[2]})",
+    )
+    fig.update_layout(legend_title_text="")
+    return fig
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES)
+def tonnage_figure(db_mtime: float, exercise: str):
+    with sqlite3.connect(DB_PATH) as conn:
+        tonnage = load_weekly_tonnage(conn, exercise)
+
+    fig = px.bar(
+        tonnage,
+        x="week_start",
+        y="tonnage",
+        hover_data=["sets"],
+        labels={"week_start": "Week", "tonnage": "Tonnage (weight × reps)"},
+    )
+    return fig
+
+
+def report_rerun():
+    rerun.count("weeks", len(weekly))
+    elapsed_ms = rerun.finish().seconds * 1000
+    st.sidebar.caption(f"⏱ Rerun took {elapsed_ms:.0f} ms")
+    logger.info(f"⏱ Dashboard rerun took {elapsed_ms:.1f} ms")
+
+
+db_mtime = _db_mtime(DB_PATH)
+weekly, breakdown = load_dashboard(db_mtime)
 
 # Sidebar filters
 st.sidebar.header("Filters")
@@ -82,42 +196,15 @@ st.caption(
     "Excludes warmups & Rehab • Overlapping lines • Use range slider or drag to zoom"
 )
 
-# Line chart
-fig = px.line(
-    weekly_view,
-    x="week_start",
-    y="volume",
-    color="muscle_group",
-    markers=True,
-    labels={"week_start": "Week", "volume": "Weighted Sets"},
-)
-fig.update_traces(opacity=0.75, line=dict(width=2))
-
-# Default view: last 3 months (but data not truncated; slider lets you zoom)
-max_date = weekly["week_start"].max()
-if pd.isna(max_date):
+if weekly.empty:
     st.warning("No data available.")
+    report_rerun()
     st.stop()
-min_date = weekly["week_start"].min()
-default_start = pd.Timestamp(max_date) - relativedelta(months=3)
-
-fig.update_xaxes(
-    range=[max(default_start, min_date), max_date],
-    rangeslider=dict(visible=True),
-    rangeselector=dict(
-        buttons=[
-            dict(count=28, step="day", stepmode="backward", label="4W"),
-            dict(count=3, step="month", stepmode="backward", label="3M"),
-            dict(count=6, step="month", stepmode="backward", label="6M"),
-            dict(step="all", label="All"),
-        ]
-    ),
-    tickformat="%b %d\n%Y",
-)
 
-fig.update_layout(legend_title_text="Muscle Group")
-
-st.plotly_chart(fig, use_container_width=True)
+# Line chart
+st.plotly_chart(
+    line_figure(db_mtime, tuple(sorted(selected_groups))), use_container_width=True
+)
 
 with st.expander("Show weekly table"):
     st.dataframe(weekly_view, use_container_width=True)
@@ -126,7 +213,7 @@ with st.expander("Show weekly table"):
 st.subheader("Weekly Breakdown")
 
 # Build week options from full weekly data (not just filtered view)
-weeks = weekly["week_start"].dropna().sort_values(ascending=False).unique()
+weeks = sorted(breakdown, reverse=True)
 if len(weeks) == 0:
     st.info("No weeks available to show a breakdown.")
 else:
@@ -147,37 +234,26 @@ else:
         format_func=week_label,
     )
 
-    pie_df = weekly[
-        (weekly["week_start"] == selected_week)
-        # & (weekly["muscle_group"].isin(selected_groups)) # uncomment to filter donut
-    ].copy()
+    pie_df = breakdown[selected_week]
 
     if pie_df.empty or pie_df["volume"].sum() == 0:
         st.info("No volume recorded for the selected week with current filters.")
     else:
-        # Donut chart
-        fig_pie = px.pie(
-            pie_df,
-            names="muscle_group",
-            values="volume",
-            hole=0.3,
-        )
-        fig_pie.update_traces(textposition="inside", textinfo="percent+label")
-
-        total_sets = pie_df["volume"].sum()
-        fig_pie.add_annotation(
-            text=(
-                f"{total_sets:.1f} sets"
-                if total_sets % 1
-                else f"{int(total_sets)} sets"
-            ),
-            showarrow=False,
-            font_size=20,
-            x=0.5,
-            y=0.5,
-            xref="paper",
-            yref="paper",
-        )
-        fig_pie.update_layout(legend_title_text="Muscle Group")
+        st.plotly_chart(pie_figure(db_mtime, selected_week), use_container_width=True)
+
+# --- Strength: e1RM, PRs and tonnage ---
+st.subheader("Strength")
+exercises, total_tonnage, recent_prs = load_strength(db_mtime)
+
+if not exercises:
+    st.info("No loaded sets yet; run process_sets to fill the strength tables.")
+else:
+    selected_exercise = st.selectbox("Exercise", exercises, index=0)
+    st.plotly_chart(e1rm_figure(db_mtime, selected_exercise), use_container_width=True)
+    st.plotly_chart(tonnage_figure(db_mtime, selected_exercise), use_container_width=True)
+
+    with st.expander("Total weekly tonnage and recent PRs"):
+        st.bar_chart(total_tonnage, x="week_start", y="tonnage")
+        st.dataframe(recent_prs, use_container_width=True)
 
-        st.plotly_chart(fig_pie, use_container_width=True)
+report_rerun()
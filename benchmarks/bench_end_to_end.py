@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""End-to-end timings of the pipeline on synthetic Strong exports, checked against a baseline.
+
+For each size, writes a synthetic export and runs the stages in a fresh
+interpreter (so peak RSS is per size): import into SQLite, process_sets.main,
+per-set muscle-group mapping with a cold cache, and the dashboard's weekly
+aggregation. Results go to JSON; any stage slower than the stored baseline by
+more than the tolerance is flagged and the exit status is 1.
+
+    python benchmarks/bench_end_to_end.py
+    python benchmarks/bench_end_to_end.py --sizes 10000 100000 1000000 10000000
+    python benchmarks/bench_end_to_end.py --update-baseline
+"""
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline_end_to_end.json"
+RESULTS_PATH = Path(__file__).resolve().parent / "results" / "end_to_end.json"
+
+SIZES = [10_000, 100_000, 1_000_000]
+STAGES = ["sync", "process_sets", "muscle_map", "dashboard"]
+# Larger exports go through the streaming importer; the in-memory one would
+# hold the whole file and its parsed frame at once
+STREAM_ABOVE = 1_000_000
+
+TOLERANCE = 0.25  # fraction slower than baseline before a stage counts as regressed
+MIN_REGRESSION_SECONDS = 0.05  # ignore noise on stages that take a few ms
+
+
+def _timed(timings, stage, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings[stage] = time.perf_counter() - started
+    return result
+
+
+# ⏱ Every stage against one export and database, in this process
+def run_stages(csv_path, db_path, n_sets):
+    import sqlite3
+    from io import BytesIO
+
+    import pandas  # noqa: F401  (keep its import out of the sync timing)
+
+    import import_sets
+    import muscle_mapping
+    import process_sets
+    import queries
+
+    timings = {}
+    if n_sets > STREAM_ABOVE:
+        sync_mode = "streaming"
+        _timed(timings, "sync", import_sets.sync_to_sqlite_streaming, csv_path, db_path=db_path)
+    else:
+        sync_mode = "memory"
+        with open(csv_path, "rb") as f:
+            data = BytesIO(f.read())
+        _timed(timings, "sync", import_sets.sync_to_sqlite, data, db_path=db_path)
+
+    _timed(timings, "process_sets", process_sets.main, db_path=db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        names = [name for (name,) in conn.execute("SELECT exercise_name FROM workout_sets")]
+        # The per-row call the old enrichment made, starting from an empty cache
+        muscle_mapping.classifier.classify.cache_clear()
+        _timed(
+            timings,
+            "muscle_map",
+            lambda: [muscle_mapping.map_exercise_to_muscle_groups(n) for n in names],
+        )
+
+        def dashboard():
+            weekly = queries.load_weekly_volume(conn)
+            return queries.weekly_breakdown(weekly)
+
+        weeks = len(_timed(timings, "dashboard", dashboard))
+
+    return {
+        "sets": n_sets,
+        "sync_mode": sync_mode,
+        "weeks": weeks,
+        "seconds": timings,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def measure(n_sets, seed=0):
+    from synthetic_export import write_strong_export
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "strong.csv"
+        started = time.perf_counter()
+        write_strong_export(csv_path, n_sets, seed=seed)
+        generated = time.perf_counter() - started
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", str(csv_path), str(Path(tmp) / "bench.db"), str(n_sets)],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=tmp,
+        )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["generate_seconds"] = generated
+    return result
+
+
+# 🚨 (size, stage, baseline s, current s) for every stage slower than allowed
+def find_regressions(results, baseline, tolerance=TOLERANCE, min_seconds=MIN_REGRESSION_SECONDS):
+    regressions = []
+    for size, result in results["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for stage, seconds in result["seconds"].items():
+            before = base["seconds"].get(stage)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > min_seconds:
+                regressions.append((size, stage, before, seconds))
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_json(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def report(results, baseline):
+    base_sizes = (baseline or {}).get("sizes", {})
+    print(f"{'sets':>10} {'stage':>13} {'seconds':>9} {'baseline':>9} {'change':>8}")
+    for size, result in results["sizes"].items():
+        for stage in STAGES:
+            seconds = result["seconds"][stage]
+            before = base_sizes.get(size, {}).get("seconds", {}).get(stage)
+            if before:
+                change = f"{(seconds - before) / before:+8.0%}"
+                base = f"{before:9.3f}"
+            else:
+                change, base = f"{'':>8}", f"{'—':>9}"
+            print(f"{int(size):>10} {stage:>13} {seconds:9.3f} {base} {change}")
+        print(f"{int(size):>10} {'peak RSS MB':>13} {result['peak_rss_mb']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--child", nargs=3, metavar=("CSV", "DB", "SETS"))
+    args = parser.parse_args()
+
+    if args.child:
+        csv_path, db_path, n_sets = args.child
+        result = run_stages(csv_path, db_path, int(n_sets))
+        import log_config
+
+        # Console log lines first, so the result stays the last line of stdout
+        log_config.flush_logs()
+        print(json.dumps(result))
+        return
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "sizes": {},
+    }
+    for n_sets in args.sizes:
+        results["sizes"][str(n_sets)] = measure(n_sets, args.seed)
+    write_json(args.output, results)
+
+    baseline = load_baseline(args.baseline)
+    report(results, baseline)
+    print(f"📄 Results written to {args.output}")
+
+    if args.update_baseline:
+        write_json(args.baseline, results)
+        print(f"📌 Baseline updated: {args.baseline}")
+        return
+    if baseline is None:
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to store one")
+        return
+    if baseline.get("machine") != results["machine"]:
+        print(f"⚠️ Baseline was recorded on {baseline.get('machine')}; timings may not compare")
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for size, stage, before, seconds in regressions:
+        print(f"❌ {stage} at {int(size):,} sets: {before:.3f}s → {seconds:.3f}s")
+    if regressions:
+        sys.exit(1)
+    print(f"✅ No stage more than {args.tolerance:.0%} slower than the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Muscle-group enrichment on synthetic sets: the old per-row apply vs today's paths.
+
+Builds a synthetic history, then times the primary/secondary split four ways
+on the same rows:
+
+  apply  the original process_sets: map, sort and split every row through
+         .apply, one pd.Series per row
+  frame  process_sets.enrich: classify each distinct name once, map the columns
+  sql    the join against exercise_muscle_map that process_sets runs today
+         (ENRICH_SELECT, set_index included), rows fetched into Python
+  write  the same join inserted into the indexed enriched table, which is
+         what a full process_sets rebuild pays (the other paths write nothing)
+
+    python benchmarks/bench_enrich.py --sets 1000000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_export import write_strong_export  # noqa: E402
+
+import import_sets  # noqa: E402
+import process_sets  # noqa: E402
+from muscle_mapping import map_exercise_to_muscle_groups  # noqa: E402
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+# As process_sets did it before the exercise map and enrich()
+def apply_split(df):
+    import pandas as pd
+
+    df = df.copy()
+    df["set_index"] = df.groupby("date").cumcount()
+    df["muscle_groups"] = df["exercise_name"].apply(map_exercise_to_muscle_groups)
+    df["muscle_groups"] = df["muscle_groups"].apply(process_sets.sort_groups)
+    df[["muscle_group_primary", "muscle_group_secondary"]] = df["muscle_groups"].apply(
+        lambda g: pd.Series(process_sets.split_groups(g))
+    )
+    return df
+
+
+def sql_join(conn):
+    return conn.execute(process_sets.ENRICH_SELECT).fetchall()
+
+
+def sql_write(conn):
+    with conn:
+        conn.execute(f"DELETE FROM {process_sets.ENRICHED_TABLE}")
+        conn.execute(
+            f"INSERT INTO {process_sets.ENRICHED_TABLE} ({process_sets.ENRICHED_COLUMNS}) "
+            f"{process_sets.ENRICH_SELECT}"
+        )
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=1_000_000)
+    parser.add_argument("--paths", nargs="+", default=["apply", "frame", "sql", "write"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, db_path = Path(tmp) / "strong.csv", Path(tmp) / "bench.db"
+        write_strong_export(csv_path, args.sets)
+        import_sets.sync_to_sqlite_streaming(csv_path, db_path=db_path, incremental=False)
+        csv_path.unlink()
+
+        conn = sqlite3.connect(db_path)
+        process_sets.enrich_sets(conn)  # exercise map, tables and indexes
+        df = pd.read_sql_query(
+            "SELECT id, date, exercise_name, set_order FROM workout_sets ORDER BY rowid", conn
+        )
+        # Every path starts with a warm classifier cache
+        process_sets.enrich(df.head(1000))
+
+        results = {}
+        if "apply" in args.paths:
+            results["apply"] = timed(apply_split, df)
+        if "frame" in args.paths:
+            results["frame"] = timed(process_sets.enrich, df)
+        if "sql" in args.paths:
+            results["sql"] = timed(sql_join, conn)
+        if "write" in args.paths:
+            results["write"] = timed(sql_write, conn)
+        conn.close()
+
+    print(f"sets: {len(df):,} ({df['exercise_name'].nunique()} exercises)")
+    baseline = results.get("apply")
+    for path, seconds in results.items():
+        speedup = f" ({baseline / seconds:,.0f}x)" if baseline and path != "apply" else ""
+        print(f"{path:>6} {seconds:9.2f}s{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Cold import cost of the pipeline modules, from `python -X importtime`.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --module import_sets --top 15
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = [
+    "config",
+    "notify",
+    "dropbox_auth",
+    "import_sets",
+    "process_sets",
+    "pipeline",
+    "team_ingest",
+    "outbox",
+    "run_stats",
+]
+
+# Cumulative import time allowed per module, in milliseconds. These modules
+# should only pull in the standard library plus each other; pandas alone
+# costs several hundred ms.
+BUDGET_MS = 150
+
+# Must stay unimported until a function actually needs them
+HEAVY_MODULES = ["pandas", "numpy", "dropbox", "requests", "dotenv", "pushover"]
+
+
+# 🕑 One fresh interpreter per module, so nothing is already cached in sys.modules.
+# Returns {module: (self_us, cumulative_us)} for the module and what it imported,
+# leaving out what the interpreter loaded at startup.
+def import_times(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    # A module is reported after everything it imported, each one indented deeper
+    _, top_depth, *_ = rows[-1]
+    times = {}
+    for name, depth, self_us, cumulative_us in reversed(rows):
+        if name != module and depth <= top_depth:
+            break
+        times[name] = (self_us, cumulative_us)
+    return times
+
+
+def measure(module, repeat=3):
+    # Best of a few runs: the first one also pays for writing .pyc files
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda t: t[module][1])
+    return best[module][1] / 1000, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", action="append", help="default: all pipeline modules")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.module or MODULES:
+        total_ms, times = measure(module, args.repeat)
+        heavy = [name for name in HEAVY_MODULES if name in times]
+        flag = "✅" if total_ms <= BUDGET_MS and not heavy else "❌"
+        over_budget |= flag == "❌"
+        print(f"{flag} {module:<14} {total_ms:8.1f} ms" + (f"  heavy: {heavy}" if heavy else ""))
+        slowest = sorted(times.items(), key=lambda kv: kv[1][0], reverse=True)[: args.top]
+        for name, (self_us, _) in slowest:
+            print(f"      {self_us / 1000:7.1f} ms  {name}")
+    print(f"Budget: {BUDGET_MS} ms per module")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
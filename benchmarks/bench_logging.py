@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Caller-side cost of a log record: queued to the listener vs written in place.
+
+Times logger.info from the calling thread with log_config's queue handler and
+with a RotatingFileHandler attached directly (the old setup), plus the cost of
+an instrument span, all against a temporary log file:
+
+    python benchmarks/bench_logging.py --records 100000
+"""
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import instrument  # noqa: E402
+import log_config  # noqa: E402
+
+
+def per_call_us(logger, n):
+    # Per-call latencies, so the slow tail (a flush or a rotation) shows too
+    times = []
+    for i in range(n):
+        started = time.perf_counter()
+        logger.info(f"✅ Synced {i} new set(s) to SQLite.")
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return {
+        "median": statistics.median(times) * 1e6,
+        "p99": times[int(len(times) * 0.99)] * 1e6,
+        "max": times[-1] * 1e6,
+        "total_s": sum(times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_config.flush_logs()
+        log_config.LOG_PATH = Path(tmp) / "queued.log"
+        queued = per_call_us(log_config.get_logger("bench_queued"), args.records)
+        started = time.perf_counter()
+        log_config.flush_logs()
+        drain = time.perf_counter() - started
+
+        direct_logger = logging.getLogger("bench_direct")
+        direct_logger.setLevel(logging.INFO)
+        direct_logger.propagate = False
+        handler = RotatingFileHandler(
+            Path(tmp) / "direct.log",
+            maxBytes=log_config.MAX_BYTES,
+            backupCount=log_config.BACKUP_COUNT,
+        )
+        handler.setFormatter(logging.Formatter(log_config.LOG_FORMAT, datefmt=log_config.DATE_FORMAT))
+        direct_logger.addHandler(handler)
+        direct = per_call_us(direct_logger, args.records)
+        handler.close()
+
+        with instrument.run("bench"):
+            started = time.perf_counter()
+            for _ in range(args.records):
+                with instrument.span("stage") as span:
+                    span.rows = 1
+            span_us = (time.perf_counter() - started) / args.records * 1e6
+        log_config.flush_logs()
+
+    print(f"records: {args.records:,}")
+    print(f"{'handler':>8} {'median µs':>10} {'p99 µs':>8} {'max µs':>9} {'caller s':>9}")
+    for name, t in [("queued", queued), ("direct", direct)]:
+        print(f"{name:>8} {t['median']:10.1f} {t['p99']:8.1f} {t['max']:9.0f} {t['total_s']:9.2f}")
+    print(f"listener drained the queue in {drain:.2f}s after the last call")
+    print(f"instrument span: {span_us:.1f} µs each, including its record")
+
+
+if __name__ == "__main__":
+    main()
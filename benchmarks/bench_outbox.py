@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Outbox throughput against the local stub sink, by concurrency and batch size.
+
+    python benchmarks/bench_outbox.py --sets 50000 --latency 0.02 --concurrency 1 4 8
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_export import write_strong_export  # noqa: E402
+
+import outbox  # noqa: E402
+from local_sink import StubSink  # noqa: E402
+from setup_db import setup_db  # noqa: E402
+
+
+def build_db(tmp, n_sets):
+    import import_sets
+    import process_sets
+
+    csv_path, db_path = Path(tmp) / "strong.csv", Path(tmp) / "base.db"
+    write_strong_export(csv_path, n_sets)
+    import_sets.sync_to_sqlite_streaming(csv_path, db_path=db_path, incremental=False)
+    process_sets.main(db_path=db_path)
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=50_000)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub seconds per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--rate", type=float, default=0, help="requests per second (0: no limit)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = build_db(tmp, args.sets)
+        print(f"{'batch':>6} {'workers':>8} {'seconds':>9} {'sets/sec':>10} {'requests':>9}")
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                db_path = Path(tmp) / "run.db"
+                shutil.copyfile(base, db_path)
+                sink = StubSink(latency=args.latency).start()
+                conn = sqlite3.connect(db_path)
+                setup_db(conn)
+                started = time.perf_counter()
+                metrics = outbox.Outbox(
+                    conn,
+                    outbox.HttpSink(sink.url),
+                    batch_size=batch_size,
+                    concurrency=concurrency,
+                    rate=args.rate,
+                ).run()
+                elapsed = time.perf_counter() - started
+                conn.close()
+                sink.stop()
+                print(
+                    f"{batch_size:>6} {concurrency:>8} {elapsed:>9.2f} "
+                    f"{metrics['sets'] / elapsed:>10,.0f} {sink.requests:>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
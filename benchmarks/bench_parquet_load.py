@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Load time and peak RSS of the enriched-set history: SQLite vs the Parquet sidecar.
+
+Builds a synthetic history per size, then loads it in a fresh interpreter per
+backend so ru_maxrss is per run. Every size covers the same span of years, so
+the sidecar holds the same number of monthly files and only their size grows:
+
+    python benchmarks/bench_parquet_load.py --sizes 100000 1000000 --years 10
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_export import write_strong_export  # noqa: E402
+
+
+def build_history(tmp, n_rows, years):
+    import import_sets
+    import process_sets
+
+    csv_path = Path(tmp) / "strong.csv"
+    db_path = Path(tmp) / "bench.db"
+    parquet_dir = Path(tmp) / "parquet"
+    write_strong_export(csv_path, n_rows, span_years=years)
+    import_sets.sync_to_sqlite_streaming(csv_path, db_path=db_path, incremental=False)
+    process_sets.main(db_path=db_path, parquet_dir=parquet_dir)
+    csv_path.unlink()
+    return db_path, parquet_dir
+
+
+def _child(backend, db_path, parquet_dir):
+    import sqlite3
+
+    import pandas  # noqa: F401  (both backends end in pandas; keep its import out of the timing)
+    import pyarrow.parquet  # noqa: F401
+
+    import parquet_store
+    import queries
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if backend == "sqlite":
+        with sqlite3.connect(db_path) as conn:
+            df = queries.load_enriched_sets(conn)
+    else:
+        df = parquet_store.load_enriched_sets(parquet_dir)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "rows": len(df),
+                "seconds": elapsed,
+                "peak_rss_mb": peak_kb / 1024,
+                "load_rss_mb": (peak_kb - rss_before) / 1024,
+                "frame_mb": df.memory_usage(deep=True).sum() / 2**20,
+            }
+        )
+    )
+
+
+def measure(backend, db_path, parquet_dir):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", backend, str(db_path), str(parquet_dir)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=db_path.parent,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "parquet"])
+    parser.add_argument(
+        "--years", type=float, default=10, help="history span, i.e. 12 monthly files a year"
+    )
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "DB", "PARQUET"))
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    print(
+        f"{'rows':>10} {'backend':>8} {'seconds':>9} {'peak RSS MB':>12} "
+        f"{'load RSS MB':>12} {'frame MB':>9} {'files':>6}"
+    )
+    for n_rows in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path, parquet_dir = build_history(tmp, n_rows, args.years)
+            n_files = sum(1 for _ in parquet_dir.rglob("*.parquet"))
+            for backend in args.backends:
+                r = measure(backend, db_path, parquet_dir)
+                print(
+                    f"{r['rows']:>10} {backend:>8} {r['seconds']:>9.2f} "
+                    f"{r['peak_rss_mb']:>12.1f} {r['load_rss_mb']:>12.1f} {r['frame_mb']:>9.1f} "
+                    f"{n_files:>6}"
+                )
+
+
+if __name__ == "__main__":
+    main()
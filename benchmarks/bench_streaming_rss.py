@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Peak RSS of the in-memory vs streaming importer as the Strong export grows.
+
+Each measurement runs in a fresh interpreter so ru_maxrss is per run:
+
+    python benchmarks/bench_streaming_rss.py --sizes 8000 100000 1000000 5000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _child(mode, csv_path, db_path, max_memory_mb):
+    sys.path.insert(0, str(ROOT))
+    import time
+
+    import import_sets
+    import log_config
+
+    started = time.perf_counter()
+    if mode == "stream":
+        import_sets.sync_to_sqlite_streaming(
+            csv_path, db_path=db_path, max_memory_mb=max_memory_mb, incremental=False
+        )
+    else:
+        with open(csv_path, "rb") as f:
+            import_sets.sync_to_sqlite(
+                import_sets.BytesIO(f.read()), db_path=db_path, incremental=False
+            )
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Console log lines first, so the result stays the last line of stdout
+    log_config.flush_logs()
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024}))
+
+
+# {"failed": exit code} when the child dies, e.g. killed (-9) for running out of memory
+def measure(mode, csv_path, max_memory_mb):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                mode,
+                str(csv_path),
+                os.path.join(tmp, "bench.db"),
+                str(max_memory_mb),
+            ],
+            capture_output=True,
+            text=True,
+            cwd=tmp,
+        )
+    if out.returncode != 0:
+        return {"failed": out.returncode}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    # Only the parent writes exports; the --child runs just import them
+    from synthetic_export import write_strong_export
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[8_000, 100_000, 1_000_000, 5_000_000]
+    )
+    parser.add_argument("--modes", nargs="+", default=["memory", "stream"])
+    parser.add_argument("--max-memory-mb", type=int, default=64)
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "CSV", "DB", "MB"))
+    args = parser.parse_args()
+
+    if args.child:
+        mode, csv_path, db_path, mb = args.child
+        _child(mode, csv_path, db_path, int(mb))
+        return
+
+    print(f"{'rows':>10} {'mode':>8} {'seconds':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            csv_path = Path(tmp) / f"strong_{n_rows}.csv"
+            write_strong_export(csv_path, n_rows)
+            for mode in args.modes:
+                result = measure(mode, csv_path, args.max_memory_mb)
+                if "failed" in result:
+                    print(f"{n_rows:>10} {mode:>8}    failed, exit {result['failed']}")
+                    continue
+                print(
+                    f"{n_rows:>10} {mode:>8} {result['seconds']:>9.2f} "
+                    f"{result['peak_rss_mb']:>12.1f}"
+                )
+            csv_path.unlink()
+
+
+if __name__ == "__main__":
+    main()
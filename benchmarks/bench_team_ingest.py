@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Team ingest throughput with 1 vs N workers on synthetic per-athlete exports.
+
+Writes one synthetic export per athlete behind a LocalDropbox root, then
+ingests the whole team into fresh per-athlete DBs once per worker count:
+
+    python benchmarks/bench_team_ingest.py --athletes 8 --sets 200000 --workers 1 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_export import ExportProfile, write_strong_export  # noqa: E402
+
+import team_ingest  # noqa: E402
+
+
+def build_team(tmp, n_athletes, n_sets):
+    profile = ExportProfile()
+    athletes = []
+    for i in range(n_athletes):
+        athlete_id = f"athlete{i:02d}"
+        source = f"/{athlete_id}/strong_workouts.csv"
+        path = Path(tmp) / "dropbox" / athlete_id / "strong_workouts.csv"
+        path.parent.mkdir(parents=True)
+        write_strong_export(path, n_sets, seed=i, profile=profile)
+        athletes.append({"id": athlete_id, "source": source})
+
+    manifest = Path(tmp) / "manifest.json"
+    manifest.write_text(json.dumps({"athletes": athletes}))
+    return manifest, Path(tmp) / "dropbox"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--athletes", type=int, default=8)
+    parser.add_argument("--sets", type=int, default=100_000, help="sets per athlete")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest, local_root = build_team(tmp, args.athletes, args.sets)
+        athletes = team_ingest.load_manifest(manifest)
+
+        print(f"{args.athletes} athlete(s) x {args.sets:,} set(s), {os.cpu_count()} CPU(s)")
+        print(f"{'workers':>8} {'seconds':>9} {'sets/sec':>12} {'speedup':>8}")
+        serial = None
+        for workers in args.workers:
+            data_dir = Path(tmp) / f"data_{workers}"
+            started = time.perf_counter()
+            results = team_ingest.ingest_team(
+                athletes, data_dir=data_dir, workers=workers, local_root=local_root
+            )
+            elapsed = time.perf_counter() - started
+            failed = [r["athlete"] for r in results if r["status"] != "synced"]
+            if failed:
+                raise SystemExit(f"❌ Ingest failed for {failed}")
+            rows = sum(r["rows"] for r in results)
+            serial = serial or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {rows / elapsed:>12,.0f} {serial / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
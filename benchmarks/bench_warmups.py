@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Cost of warmup inference inside process_sets, full rebuild and incremental.
+
+Runs process_sets.main on a synthetic history with inference switched off and
+on, for a full rebuild and for an incremental run after one more day of sets:
+
+    python benchmarks/bench_warmups.py --sets 1000000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_export import write_strong_export  # noqa: E402
+
+import import_sets  # noqa: E402
+import process_sets  # noqa: E402
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+# One more day of sets: the 20 sets up to last_rowid again, `days` days later
+def add_day(db_path, days, last_rowid):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            f"""
+            INSERT INTO workout_sets (id, date, workout_name, duration, exercise_name,
+                set_order, weight, reps, distance, seconds, notes, workout_notes, rpe)
+            SELECT id || '-next{days}', datetime(date, '+{days} day'), workout_name,
+                duration, exercise_name, set_order, weight, reps, distance, seconds,
+                notes, workout_notes, rpe
+            FROM workout_sets
+            WHERE rowid > ? AND rowid <= ?
+            """,
+            (last_rowid - 20, last_rowid),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=2, help="full rebuilds per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, db_path = Path(tmp) / "strong.csv", Path(tmp) / "bench.db"
+        write_strong_export(csv_path, args.sets)
+        import_sets.sync_to_sqlite_streaming(csv_path, db_path=db_path, incremental=False)
+        process_sets.main(db_path=db_path)  # build the map and tables once
+
+        detect = process_sets.find_inferred_warmups
+        skip = lambda conn, only_affected=True: []  # noqa: E731
+        # Alternate off/on and keep the best of each; one run is too noisy to compare
+        full = {False: [], True: []}
+        for _ in range(args.repeat):
+            for infer in (False, True):
+                process_sets.find_inferred_warmups = detect if infer else skip
+                full[infer].append(timed(process_sets.main, full=True, db_path=db_path))
+        with sqlite3.connect(db_path) as conn:
+            inference = timed(detect, conn, only_affected=False)
+            inferred = conn.execute(
+                "SELECT COUNT(*) FROM workout_sets_enriched WHERE is_warmup = 1 AND set_order <> -1"
+            ).fetchone()[0]
+
+            last_rowid = conn.execute("SELECT MAX(rowid) FROM workout_sets").fetchone()[0]
+
+        incremental = {}
+        for day, infer in enumerate((False, True), start=1):
+            add_day(db_path, day, last_rowid)
+            process_sets.find_inferred_warmups = detect if infer else skip
+            incremental[infer] = timed(process_sets.main, db_path=db_path)
+        process_sets.find_inferred_warmups = detect
+
+    without, with_inference = min(full[False]), min(full[True])
+
+    print(f"sets:                     {args.sets:,}")
+    print(f"inferred warmups:         {inferred:,}")
+    print(f"full rebuild, no infer:   {without:.2f}s")
+    print(f"full rebuild, inference:  {with_inference:.2f}s ({with_inference - without:+.2f}s)")
+    print(f"inference alone:          {inference:.2f}s ({inference / with_inference:.1%} of rebuild)")
+    print(
+        f"incremental, one day:     {incremental[True]:.3f}s "
+        f"({incremental[True] - incremental[False]:+.3f}s vs no inference)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Synthetic Strong exports at any scale, shaped like the sample export.
+
+Workouts are assembled from real pieces of strong_workouts.csv: each workout
+borrows the name, duration and notes of a sample workout and as many distinct
+exercises, drawn with the sample's exercise frequencies. Each exercise copies
+the sets of one real occurrence of it (warmups, FAILURE sets, weights, reps),
+so set counts and the exercise-name distribution match the sample.
+
+    python benchmarks/synthetic_export.py --sets 1000000 -o strong_1m.csv
+"""
+import argparse
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_CSV = ROOT / "strong_workouts.csv"
+
+START_DATE = "2020-01-06 07:00:00"
+WORKOUTS_PER_CHUNK = 5_000
+# Workouts about two days apart, a quarter of that at least. Past a few hundred
+# thousand sets the gaps shrink instead, so the export stays within MAX_SPAN_YEARS
+# (pandas timestamps end in 2262) like a coach's export covering many athletes.
+MEAN_GAP_HOURS = 48
+MAX_SPAN_YEARS = 40
+
+
+class ExportProfile:
+    # The sample export cut into workouts and exercise occurrences, as arrays
+    def __init__(self, sample_csv=SAMPLE_CSV):
+        sample = pd.read_csv(sample_csv, delimiter=";", dtype=str, keep_default_na=False)
+        self.columns = list(sample.columns)
+
+        # Sets of one exercise within one workout are a contiguous run of rows
+        workout = sample["Workout #"].to_numpy()
+        exercise = sample["Exercise Name"].to_numpy()
+        starts = np.flatnonzero(
+            np.r_[True, (workout[1:] != workout[:-1]) | (exercise[1:] != exercise[:-1])]
+        )
+        self.rows = sample
+        self.occ_start = starts
+        self.occ_len = np.diff(np.r_[starts, len(sample)])
+
+        codes, self.exercises = pd.factorize(exercise[starts])
+        # Occurrences grouped by exercise, so one exercise's runs are a slice
+        order = np.argsort(codes, kind="stable")
+        self.occ_by_exercise = order
+        counts = np.bincount(codes, minlength=len(self.exercises))
+        self.exercise_first = np.r_[0, np.cumsum(counts)[:-1]]
+        self.exercise_count = counts
+        self.exercise_p = counts / counts.sum()
+
+        # One template per sample workout: its first row and exercise count
+        first = np.flatnonzero(np.r_[True, workout[1:] != workout[:-1]])
+        self.workout_row = first
+        self.workout_exercises = np.diff(np.r_[np.searchsorted(starts, first), len(starts)])
+        self.sets_per_workout = len(sample) / len(first)
+
+    def mean_gap_seconds(self, n_sets, span_years=MAX_SPAN_YEARS):
+        n_workouts = max(1.0, n_sets / self.sets_per_workout)
+        span_hours = span_years * 365.25 * 24
+        return min(MEAN_GAP_HOURS, span_hours / n_workouts) * 3600
+
+
+def _draw_exercises(profile, rng, n_workouts, k):
+    # Distinct exercises per workout, proportional to frequency (Gumbel top-k)
+    keys = np.log(profile.exercise_p) + rng.gumbel(size=(n_workouts, len(profile.exercise_p)))
+    top = np.argsort(-keys, axis=1)[:, : k.max()]
+    keep = np.arange(top.shape[1]) < k[:, None]
+    return top[keep], np.repeat(np.arange(n_workouts), k)
+
+
+def _chunk(profile, rng, first_workout, start_time, n_workouts, mean_gap):
+    template = rng.integers(len(profile.workout_row), size=n_workouts)
+    k = np.minimum(profile.workout_exercises[template], len(profile.exercises))
+    exercise, slot_workout = _draw_exercises(profile, rng, n_workouts, k)
+
+    # One real occurrence of each drawn exercise, expanded to its set rows
+    pick = profile.exercise_first[exercise] + (
+        rng.random(len(exercise)) * profile.exercise_count[exercise]
+    ).astype(np.int64)
+    occ = profile.occ_by_exercise[pick]
+    lengths = profile.occ_len[occ]
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    set_rows = np.repeat(profile.occ_start[occ], lengths) + offsets
+    set_workout = np.repeat(slot_workout, lengths)
+
+    gaps = mean_gap / 4 + rng.exponential(mean_gap * 3 / 4, n_workouts)
+    times = start_time + pd.to_timedelta(np.cumsum(np.maximum(gaps, 1)).astype(np.int64), unit="s")
+
+    df = profile.rows.iloc[set_rows].reset_index(drop=True)
+    header = profile.rows.iloc[profile.workout_row[template[set_workout]]]
+    for col in ["Workout Name", "Duration (sec)", "Workout Notes"]:
+        df[col] = header[col].to_numpy()
+    df["Workout #"] = (first_workout + set_workout).astype(str)
+    # Format once per workout, not once per set
+    df["Date"] = times.strftime("%Y-%m-%d %H:%M:%S").to_numpy()[set_workout]
+    return df, times[-1]
+
+
+# 🏋️ Write an export of exactly n_sets rows; the same seed gives the same file.
+# span_years caps how many years the workouts cover.
+def write_strong_export(path, n_sets, seed=0, profile=None, span_years=MAX_SPAN_YEARS):
+    profile = profile or ExportProfile()
+    rng = np.random.default_rng(seed)
+    mean_gap = profile.mean_gap_seconds(n_sets, span_years)
+    written, workout, when = 0, 1, pd.Timestamp(START_DATE)
+    with open(path, "w", newline="") as f:
+        f.write(";".join(f'"{c}"' for c in profile.columns) + "\n")
+        while written < n_sets:
+            df, when = _chunk(profile, rng, workout, when, WORKOUTS_PER_CHUNK, mean_gap)
+            workout += WORKOUTS_PER_CHUNK
+            df = df.head(n_sets - written)
+            df.to_csv(
+                f,
+                sep=";",
+                index=False,
+                header=False,
+                quoting=csv.QUOTE_ALL,
+                lineterminator="\n",
+            )
+            written += len(df)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="strong_synthetic.csv")
+    args = parser.parse_args()
+
+    written = write_strong_export(args.output, args.sets, seed=args.seed)
+    print(f"🏋️ Wrote {written:,} set(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+# Settings are read from the environment (and .env) on first access, so
+# importing this module never touches the filesystem.
+SETTINGS = ("DROPBOX_TOKEN", "PUSHOVER_USER_KEY", "PUSHOVER_API_TOKEN")
 
-DROPBOX_TOKEN = os.getenv("DROPBOX_TOKEN")
-PUSHOVER_USER_KEY = os.getenv("PUSHOVER_USER_KEY")
-PUSHOVER_API_TOKEN = os.getenv("PUSHOVER_API_TOKEN")
+_loaded = False
+
+
+def load_settings():
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _loaded = True
+
+
+def __getattr__(name):
+    if name in SETTINGS:
+        load_settings()
+        return os.getenv(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,94 @@
+# detect_warmups.py
+# Ramp-up sets Strong wasn't told about. Within one workout's sets of one
+# exercise, a set counts as a warmup when it comes before the first working set
+# and is clearly lighter than the working sets, by weight and by estimated 1RM
+# (so a light set of many reps isn't taken for a ramp-up). Everything is
+# grouped array arithmetic over (date, exercise_name); no per-row Python.
+
+# A set within this share of the session's top weight is a working set
+WORKING_SHARE = 0.9
+# Ramp-up sets are at most this share of the top weight and of the top e1RM
+RAMP_SHARE = 0.8
+# Bump when infer_warmups changes which sets it flags; process_sets then
+# re-infers the whole history once (the shares above count too)
+RULE_VERSION = 1
+
+
+def e1rm(weight, reps):
+    # Epley; sets without reps count as singles
+    import numpy as np
+
+    return weight * (1 + np.nan_to_num(reps) / 30)
+
+
+def _group_max(groups, values, n_groups):
+    import numpy as np
+
+    out = np.full(n_groups, -np.inf)
+    np.maximum.at(out, groups, values)
+    return out[groups]
+
+
+def _group_min(groups, values, n_groups):
+    import numpy as np
+
+    out = np.full(n_groups, np.inf)
+    np.minimum.at(out, groups, values)
+    return out[groups]
+
+
+# 🔥 Boolean mask of inferred warmups. groups numbers each (date, exercise)
+# session; rows must be in the order the sets were done. marked holds Strong's
+# own WARM_UP flags, which are neither re-flagged nor used as working sets.
+def infer_warmups(groups, weight, reps, marked):
+    import numpy as np
+
+    groups = np.asarray(groups)
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+    weight = np.nan_to_num(np.asarray(weight, dtype=float))
+    reps = np.asarray(reps, dtype=float)
+    marked = np.asarray(marked, dtype=bool)
+
+    # Strong's warmups drop out of the session's top weight and top e1RM
+    loaded = np.where(marked, 0.0, weight)
+    estimated = np.where(marked, 0.0, e1rm(weight, reps))
+    top = _group_max(groups, loaded, n_groups)
+    top_e1rm = _group_max(groups, estimated, n_groups)
+
+    position = np.arange(len(groups), dtype=float)
+    working = ~marked & (top > 0) & (loaded >= WORKING_SHARE * top)
+    first_working = _group_min(groups, np.where(working, position, np.inf), n_groups)
+
+    return (
+        ~marked
+        & (weight > 0)  # bodyweight and unloaded sets have nothing to ramp
+        & (position < first_working)
+        & (weight <= RAMP_SHARE * top)
+        & (e1rm(weight, reps) <= RAMP_SHARE * top_e1rm)
+    )
+
+
+def session_codes(dates, exercise_names):
+    import pandas as pd
+
+    # Factorize each key, then the combined integer; much cheaper than tuples
+    date_codes, _ = pd.factorize(dates)
+    name_codes, names = pd.factorize(exercise_names)
+    codes, _ = pd.factorize(date_codes.astype("int64") * (len(names) + 1) + name_codes)
+    return codes
+
+
+# 🔥 df with is_warmup set for Strong's WARM_UP sets and inferred ramp-ups.
+# Needs date, exercise_name, weight and reps, plus set_order or is_warmup; rows
+# in the order they were done (rowid order in workout_sets).
+def detect_warmups(df):
+    df = df.copy()
+    if "is_warmup" in df.columns:
+        marked = df["is_warmup"].fillna(0).astype(bool).to_numpy()
+    else:
+        marked = (df["set_order"].astype(str).isin(["-1", "WARM_UP"])).to_numpy()
+
+    groups = session_codes(df["date"], df["exercise_name"])
+    inferred = infer_warmups(groups, df["weight"], df["reps"], marked)
+    df["is_warmup"] = (marked | inferred).astype("int8")
+    return df
@@ -1,44 +1,178 @@
 import json
 import os
+import tempfile
+import threading
 import time
 
-import requests
+from log_config import get_logger
+
+logger = get_logger("dropbox_auth")
 
 TOKEN_FILE = os.path.join(os.path.dirname(__file__), "dropbox_token.json")
+TOKEN_URL = "https://api.dropboxapi.com/oauth2/token"
 
+# Refresh this many seconds before expires_at, so no caller ever waits on one
+REFRESH_MARGIN = 300
+DEFAULT_EXPIRES_IN = 14400
+REQUEST_TIMEOUT = (5, 30)  # connect, read
+RETRY_SECONDS = 30  # background retry after a failed refresh
+
+
+# 🔐 Access token kept in memory and refreshed ahead of expiry.
+# One refresh at a time: concurrent callers wait for it and share the result.
+class TokenProvider:
+    def __init__(
+        self,
+        token_file=TOKEN_FILE,
+        token_url=TOKEN_URL,
+        refresh_margin=REFRESH_MARGIN,
+        session=None,
+    ):
+        self.token_file = token_file
+        self.token_url = token_url
+        self.refresh_margin = refresh_margin
+        self._session = session
+        self._data = None
+        self._lock = threading.Lock()
+        self._timer = None
+        self._background = False
+        self.refreshes = 0
+
+    @property
+    def session(self):
+        # Pooled connections to the token endpoint, reused across refreshes
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def _is_fresh(self, data):
+        if data is None:
+            return False
+        return time.time() < data.get("expires_at", 0) - self.refresh_margin
+
+    def _read(self):
+        with open(self.token_file, "r") as f:
+            return json.load(f)
+
+    def _write(self, data):
+        # Write a sibling temp file and rename it over the original, so readers
+        # never see a half-written file and concurrent writers can't interleave
+        directory = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=".dropbox_token.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.token_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def token(self):
+        data = self._data
+        if self._is_fresh(data):
+            return data["access_token"]
+
+        with self._lock:
+            # Whoever held the lock before us may have refreshed already
+            if self._is_fresh(self._data):
+                return self._data["access_token"]
+            # ...or another process did, and left it in the file
+            data = self._read()
+            if not self._is_fresh(data):
+                data = self._refresh(data)
+            self._data = data
+            self._schedule()
+            return data["access_token"]
+
+    def refresh(self):
+        with self._lock:
+            self._data = self._refresh(self._read())
+            self._schedule()
+            return self._data["access_token"]
+
+    def _refresh(self, token_data):
+        response = self.session.post(
+            self.token_url,
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": token_data["refresh_token"],
+            },
+            auth=(token_data["app_key"], token_data["app_secret"]),
+            timeout=REQUEST_TIMEOUT,
+        )
+        if not response.ok:
+            raise Exception(f"❌ Failed to refresh Dropbox token: {response.text}")
 
-def refresh_dropbox_token():
-    with open(TOKEN_FILE, "r") as f:
-        token_data = json.load(f)
-
-    refresh_token = token_data["refresh_token"]
-    app_key = token_data["app_key"]
-    app_secret = token_data["app_secret"]
-
-    response = requests.post(
-        "https://api.dropboxapi.com/oauth2/token",
-        data={
-            "grant_type": "refresh_token",
-            "refresh_token": refresh_token,
-        },
-        auth=(app_key, app_secret),
-    )
-
-    if response.ok:
         new_data = response.json()
+        token_data = dict(token_data)
         token_data["access_token"] = new_data["access_token"]
-        token_data["expires_at"] = time.time() + new_data.get("expires_in", 14400)
-        with open(TOKEN_FILE, "w") as f:
-            json.dump(token_data, f)
-        return token_data["access_token"]
-    else:
-        raise Exception(f"❌ Failed to refresh Dropbox token: {response.text}")
+        expires_in = new_data.get("expires_in", DEFAULT_EXPIRES_IN)
+        token_data["expires_at"] = time.time() + expires_in
+        self._write(token_data)
+        self.refreshes += 1
+        logger.info("🔐 Refreshed Dropbox access token.")
+        return token_data
 
+    # ⏰ Background refresh at expires_at - refresh_margin, rescheduled after each one
+    def start_background_refresh(self):
+        with self._lock:
+            self._background = True
+            if self._data is None:
+                self._data = self._read()
+            self._schedule()
+
+    def stop(self):
+        with self._lock:
+            self._background = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self, delay=None):
+        if not self._background:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        if delay is None:
+            due = self._data.get("expires_at", 0) - self.refresh_margin
+            delay = max(0.0, due - time.time())
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.token()
+        except Exception as e:
+            logger.error(f"❌ Background token refresh failed: {e}")
+            with self._lock:
+                self._schedule(RETRY_SECONDS)
+            return
+        with self._lock:
+            # token() only reschedules when it refreshed; a timer that fired a
+            # little early must still queue the next one
+            self._schedule()
+
+
+_provider = None
+_provider_lock = threading.Lock()
 
-def get_dropbox_access_token():
-    with open(TOKEN_FILE, "r") as f:
-        token_data = json.load(f)
 
-    if time.time() >= token_data.get("expires_at", 0):
-        return refresh_dropbox_token()
-    return token_data["access_token"]
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = TokenProvider()
+        return _provider
+
+
+def refresh_dropbox_token():
+    return get_provider().refresh()
+
+
+def get_dropbox_access_token():
+    return get_provider().token()
@@ -0,0 +1,72 @@
+# frames.py
+# Compact in-memory dtypes for the set frames the loaders hand out: categoricals
+# for names and muscle groups, small ints for per-set counters, Arrow-backed
+# strings for ids. A million enriched sets fit in tens of MB instead of hundreds.
+
+# Repeated labels: a few hundred exercises and a dozen muscle groups
+CATEGORY_COLUMNS = [
+    "exercise_name",
+    "workout_name",
+    "muscle_group",
+    "muscle_group_primary",
+    "muscle_group_secondary",
+    "day",
+]
+
+INT_COLUMNS = {
+    "set_order": "int16",
+    "set_index": "int16",
+    "is_warmup": "int8",
+}
+
+# Strong's non-numeric set orders, next to WARM_UP's -1 from import_sets
+SET_ORDER_CODES = {"WARM_UP": -1, "FAILURE": -2}
+
+STRING_COLUMNS = ["id"]
+
+
+def _small_int(series, dtype):
+    import pandas as pd
+
+    if series.dtype.kind in "iub":
+        return series.astype(dtype)
+    values = pd.to_numeric(series, errors="coerce")
+    if values.isna().any():
+        # Nullable variant (Int16, Int8) keeps missing values missing
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+def _set_order(series):
+    import pandas as pd
+
+    if series.dtype.kind in "iu":
+        return series.astype(INT_COLUMNS["set_order"])
+    values = series.to_numpy(dtype=object).copy()
+    for label, code in SET_ORDER_CODES.items():
+        values[values == label] = code
+    return _small_int(pd.Series(values, index=series.index), INT_COLUMNS["set_order"])
+
+
+# 🗜 Convert the known columns of df in place (and return it); others are left alone
+def compact(df):
+    import pandas as pd
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+    for col, dtype in INT_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        if col == "set_order":
+            df[col] = _set_order(df[col])
+        else:
+            df[col] = _small_int(df[col], dtype)
+    for col in STRING_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype(pd.StringDtype("pyarrow"))
+    return df
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
@@ -1,22 +1,46 @@
 import hashlib
+import json
+import os
 import sqlite3
+import time
 from io import BytesIO
 
-import dropbox
-import pandas as pd
-from dropbox.exceptions import ApiError
-
-from dropbox_auth import get_dropbox_access_token
-from log_config import get_logger
+import instrument
+from log_config import CONSOLE, get_logger
 from setup_db import setup_db
 
 logger = get_logger("sync_strong")
 
 DROPBOX_FILE_PATH = "/strong_workouts.csv"  # inside /Apps/strong-workout-sync
 LOCAL_DB_PATH = "synced_workouts.db"
-access_token = get_dropbox_access_token()
+METADATA_CACHE_PATH = "dropbox_metadata.json"
+DOWNLOAD_COUNTERS = ["downloads", "downloads_skipped", "bytes_downloaded", "bytes_avoided"]
+
+INSERT_COLUMNS = [
+    "id",
+    "date",
+    "workout_name",
+    "duration",
+    "exercise_name",
+    "set_order",
+    "weight",
+    "reps",
+    "distance",
+    "seconds",
+    "notes",
+    "workout_notes",
+    "rpe",
+]
 
-print(f"Using Dropbox file path: {DROPBOX_FILE_PATH}")
+STAGING_TABLE = "workout_sets_staging"
+
+# Streaming ingest: working-set budget for one chunk (frame, hashes, records, staging)
+DEFAULT_MAX_MEMORY_MB = 64
+MIN_CHUNK_ROWS = 1_000
+MAX_CHUNK_ROWS = 500_000
+CHUNK_OVERHEAD = 4  # records + hash strings + staging copies per byte of parsed frame
+HASH_BLOCK_BYTES = 1 << 20
+SAMPLE_ROWS = 1_000
 
 
 # 🧠 Hash function to detect duplicates
@@ -25,14 +49,112 @@ def hash_row(row):
     return hashlib.sha256(row_str.encode("utf-8")).hexdigest()
 
 
-# 📥 Download CSV from Dropbox
-def download_csv():
-    logger.info(f"🔄 Downloading {DROPBOX_FILE_PATH} from Dropbox...")
-    dbx = dropbox.Dropbox(access_token)
+# 🧠 Same hash as hash_row, computed for a whole frame at once
+def hash_rows(df):
+    if df.empty:
+        return []
+    cols = [df[c].astype(str) for c in df.columns]
+    joined = cols[0].str.cat(cols[1:], sep="|")
+    sha256 = hashlib.sha256
+    return [sha256(s.encode("utf-8")).hexdigest() for s in joined]
+
+
+_dbx = None
+_dbx_token = None
+
+
+# The token fetch happens on first use, not at import. The token is cached in
+# memory, so a long-running process only rebuilds the client after a refresh.
+def get_dropbox_client():
+    global _dbx, _dbx_token
+    from dropbox_auth import get_dropbox_access_token
+
+    token = get_dropbox_access_token()
+    if _dbx is None or token != _dbx_token:
+        import dropbox
+
+        if _dbx is None:
+            logger.info(f"Using Dropbox file path: {DROPBOX_FILE_PATH}", extra=CONSOLE)
+        _dbx, _dbx_token = dropbox.Dropbox(token), token
+    return _dbx
+
+
+# 🗂 Metadata of the last export that was fully ingested, plus download counters
+def load_metadata_cache(cache_path=METADATA_CACHE_PATH):
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    for counter in DOWNLOAD_COUNTERS:
+        cache.setdefault(counter, 0)
+    return cache
+
+
+def save_metadata_cache(cache, cache_path=METADATA_CACHE_PATH):
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+
+def _is_unchanged(cache, metadata):
+    return (
+        cache.get("path") == metadata.path_lower
+        and cache.get("rev") == metadata.rev
+        and cache.get("content_hash") == metadata.content_hash
+        and cache.get("size") == metadata.size
+    )
+
+
+def remember_export(metadata, cache_path=METADATA_CACHE_PATH):
+    # Call only after the download was ingested, so a failed sync is retried next tick
+    cache = load_metadata_cache(cache_path)
+    cache.update(
+        path=metadata.path_lower,
+        rev=metadata.rev,
+        content_hash=metadata.content_hash,
+        size=metadata.size,
+    )
+    save_metadata_cache(cache, cache_path)
+
+
+# 📥 Download CSV from Dropbox; (None, metadata) when the export hasn't changed
+def download_csv(
+    to_path=None,
+    dbx=None,
+    cache_path=METADATA_CACHE_PATH,
+    force=False,
+    source=DROPBOX_FILE_PATH,
+):
+    import dropbox
+    from dropbox.exceptions import ApiError
+
+    dbx = dbx or get_dropbox_client()
 
     try:
-        metadata, res = dbx.files_download(DROPBOX_FILE_PATH)
-        return BytesIO(res.content)
+        cache = load_metadata_cache(cache_path)
+        metadata = dbx.files_get_metadata(source)
+        if not force and _is_unchanged(cache, metadata):
+            cache["downloads_skipped"] += 1
+            cache["bytes_avoided"] += metadata.size
+            save_metadata_cache(cache, cache_path)
+            instrument.count("downloads_skipped")
+            logger.info(
+                f"⏭ {source} unchanged (rev {metadata.rev}), skipping download "
+                f"[{cache['downloads_skipped']} skipped, {cache['bytes_avoided']} byte(s) avoided]"
+            )
+            return None, metadata
+
+        logger.info(f"🔄 Downloading {source} from Dropbox...")
+        with instrument.span("transfer"):
+            if to_path is not None:
+                # Straight to disk, so the export never has to fit in memory
+                metadata = dbx.files_download_to_file(str(to_path), source)
+                csv = to_path
+            else:
+                metadata, res = dbx.files_download(source)
+                csv = BytesIO(res.content)
 
     except ApiError as e:
         if isinstance(e.error, dropbox.files.DownloadError):
@@ -44,8 +166,13 @@ def download_csv():
     except Exception as e:
         logger.error(f"❌ Unexpected Error: {e}")
         raise
+
+    cache["downloads"] += 1
+    cache["bytes_downloaded"] += metadata.size
+    save_metadata_cache(cache, cache_path)
+    instrument.count("bytes_downloaded", metadata.size)
     logger.info("🔄 Download complete.")
-    return BytesIO(res.content)
+    return csv, metadata
 
 
 def parse_set_order(value):
@@ -55,13 +182,284 @@ def parse_set_order(value):
         return value
 
 
+def _nullable(series, cast):
+    # Column-wise equivalent of `cast(v) if not pd.isna(v) else None`
+    mask = series.isna().to_numpy()
+    if cast is int:
+        series = series.where(~mask, 0).astype("int64")
+    values = series.astype(cast).to_numpy(dtype=object)
+    values[mask] = None
+    return values
+
+
+# 🧮 Build insert-ready records for a frame of Strong rows
+def prepare_records(df):
+    set_order = df["Set Order"].to_numpy(dtype=object).copy()
+    set_order[set_order == "WARM_UP"] = -1
+
+    columns = [
+        hash_rows(df),
+        df["Date"].to_numpy(dtype=object),
+        df["Workout Name"].to_numpy(dtype=object),
+        df["Duration (sec)"].to_numpy(dtype=object),
+        df["Exercise Name"].to_numpy(dtype=object),
+        set_order,
+        _nullable(df["Weight (kg)"], float),
+        _nullable(df["Reps"], int),
+        _nullable(df["Distance (meters)"], float),
+        _nullable(df["Seconds"], int),
+        df["Notes"].to_numpy(dtype=object),
+        df["Workout Notes"].to_numpy(dtype=object),
+        _nullable(df["RPE"], float),
+    ]
+    # tolist() turns numpy scalars into Python objects sqlite3 can bind
+    return list(zip(*(c if isinstance(c, list) else c.tolist() for c in columns)))
+
+
+# 📦 Load records through a staging table; duplicates are ignored
+def load_records(conn, records):
+    collist = ", ".join(INSERT_COLUMNS)
+    placeholders = ", ".join(["?"] * len(INSERT_COLUMNS))
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+            id TEXT, date TEXT, workout_name TEXT, duration TEXT,
+            exercise_name TEXT, set_order INTEGER, weight REAL, reps INTEGER,
+            distance REAL, seconds INTEGER, notes TEXT, workout_notes TEXT,
+            rpe REAL
+        )
+        """
+    )
+    cur.execute(f"DELETE FROM {STAGING_TABLE}")
+    cur.executemany(
+        f"INSERT INTO {STAGING_TABLE} ({collist}) VALUES ({placeholders})",
+        records,
+    )
+    before = conn.total_changes
+    cur.execute(
+        f"""
+        INSERT OR IGNORE INTO workout_sets ({collist})
+        SELECT {collist} FROM {STAGING_TABLE} ORDER BY rowid
+        """
+    )
+    new_rows = conn.total_changes - before
+    cur.execute(f"DELETE FROM {STAGING_TABLE}")
+    return new_rows
+
+
+def _column_dtypes(df):
+    # None marks a column that has only been empty so far, so its dtype is still open
+    return {
+        col: None if df[col].isna().all() else str(df[col].dtype)
+        for col in df.columns
+    }
+
+
+def _merge_dtype(a, b):
+    # How read_csv types a column whose rows were seen in two parts
+    if a is None or b is None:
+        seen = b if a is None else a
+        return "float64" if seen == "int64" else seen  # empty cells make ints floats
+    if a == b:
+        return a
+    if {a, b} == {"int64", "float64"}:
+        return "float64"
+    return "object"
+
+
+def merge_dtypes(a, b):
+    return {col: _merge_dtype(a[col], b[col]) for col in a}
+
+
+def _read_dtypes(dtypes):
+    # Text columns are kept as text so a partial parse hashes exactly like a full one
+    return {
+        col: str if dtype == "object" else dtype
+        for col, dtype in dtypes.items()
+        if dtype is not None
+    }
+
+
+def _extend_dtypes(stored, new):
+    # Merge a later part's dtypes into the recorded ones; None if earlier ids would change
+    merged = merge_dtypes(stored, new)
+    for col, dtype in stored.items():
+        if dtype is not None and merged[col] != dtype:
+            return None, f"column {col!r} changed type"
+    return merged, None
+
+
+def _cast_to(df, dtypes):
+    for col, dtype in dtypes.items():
+        if dtype == "float64" and str(df[col].dtype) == "int64":
+            df[col] = df[col].astype("float64")
+    return df
+
+
+def _last_seen(df, previous=None):
+    if df.empty:
+        if previous is None:
+            return None, None
+        return previous["last_workout"], previous["last_date"]
+    last_workout = int(df["Workout #"].max())
+    last_date = str(df["Date"].max())
+    if previous is not None and previous["last_workout"] is not None:
+        last_workout = max(last_workout, previous["last_workout"])
+        last_date = max(last_date, previous["last_date"])
+    return last_workout, last_date
+
+
+def read_sync_state(conn, source):
+    row = conn.execute(
+        """
+        SELECT last_workout, last_date, byte_offset, prefix_sha256, column_dtypes
+        FROM sync_state WHERE source = ?
+        """,
+        (source,),
+    ).fetchone()
+    if row is None:
+        return None
+    last_workout, last_date, byte_offset, prefix_sha256, column_dtypes = row
+    return {
+        "last_workout": last_workout,
+        "last_date": last_date,
+        "byte_offset": byte_offset,
+        "prefix_sha256": prefix_sha256,
+        "column_dtypes": json.loads(column_dtypes),
+    }
+
+
+def write_sync_state(
+    conn, source, byte_offset, prefix_sha256, last_workout, last_date, column_dtypes
+):
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO sync_state (source, last_workout, last_date,
+        byte_offset, prefix_sha256, column_dtypes, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+        """,
+        (
+            source,
+            last_workout,
+            last_date,
+            byte_offset,
+            prefix_sha256,
+            json.dumps(column_dtypes),
+        ),
+    )
+
+
+def _out_of_order(first_workout, state):
+    last_workout = state["last_workout"]
+    return first_workout is not None and last_workout is not None and first_workout < last_workout
+
+
+# ✂️ Parse only what was appended since the last sync; tail is None if a full resync is needed
+def read_new_rows(data, state):
+    import pandas as pd
+
+    offset = state["byte_offset"]
+    if len(data) < offset:
+        return None, None, "export shrank"
+    if hashlib.sha256(data[:offset]).hexdigest() != state["prefix_sha256"]:
+        return None, None, "prefix changed"
+
+    stored = state["column_dtypes"]
+    if not data[offset:].strip():
+        return pd.DataFrame(columns=list(stored)), stored, None
+
+    header_end = data.find(b"\n") + 1
+    try:
+        tail = pd.read_csv(
+            BytesIO(data[:header_end] + data[offset:]),
+            delimiter=";",
+            dtype=_read_dtypes(stored),
+        )
+    except ValueError:
+        return None, None, "column types changed"
+    if list(tail.columns) != list(stored):
+        return None, None, "columns changed"
+    # A re-numbered or re-ordered export can't be taken as a plain tail
+    if _out_of_order(int(tail["Workout #"].min()), state):
+        return None, None, "workouts out of order"
+
+    merged, reason = _extend_dtypes(stored, _column_dtypes(tail))
+    if reason:
+        return None, None, reason
+    return _cast_to(tail, merged), merged, None
+
+
+# ✂️ Parse and hash an export, only its new tail when state allows. Touches no
+# database, so it can run in another process; returns (records, sync, total_rows)
+# where sync is the sync_state row write_export stores next to the records.
+def parse_export(data, state=None, source=DROPBOX_FILE_PATH):
+    import pandas as pd
+
+    df = None
+    if state is not None:
+        df, column_dtypes, reason = read_new_rows(data, state)
+        if df is None:
+            logger.info(f"🔁 Full resync of {source}: {reason}")
+            state = None
+        else:
+            logger.info(f"⏩ Skipped {state['byte_offset']} synced byte(s) of {source}")
+    if df is None:
+        df = pd.read_csv(BytesIO(data), delimiter=";")
+        column_dtypes = _column_dtypes(df)
+
+    records = prepare_records(df) if not df.empty else []
+    sync = (
+        len(data),
+        hashlib.sha256(data).hexdigest(),
+        *_last_seen(df, state),
+        column_dtypes,
+    )
+    return records, sync, len(df)
+
+
+# 💾 Insert parsed records and their sync state in one transaction
+def write_export(conn, source, records, sync):
+    with conn:
+        new_rows = load_records(conn, records) if records else 0
+        write_sync_state(conn, source, *sync)
+    return new_rows
+
+
+# Reuse the caller's connection (e.g. the pipeline runner's) or open our own
+def _connect(db_path, conn=None):
+    owned = conn is None
+    conn = conn or sqlite3.connect(db_path)
+    setup_db(conn)
+    return conn, owned
+
+
 # 🗃 Create SQLite DB and insert new sets
-def sync_to_sqlite(csv_io):
+def sync_to_sqlite(
+    csv_io,
+    db_path=LOCAL_DB_PATH,
+    bulk=True,
+    incremental=True,
+    source=DROPBOX_FILE_PATH,
+    conn=None,
+):
+    import pandas as pd
+
     logger.info("🟢 Starting sync from Strong export...")
+    started = time.perf_counter()
+    conn, owned = _connect(db_path, conn)
+
+    if bulk:
+        state = read_sync_state(conn, source) if incremental else None
+        records, sync, total_rows = parse_export(csv_io.getvalue(), state, source)
+        new_rows = write_export(conn, source, records, sync)
+        if owned:
+            conn.close()
+        _report(new_rows, total_rows, started)
+        return new_rows
+
     df = pd.read_csv(csv_io, delimiter=";")
-    conn = sqlite3.connect("synced_workouts.db")
 
-    setup_db(conn)
     cur = conn.cursor()
 
     new_rows = 0
@@ -97,13 +495,206 @@ def sync_to_sqlite(csv_io):
             pass  # already synced
 
     conn.commit()
-    conn.close()
+    if owned:
+        conn.close()
+
+    _report(new_rows, len(df), started)
+    return new_rows
+
+
+def _hash_file(f, hasher, start, end):
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = f.read(min(HASH_BLOCK_BYTES, remaining))
+        if not block:
+            break
+        hasher.update(block)
+        remaining -= len(block)
+    return hasher
+
+
+def chunk_rows_for(max_memory_mb, bytes_per_row):
+    budget = max_memory_mb * 1024 * 1024
+    rows = budget // max(1, int(bytes_per_row * CHUNK_OVERHEAD))
+    return int(min(MAX_CHUNK_ROWS, max(MIN_CHUNK_ROWS, rows)))
+
+
+def _read_chunks(f, columns, start, dtypes, chunksize):
+    import pandas as pd
+
+    f.seek(start)
+    try:
+        yield from pd.read_csv(
+            f,
+            delimiter=";",
+            header=None,
+            names=columns,
+            dtype=_read_dtypes(dtypes),
+            chunksize=chunksize,
+        )
+    except pd.errors.EmptyDataError:
+        return
+
+
+# 🔎 First pass: the dtypes a full parse of this range would give, chunk by chunk
+# Column dtypes and the lowest Workout # from start to the end of the file
+def _scan_dtypes(f, columns, start, base, chunksize):
+    dtypes, first_workout = None, None
+    for chunk in _read_chunks(f, columns, start, base or {}, chunksize):
+        if chunk.empty:
+            continue
+        chunk_dtypes = _column_dtypes(chunk)
+        dtypes = chunk_dtypes if dtypes is None else merge_dtypes(dtypes, chunk_dtypes)
+        lowest = int(chunk["Workout #"].min())
+        first_workout = lowest if first_workout is None else min(first_workout, lowest)
+    return dtypes, first_workout
+
+
+# 🌊 Stream a Strong export from disk in bounded chunks, committing every N rows
+def sync_to_sqlite_streaming(
+    csv_path,
+    db_path=LOCAL_DB_PATH,
+    max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+    commit_every=None,
+    incremental=True,
+    source=DROPBOX_FILE_PATH,
+    conn=None,
+):
+    import pandas as pd
+
+    logger.info(f"🟢 Starting streaming sync from {csv_path}...")
+    started = time.perf_counter()
+    size = os.path.getsize(csv_path)
+    conn, owned = _connect(db_path, conn)
+
+    state = read_sync_state(conn, source) if incremental else None
+
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        header_end = f.tell()
+        columns = pd.read_csv(BytesIO(header), delimiter=";", nrows=0).columns.tolist()
+
+        f.seek(0)
+        sample = pd.read_csv(f, delimiter=";", nrows=SAMPLE_ROWS)
+        bytes_per_row = sample.memory_usage(deep=True).sum() / max(1, len(sample))
+        chunk_rows = chunk_rows_for(max_memory_mb, bytes_per_row)
+        commit_every = commit_every or chunk_rows
+        del sample
+
+        hasher = hashlib.sha256()
+        start, base, reason = header_end, None, None
+        if state is not None:
+            offset = state["byte_offset"]
+            if size < offset:
+                reason = "export shrank"
+            elif _hash_file(f, hasher.copy(), 0, offset).hexdigest() != state["prefix_sha256"]:
+                reason = "prefix changed"
+            elif columns != list(state["column_dtypes"]):
+                reason = "columns changed"
+            else:
+                start, base = offset, state["column_dtypes"]
+
+        if base is not None:
+            try:
+                scanned, first_workout = _scan_dtypes(f, columns, start, base, chunk_rows)
+            except ValueError:
+                reason = "column types changed"
+            else:
+                dtypes = base
+                if scanned is not None:
+                    dtypes, reason = _extend_dtypes(base, scanned)
+                if reason is None and _out_of_order(first_workout, state):
+                    reason = "workouts out of order"
+        if reason is not None:
+            logger.info(f"🔁 Full resync of {source}: {reason}")
+            start, base, state = header_end, None, None
+        elif base is not None:
+            logger.info(f"⏩ Skipped {start} synced byte(s) of {source}")
+        if base is None:
+            dtypes, _ = _scan_dtypes(f, columns, start, None, chunk_rows)
+            dtypes = dtypes or {col: None for col in columns}
+
+        new_rows = total_rows = pending = 0
+        seen = {"last_workout": None, "last_date": None} if state is None else state
+        last_workout, last_date = seen["last_workout"], seen["last_date"]
+        for chunk in _read_chunks(f, columns, start, dtypes, chunk_rows):
+            chunk = _cast_to(chunk, dtypes)
+            new_rows += load_records(conn, prepare_records(chunk))
+            last_workout, last_date = _last_seen(
+                chunk, {"last_workout": last_workout, "last_date": last_date}
+            )
+            total_rows += len(chunk)
+            pending += len(chunk)
+            if pending >= commit_every:
+                conn.commit()
+                pending = 0
+
+        write_sync_state(
+            conn,
+            source,
+            size,
+            _hash_file(f, hasher, 0, size).hexdigest(),
+            last_workout,
+            last_date,
+            dtypes,
+        )
+    conn.commit()
+    if owned:
+        conn.close()
+
+    logger.info(f"🌊 Streamed in chunks of {chunk_rows} row(s), committing every {commit_every}")
+    _report(new_rows, total_rows, started)
+    return new_rows
+
+
+def _report(new_rows, total_rows, started):
+    elapsed = time.perf_counter() - started
+    rate = total_rows / elapsed if elapsed > 0 else float("inf")
+    with instrument.run("sync") as run:
+        run.count("new_sets", new_rows)
+        run.record("sync", elapsed, rows=total_rows)
+    logger.info(f"✅ Synced {new_rows} new set(s) to SQLite.", extra=CONSOLE)
+    logger.info(f"⏱ Processed {total_rows} row(s) in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
 
-    print(f"✅ Synced {new_rows} new set(s) to SQLite.")
-    logger.info(f"✅ Synced {new_rows} new set(s) to SQLite.")
-    
 
 # 🏁 Run it
 if __name__ == "__main__":
-    csv_io = download_csv()
-    sync_to_sqlite(csv_io)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync the Strong export into SQLite.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="download to disk and ingest in bounded chunks",
+    )
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB)
+    parser.add_argument("--commit-every", type=int, default=None)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="download and ingest even if the export is unchanged",
+    )
+    args = parser.parse_args()
+
+    # One run groups the download and sync spans in the metrics log
+    with instrument.run("import_sets"):
+        if args.stream:
+            import tempfile
+
+            with tempfile.TemporaryDirectory() as tmp:
+                csv_path, metadata = download_csv(
+                    to_path=os.path.join(tmp, "strong_workouts.csv"), force=args.force
+                )
+                if csv_path is not None:
+                    sync_to_sqlite_streaming(
+                        csv_path,
+                        max_memory_mb=args.max_memory_mb,
+                        commit_every=args.commit_every,
+                    )
+                    remember_export(metadata)
+        else:
+            csv_io, metadata = download_csv(force=args.force)
+            if csv_io is not None:
+                sync_to_sqlite(csv_io)
+                remember_export(metadata)
@@ -0,0 +1,144 @@
+# instrument.py
+# Timing spans and counters for pipeline stages. A run groups the spans of one
+# script invocation (or one dashboard rerun); every closed span and every
+# finished run goes to the "metrics" logger as one JSON record, which
+# run_stats.py reads back to summarize recent runs.
+#
+#   with instrument.run("process_sets"):
+#       with instrument.span("enrich") as s:
+#           s.rows = enrich_sets(conn)
+#       instrument.count("inferred_warmups", 12)
+import contextvars
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from log_config import get_logger
+
+METRICS_LOGGER = "metrics"
+logger = get_logger(METRICS_LOGGER)
+
+_active = contextvars.ContextVar("instrument_run", default=None)
+
+
+def _rate(rows, seconds):
+    if rows is None or not seconds:
+        return None
+    return round(rows / seconds, 1)
+
+
+def _emit(record):
+    logger.info(json.dumps(record, separators=(",", ":")))
+
+
+class Span:
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = None
+
+
+class Run:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.counters = {}
+        self._token = None
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, seconds, rows=None):
+        _emit(
+            {
+                "event": "span",
+                "run": self.id,
+                "script": self.name,
+                "span": name,
+                "seconds": round(seconds, 6),
+                "rows": rows,
+                "rows_per_sec": _rate(rows, seconds),
+            }
+        )
+
+    def finish(self, status="ok"):
+        if self.seconds is not None:
+            return self  # already finished
+        self.seconds = time.perf_counter() - self.started
+        if self._token is not None:
+            try:
+                _active.reset(self._token)
+            except ValueError:
+                _active.set(None)  # finished from another context
+        _emit(
+            {
+                "event": "run",
+                "run": self.id,
+                "script": self.name,
+                "started": self.started_at,
+                "seconds": round(self.seconds, 6),
+                "status": status,
+                "counters": self.counters,
+            }
+        )
+        return self
+
+
+def current_run():
+    return _active.get()
+
+
+# ▶️ Begin a run that becomes the active one for spans and counters here
+def start_run(name):
+    run_ = Run(name)
+    run_._token = _active.set(run_)
+    return run_
+
+
+# A run around the block; inside another run (process_sets.main called from
+# a larger script) the block just adds to that one
+@contextmanager
+def run(name):
+    active = _active.get()
+    if active is not None:
+        yield active
+        return
+    run_ = start_run(name)
+    try:
+        yield run_
+    except BaseException:
+        run_.finish("failed")
+        raise
+    run_.finish()
+
+
+# ⏱ Time the block; set span.rows inside it to get rows/sec. Outside any run
+# the span gets a run of its own, so every span belongs to one.
+@contextmanager
+def span(name, rows=None):
+    with run(name) as run_:
+        span_ = Span(name, rows)
+        started = time.perf_counter()
+        try:
+            yield span_
+        finally:
+            span_.seconds = time.perf_counter() - started
+            run_.record(name, span_.seconds, span_.rows)
+
+
+# A span timed by the caller
+def record(name, seconds, rows=None):
+    with run(name) as run_:
+        run_.record(name, seconds, rows)
+
+
+# Counters only exist on a run; outside one they are dropped
+def count(name, n=1):
+    run_ = _active.get()
+    if run_ is not None:
+        run_.count(name, n)
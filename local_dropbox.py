@@ -0,0 +1,77 @@
+# local_dropbox.py
+# Offline stand-in for the parts of dropbox.Dropbox the pipeline uses,
+# serving files from a local directory as if it were the app folder.
+import hashlib
+import os
+import shutil
+from datetime import datetime, timezone
+
+import dropbox
+from dropbox.exceptions import ApiError
+
+DROPBOX_HASH_BLOCK = 4 * 1024 * 1024
+
+
+def dropbox_content_hash(path):
+    # https://www.dropbox.com/developers/reference/content-hash
+    block_hashes = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(DROPBOX_HASH_BLOCK)
+            if not block:
+                break
+            block_hashes.update(hashlib.sha256(block).digest())
+    return block_hashes.hexdigest()
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+
+class LocalDropbox:
+    def __init__(self, root):
+        self.root = root
+        self.calls = {"files_get_metadata": 0, "files_download": 0}
+
+    def _local_path(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def _not_found(self, path):
+        lookup = dropbox.files.LookupError.not_found
+        return ApiError(
+            "local", dropbox.files.DownloadError.path(lookup), f"{path} not found", "en"
+        )
+
+    def files_get_metadata(self, path):
+        self.calls["files_get_metadata"] += 1
+        local = self._local_path(path)
+        if not os.path.isfile(local):
+            raise self._not_found(path)
+        stat = os.stat(local)
+        modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc).replace(
+            tzinfo=None
+        )
+        return dropbox.files.FileMetadata(
+            name=os.path.basename(local),
+            id=f"id:{path.lower()}",
+            path_lower=path.lower(),
+            path_display=path,
+            client_modified=modified,
+            server_modified=modified,
+            rev=f"{stat.st_mtime_ns:x}",
+            size=stat.st_size,
+            content_hash=dropbox_content_hash(local),
+        )
+
+    def files_download(self, path):
+        metadata = self.files_get_metadata(path)
+        self.calls["files_download"] += 1
+        with open(self._local_path(path), "rb") as f:
+            return metadata, _Response(f.read())
+
+    def files_download_to_file(self, download_path, path):
+        metadata = self.files_get_metadata(path)
+        self.calls["files_download"] += 1
+        shutil.copyfile(self._local_path(path), download_path)
+        return metadata
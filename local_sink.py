@@ -0,0 +1,95 @@
+# local_sink.py
+# Offline stand-in for a downstream sink: an HTTP endpoint that accepts the
+# outbox's batches, remembers them by Idempotency-Key, and can be told to be
+# slow or to fail, so throughput and retries can be exercised locally.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubSink(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), _SinkHandler)
+        self.latency = latency
+        # Statuses to answer with before accepting, e.g. [503, 429]; then 200s
+        self.fail_with = []
+        self.retry_after = None
+        self.batches = {}  # Idempotency-Key -> set ids, first delivery only
+        self.requests = 0
+        self.duplicates = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}/sets"
+
+    def set_ids(self):
+        with self._lock:
+            return [i for ids in self.batches.values() for i in ids]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _receive(self, key, payload):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            with self._lock:
+                if self.fail_with:
+                    return self.fail_with.pop(0)
+                if key in self.batches:
+                    self.duplicates += 1  # a resend: acknowledge, don't store twice
+                else:
+                    self.batches[key] = [s["id"] for s in payload["sets"]]
+                return 200
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status = self.server._receive(self.headers.get("Idempotency-Key"), payload)
+        data = json.dumps({"ok": status == 200}).encode()
+        self.send_response(status)
+        if status == 429 and self.server.retry_after is not None:
+            self.send_header("Retry-After", str(self.server.retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local outbox sink.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    args = parser.parse_args()
+
+    sink = StubSink(port=args.port, latency=args.latency)
+    print(f"📭 Stub sink listening on {sink.url}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        print(f"📭 Received {len(sink.set_ids())} set(s) in {len(sink.batches)} batch(es)")
@@ -1,9 +1,110 @@
 # log_config.py
+# Every logger hands its records to one in-memory queue; a single listener
+# thread owns the rotating log file. Logging from a hot loop costs a queue put,
+# never a disk write. The queue is drained into the file at exit.
+#
+# Scripts show their console lines through the same queue: a record logged
+# with extra=CONSOLE goes to the file and to stdout, instead of a print next
+# to a logger call.
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 LOG_PATH = Path(__file__).parent / "fitness_pipeline.log"
+MAX_BYTES = 1_000_000
+BACKUP_COUNT = 3
+LOG_FORMAT = "[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+CONSOLE = {"console": True}
+
+_queue = queue.SimpleQueue()
+_lock = threading.Lock()
+_listener = None
+# Set where no listener thread can run (forked pool workers, which exit
+# without atexit, and interpreter shutdown): records are written directly
+_direct_handlers = None
+
+
+def _file_handler():
+    handler = RotatingFileHandler(
+        LOG_PATH, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, delay=True
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+    return handler
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    # sys.stdout is looked up per record, so redirected or captured output works
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _handlers():
+    console = _ConsoleHandler()
+    console.addFilter(lambda record: getattr(record, "console", False))
+    console.setFormatter(logging.Formatter("%(message)s"))
+    return [_file_handler(), console]
+
+
+def _start_listener():
+    global _listener
+    with _lock:
+        if _listener is None:
+            _listener = QueueListener(_queue, *_handlers())
+            _listener.start()
+
+
+# Write out everything queued so far and stop the listener; the next record
+# starts a new one
+def flush_logs():
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def _at_exit():
+    global _direct_handlers
+    flush_logs()
+    _direct_handlers = _handlers()
+
+
+def _after_fork():
+    global _listener, _direct_handlers, _lock
+    _lock = threading.Lock()
+    _listener = None  # the parent's thread doesn't exist in the child
+    _direct_handlers = _handlers()
+
+
+atexit.register(_at_exit)
+os.register_at_fork(after_in_child=_after_fork)
+
+
+class _FileQueueHandler(QueueHandler):
+    def enqueue(self, record):
+        if _direct_handlers is not None:
+            for handler in _direct_handlers:
+                handler.handle(record)
+            return
+        if _listener is None:
+            _start_listener()
+        super().enqueue(record)
+
+
+_handler = _FileQueueHandler(_queue)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -11,12 +112,6 @@ def get_logger(name: str) -> logging.Logger:
     logger.setLevel(logging.INFO)
 
     if not logger.handlers:  # Prevent duplicate handlers on import
-        handler = RotatingFileHandler(LOG_PATH, maxBytes=1_000_000, backupCount=3)
-        formatter = logging.Formatter(
-            "[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s",
-            datefmt="%Y-%m-%dT%H:%M:%S",
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_handler)
 
     return logger
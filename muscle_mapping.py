@@ -1,71 +1,137 @@
+import hashlib
+import json
+import logging
+import re
+from collections import namedtuple
+from functools import lru_cache
+
 from log_config import get_logger
 
 logger = get_logger("muscle_mapping")
 
+CACHE_SIZE = 4096
+
+# One rule: add `groups` when any of `any_of` occurs in the cleaned name and none of
+# `none_of` does. `extra` is an optional regex that also triggers the rule, and
+# `exclude` one that blocks it. Rules run in order; Rehab clears everything before it.
+Rule = namedtuple("Rule", "groups any_of none_of extra exclude", defaults=((), None, None))
+
+RULES = [
+    Rule(
+        ("Chest", "Triceps"),
+        ("bench", "press", "dip", "bulgarian pushup", "pushup", "push up", "rto", "ring hold", "pec deck"),
+        ("leg", "row", "overhead", "shoulder", "calf"),
+    ),
+    Rule(("Chest",), ("fly", "pec"), ("rear delt",)),
+    Rule(("Back", "Biceps"), ("row", "pulldown", "pull up", "pullup", "chinup", "chin up")),
+    Rule(("Biceps",), ("curl",), ("hamstring", "leg", "tricep")),
+    Rule(("Biceps",), ("bicep", "biceps")),
+    Rule(
+        ("Triceps",),
+        ("triceps", "tricep", "extension", "katana", "cross cable extension", "skullcrusher", "skull crusher", "dumbbell kickback", "kickback", "press"),
+        ("leg", "calf", "overhead", "shoulder"),
+        exclude=r"^(?!.*kickback).*back",  # "back" without "kickback"
+    ),
+    Rule(
+        ("Delts",),
+        ("lateral", "overhead", "raise", "face pull", "rear delt", "shoulder"),
+        ("leg", "row", "chest", "calf", "unilateral cable fly"),
+    ),
+    Rule(
+        ("Legs",),
+        # "hamstring" "leg curl" is one implicitly concatenated term, kept as it always matched
+        ("squat", "lunge", "leg press", "rdl", "deadlift", "hamstringleg curl", "leg extension", "hip adductor", "seated leg curl", "lying leg curl", "back extension", "calf"),
+        ("forearm leg raise",),
+    ),
+    Rule(("Abs",), ("crunch", "plank", "rollout", "gar hammer", "l sit", "leg raise"), extra=r"\babs\b"),
+    Rule(
+        ("Rehab",),
+        ("rotator cuff", "band pull", "external rotation", "ytw", "physio", "serratus walks", "pec stretch", "timeout", "trx", "foam", "thoracic", "mobilization"),
+    ),
+    Rule(("Forearms",), ("dead hang", "forearm", "false grip hang"), ("leg",)),
+]
+
+# Groups a Rehab match removes, in the order they are dropped
+REHAB_CLEARS = ["Chest", "Back", "Delts", "Legs", "Triceps", "Biceps", "Forearms", "Abs"]
+
+_NON_ALPHA = re.compile(r"[^a-z ]")
+_SPACES = re.compile(r"\s+")
+
+
+def _terms(terms):
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in terms))
+
+
+class MuscleGroupClassifier:
+    def __init__(self, rules=RULES, cache_size=CACHE_SIZE):
+        self.rules = [
+            (
+                rule.groups,
+                _terms(rule.any_of),
+                _terms(rule.none_of),
+                re.compile(rule.extra) if rule.extra else None,
+                re.compile(rule.exclude) if rule.exclude else None,
+            )
+            for rule in rules
+        ]
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+        # Changes whenever the rule table does; stored next to persisted mappings
+        self.version = hashlib.sha256(
+            json.dumps([list(rules), REHAB_CLEARS]).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _classify(self, exercise_name):
+        name = _NON_ALPHA.sub("", exercise_name.lower())  # remove non-alpha
+        name = _SPACES.sub(" ", name).strip()  # clean spaces
+
+        groups = set()
+        for rule_groups, any_of, none_of, extra, exclude in self.rules:
+            hit = any_of is not None and any_of.search(name) is not None
+            if not hit and extra is not None:
+                hit = extra.search(name) is not None
+            if not hit:
+                continue
+            if none_of is not None and none_of.search(name):
+                continue
+            if exclude is not None and exclude.search(name):
+                continue
+            for group in rule_groups:
+                groups.add(group)
+            if "Rehab" in rule_groups:
+                for group in REHAB_CLEARS:
+                    groups.discard(group)
+
+        # Only build the messages when someone is listening at DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            if not groups:
+                logger.debug(f"❌ No match for: '{exercise_name}' → cleaned: '{name}'")
+            else:
+                logger.debug(f"✅ Mapped: '{exercise_name}' → {list(groups)}")
+
+        return tuple(groups)
+
+    def map_column(self, names):
+        # Classify each distinct name once and broadcast back to the rows.
+        # Rows with the same name share one list object.
+        import numpy as np
+        import pandas as pd
+
+        codes, uniques = pd.factorize(names)
+        mapped = np.empty(len(uniques) + 1, dtype=object)
+        for i, name in enumerate(uniques):
+            mapped[i] = list(self.classify(name))
+        mapped[-1] = []  # code -1: missing name
+        return pd.Series(mapped[codes], index=names.index, name=names.name)
+
+
+classifier = MuscleGroupClassifier()
+
+
 def map_exercise_to_muscle_groups(exercise_name: str):
-    import re
-    original = exercise_name
-    name = re.sub(r"[^a-z ]", "", exercise_name.lower())  # remove non-alpha
-    name = re.sub(r"\s+", " ", name).strip()              # clean spaces
-
-    groups = set()
-
-    if any(term in name for term in ["bench", "press", "dip", "bulgarian pushup", "pushup", "push up", "rto", "ring hold", "pec deck"]) and "leg" not in name and "row" not in name and "overhead" not in name and "shoulder" not in name and "calf" not in name:
-        groups.add("Chest")
-        groups.add("Triceps")
-    
-    if any(term in name for term in ["fly", "pec"]) and "rear delt" not in name:
-        groups.add("Chest")
-
-    if any(term in name for term in ["row", "pulldown", "pull up", "pullup", "chinup", "chin up"]):
-        groups.add("Back")
-        groups.add("Biceps")
-
-    if "curl" in name and "hamstring" not in name and "leg" not in name and "tricep" not in name:
-        groups.add("Biceps")
-    if any(term in name for term in ["bicep", "biceps"]):
-        groups.add("Biceps")
-
-    if any(term in name for term in ["triceps", "tricep", "extension", "katana", "cross cable extension", "skullcrusher", "skull crusher", "dumbbell kickback", "kickback", "press"]) and "leg" not in name and "calf" not in name and "overhead" not in name and "shoulder" not in name and not ("back" in name and "kickback" not in name):
-        groups.add("Triceps")
-
-    if any(term in name for term in ["lateral", "overhead", "raise", "face pull", "rear delt", "shoulder"]) and "leg" not in name and "row" not in name and "chest" not in name and "calf" not in name and "unilateral cable fly" not in name:
-        groups.add("Delts")
-
-    if any(term in name for term in ["squat", "lunge", "leg press", "rdl", "deadlift", "hamstring" "leg curl", "leg extension", "hip adductor", "seated leg curl", "lying leg curl", "back extension", "calf"]) and "forearm leg raise" not in name:
-        groups.add("Legs")
-
-    if any(term in name for term in ["crunch", "plank", "rollout", "gar hammer", "l sit", "leg raise"]) or re.search(r"\babs\b", name):  # catches " abs ", avoids "cable abs"
-        groups.add("Abs")
- 
-    if any(term in name for term in ["rotator cuff", "band pull", "external rotation", "ytw", "physio", "serratus walks", "pec stretch", "timeout", "trx", "foam", "thoracic", "mobilization"]):
-        groups.add("Rehab")
-        #if in any other group, remove it
-        if "Chest" in groups:
-            groups.remove("Chest")
-        if "Back" in groups:
-            groups.remove("Back")
-        if "Delts" in groups:
-            groups.remove("Delts")
-        if "Legs" in groups:
-            groups.remove("Legs")
-        if "Triceps" in groups:
-            groups.remove("Triceps")
-        if "Biceps" in groups:
-            groups.remove("Biceps")
-        if "Forearms" in groups:
-            groups.remove("Forearms")
-        if "Abs" in groups:
-            groups.remove("Abs")
-
-    if any(term in name for term in ["dead hang", "forearm", "false grip hang"]) and "leg" not in name:
-        groups.add("Forearms")
-
-
-    if not groups:
-        logger.debug(f"❌ No match for: '{original}' → cleaned: '{name}'")
-
-    else:
-        logger.debug(f"✅ Mapped: '{original}' → {list(groups)}")
-
-    return list(groups)
+    return list(classifier.classify(exercise_name))
+
+
+def map_exercise_column(names):
+    return classifier.map_column(names)
@@ -1,15 +1,223 @@
 # notify.py
+# Pushes go through a background dispatcher: send_push only enqueues, bursts
+# are coalesced into one push per title, and failed sends retry with backoff.
+import atexit
+import queue
+import threading
+import time
+from collections import namedtuple
 
-from pushover import Client
+from log_config import CONSOLE, get_logger
 
-from config import PUSHOVER_API_TOKEN, PUSHOVER_USER_KEY
+logger = get_logger("notify")
 
-client = Client(PUSHOVER_USER_KEY, api_token=PUSHOVER_API_TOKEN)
+DEFAULT_TITLE = "📡 Pi4one"
+QUEUE_SIZE = 100
+COALESCE_SECONDS = 2.0  # how long to wait for more messages after the first
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 1.0  # doubled after each failed attempt
+MAX_BACKOFF_SECONDS = 30.0
+SHUTDOWN_TIMEOUT = 10.0
 
+# Messages of the same kind merge by summing their counts into one line
+SUMMARY_TEMPLATES = {
+    "sync": "Synced {sets} set(s) across {workouts} workout(s)",
+}
 
-def send_push(msg: str, title: str = "📡 Pi4one"):
-    try:
-        client.send_message(msg, title=title)
-        print(f"📲 Sent push notification: {title} — {msg}")
-    except Exception as e:
-        print(f"❌ Failed to send push notification: {e}")
+Notification = namedtuple("Notification", "title message kind counts queued_at")
+
+_client = None
+
+
+# Built on first push, so importing notify needs no credentials or pushover
+def get_client():
+    global _client
+    if _client is None:
+        from pushover import Client
+
+        from config import PUSHOVER_API_TOKEN, PUSHOVER_USER_KEY
+
+        _client = Client(PUSHOVER_USER_KEY, api_token=PUSHOVER_API_TOKEN)
+    return _client
+
+
+# 🧾 One message per title: counted kinds are summed, the rest listed in order
+def summarize(batch):
+    totals, lines = {}, []
+    for n in batch:
+        if n.kind in SUMMARY_TEMPLATES:
+            if n.kind not in totals:
+                totals[n.kind] = {}
+                lines.append((n.kind, None))
+            for key, value in n.counts.items():
+                totals[n.kind][key] = totals[n.kind].get(key, 0) + value
+        elif (None, n.message) not in lines:
+            lines.append((None, n.message))
+    return "\n".join(
+        SUMMARY_TEMPLATES[kind].format(**totals[kind]) if kind else message
+        for kind, message in lines
+    )
+
+
+class Dispatcher:
+    def __init__(
+        self,
+        client=None,
+        maxsize=QUEUE_SIZE,
+        coalesce_seconds=COALESCE_SECONDS,
+        max_attempts=MAX_ATTEMPTS,
+        backoff_seconds=BACKOFF_SECONDS,
+    ):
+        self._client = client
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.coalesce_seconds = coalesce_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._closing = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ["queued", "sent", "coalesced", "retries", "failed", "dropped"], 0
+        )
+        self.latency_ms = {"last": None, "max": 0.0}
+
+    def _count(self, key, n=1):
+        with self._metrics_lock:
+            self.counters[key] += n
+
+    @property
+    def client(self):
+        return self._client or get_client()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="notify-dispatcher", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    # 📬 Never blocks: a full queue drops the message and counts it
+    def submit(self, message="", title=DEFAULT_TITLE, kind=None, **counts):
+        if self._closing.is_set():
+            logger.warning(f"⚠️ Dispatcher closed, dropping push: {title} — {message}")
+            self._count("dropped")
+            return False
+        self.start()
+        try:
+            self.queue.put_nowait(
+                Notification(title, message, kind, counts, time.monotonic())
+            )
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"⚠️ Notification queue full, dropping: {title} — {message}")
+            return False
+        self._count("queued")
+        return True
+
+    def metrics(self):
+        with self._metrics_lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                **self.counters,
+                "latency_ms_last": self.latency_ms["last"],
+                "latency_ms_max": self.latency_ms["max"],
+            }
+
+    def _collect(self):
+        # Block for the first message, then gather whatever arrives in the window
+        try:
+            first = self.queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if self._closing.is_set():
+                remaining = 0
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=min(remaining, 0.1)))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                if remaining <= 0:
+                    return batch
+
+    def _run(self):
+        while not (self._closing.is_set() and self.queue.empty()):
+            batch = self._collect()
+            by_title = {}
+            for n in batch:
+                by_title.setdefault(n.title, []).append(n)
+            for title, notes in by_title.items():
+                self._send(title, notes)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _send(self, title, notes):
+        message = summarize(notes)
+        delay = self.backoff_seconds
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.client.send_message(message, title=title)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self._count("failed", len(notes))
+                    logger.error(f"❌ Push failed after {attempt} attempt(s): {e}", extra=CONSOLE)
+                    return False
+                self._count("retries")
+                logger.warning(f"⚠️ Push attempt {attempt} failed, retry in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+                continue
+
+            # From the oldest message in the push, so it includes the coalescing wait
+            latency = (time.monotonic() - notes[0].queued_at) * 1000
+            with self._metrics_lock:
+                self.latency_ms["last"] = latency
+                self.latency_ms["max"] = max(self.latency_ms["max"], latency)
+                self.counters["sent"] += 1
+                self.counters["coalesced"] += len(notes) - 1
+            logger.info(f"📲 Sent push notification: {title} — {message}", extra=CONSOLE)
+            return True
+
+    # 🛑 Send what is queued (skipping the coalescing wait) and stop the worker
+    def close(self, timeout=SHUTDOWN_TIMEOUT):
+        if self._closing.is_set():
+            return
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(
+                    f"⚠️ Notification dispatcher still busy after {timeout}s; "
+                    f"{self.queue.qsize()} push(es) abandoned"
+                )
+        logger.info(f"📲 Notification dispatcher stopped: {self.metrics()}")
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher()
+            atexit.register(_dispatcher.close)
+        return _dispatcher
+
+
+# Queue a push and return immediately; the dispatcher sends it in the background
+def send_push(msg: str, title: str = DEFAULT_TITLE):
+    return get_dispatcher().submit(msg, title=title)
+
+
+# e.g. push_sync_summary(12, 1) twice in a burst → "Synced 24 set(s) across 2 workout(s)"
+def push_sync_summary(sets: int, workouts: int, title: str = DEFAULT_TITLE):
+    return get_dispatcher().submit(title=title, kind="sync", sets=sets, workouts=workouts)
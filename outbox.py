@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# outbox.py
+# Push enriched sets to a downstream sink in batches, each set acknowledged once.
+#
+# Un-pushed sets are found with one anti-join against pushed_set_ids, claimed
+# into batches in outbox_pending, and sent by a small thread pool under a token
+# bucket. An acknowledged batch moves to pushed_set_ids in one transaction. A
+# batch claimed by a run that crashed or gave up is resent next run under the
+# same batch id, which sinks use as an idempotency key to drop the duplicate.
+# A batch the sink rejects outright, or that keeps failing run after run, is
+# dead-lettered in outbox_batches and skipped until requeued.
+import argparse
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from log_config import CONSOLE, get_logger
+from schema import ENRICHED_TABLE, OUTBOX_BATCHES_TABLE, OUTBOX_TABLE, PUSHED_TABLE, RAW_TABLE
+from setup_db import setup_db
+
+logger = get_logger("outbox")
+
+DB_PATH = "synced_workouts.db"
+TODO_TABLE = "temp.outbox_todo"
+
+BATCH_SIZE = 100
+CONCURRENCY = 4
+RATE_PER_SECOND = 3.0  # requests; Notion's API allows about three a second
+MAX_ATTEMPTS = 5  # per run
+DEAD_LETTER_ATTEMPTS = 25  # across runs, before a batch is set aside
+BACKOFF_SECONDS = 0.5  # doubled after each failed attempt
+MAX_BACKOFF_SECONDS = 30.0
+REQUEST_TIMEOUT = (5, 30)  # connect, read
+
+# What a sink receives per set: the enriched row plus the raw load and reps
+PAYLOAD_COLUMNS = [
+    "e.id",
+    "e.date",
+    "e.exercise_name",
+    "e.set_order",
+    "e.set_index",
+    "e.is_warmup",
+    "e.muscle_group_primary",
+    "e.muscle_group_secondary",
+    "r.weight",
+    "r.reps",
+    "r.rpe",
+]
+PAYLOAD_KEYS = [c.split(".", 1)[1] for c in PAYLOAD_COLUMNS]
+
+
+class SinkError(Exception):
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+# Seconds to wait from a Retry-After header, which is either delay-seconds or
+# an HTTP-date; None when it is missing or neither
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# 📤 A sink takes one batch per call and raises SinkError when it wasn't
+# accepted. batch_id is stable across resends of the same sets.
+class Sink:
+    name = "sink"
+
+    def send(self, batch_id, sets):
+        raise NotImplementedError
+
+
+class HttpSink(Sink):
+    # POSTs {"batch_id": ..., "sets": [...]} with the batch id as Idempotency-Key
+    name = "http"
+
+    def __init__(self, url, session=None, timeout=REQUEST_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._session = session
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        # requests.Session isn't thread-safe; one pooled session per sender thread
+        if self._session is not None:
+            return self._session
+        if not hasattr(self._local, "session"):
+            import requests
+
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def send(self, batch_id, sets):
+        import requests
+
+        try:
+            response = self.session.post(
+                self.url,
+                json={"batch_id": batch_id, "sets": sets},
+                headers={"Idempotency-Key": batch_id},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise SinkError(f"{type(e).__name__}: {e}") from None
+        if response.ok:
+            return
+        raise SinkError(
+            f"HTTP {response.status_code} from {self.url}: {response.text[:200]}",
+            # Throttled or server-side trouble is worth retrying; a rejected payload isn't
+            retryable=response.status_code == 429 or response.status_code >= 500,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+
+
+# 🪣 Up to `capacity` requests at once, refilled at `rate` per second
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+class Outbox:
+    def __init__(
+        self,
+        conn,
+        sink,
+        batch_size=BATCH_SIZE,
+        concurrency=CONCURRENCY,
+        rate=RATE_PER_SECOND,
+        burst=None,
+        max_attempts=MAX_ATTEMPTS,
+        backoff_seconds=BACKOFF_SECONDS,
+        dead_letter_attempts=DEAD_LETTER_ATTEMPTS,
+    ):
+        # conn is only used from the calling thread; sender threads never touch it
+        self.conn = conn
+        self.sink = sink
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.dead_letter_attempts = dead_letter_attempts
+        self._metrics_lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ["sets", "batches", "resent_batches", "retries", "failed_batches", "dead_lettered"],
+            0,
+        )
+
+    def _count(self, key, n=1):
+        with self._metrics_lock:
+            self.counters[key] += n
+
+    def _payload(self, ids):
+        placeholders = ", ".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"""
+            SELECT {', '.join(PAYLOAD_COLUMNS)}
+            FROM {ENRICHED_TABLE} e JOIN {RAW_TABLE} r ON r.id = e.id
+            WHERE e.id IN ({placeholders})
+            ORDER BY e.date, e.set_index
+            """,
+            ids,
+        ).fetchall()
+        return [dict(zip(PAYLOAD_KEYS, row)) for row in rows]
+
+    def find_unpushed(self):
+        # One anti-join per run; batches then page through the temp table by seq
+        with self.conn:
+            self.conn.execute(f"DROP TABLE IF EXISTS {TODO_TABLE}")
+            self.conn.execute(
+                f"CREATE TABLE {TODO_TABLE} (seq INTEGER PRIMARY KEY, id TEXT NOT NULL)"
+            )
+            self.conn.execute(
+                f"""
+                INSERT INTO {TODO_TABLE} (id)
+                SELECT e.id FROM {ENRICHED_TABLE} e
+                WHERE NOT EXISTS (SELECT 1 FROM {PUSHED_TABLE} p WHERE p.id = e.id)
+                  AND NOT EXISTS (SELECT 1 FROM {OUTBOX_TABLE} o WHERE o.id = e.id)
+                ORDER BY e.date, e.set_index
+                """
+            )
+        return self.conn.execute(f"SELECT COUNT(*) FROM {TODO_TABLE}").fetchone()[0]
+
+    def pending_batches(self):
+        # Dead-lettered batches keep their sets claimed but are not resent
+        rows = self.conn.execute(
+            f"""
+            SELECT o.batch_id, o.id FROM {OUTBOX_TABLE} o
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {OUTBOX_BATCHES_TABLE} b
+                WHERE b.batch_id = o.batch_id AND b.dead_at IS NOT NULL
+            )
+            ORDER BY o.batch_id, o.rowid
+            """
+        ).fetchall()
+        batches = {}
+        for batch_id, set_id in rows:
+            batches.setdefault(batch_id, []).append(set_id)
+        return batches
+
+    def claim(self, after_seq, size=None):
+        ids = self.conn.execute(
+            f"SELECT seq, id FROM {TODO_TABLE} WHERE seq > ? ORDER BY seq LIMIT ?",
+            (after_seq, size or self.batch_size),
+        ).fetchall()
+        if not ids:
+            return None, after_seq, []
+        batch_id = uuid.uuid4().hex
+        # Recorded before sending, so a crash mid-send leaves a batch to resend
+        # under the same id rather than sets that look never sent
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO {OUTBOX_TABLE} (id, batch_id, claimed_at) "
+                "VALUES (?, ?, datetime('now'))",
+                [(set_id, batch_id) for _, set_id in ids],
+            )
+        return batch_id, ids[-1][0], [set_id for _, set_id in ids]
+
+    def acknowledge(self, batch_id):
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR IGNORE INTO {PUSHED_TABLE} (id) "
+                f"SELECT id FROM {OUTBOX_TABLE} WHERE batch_id = ?",
+                (batch_id,),
+            )
+            self.conn.execute(
+                f"DELETE FROM {OUTBOX_BATCHES_TABLE} WHERE batch_id = ?", (batch_id,)
+            )
+            return self.conn.execute(
+                f"DELETE FROM {OUTBOX_TABLE} WHERE batch_id = ?", (batch_id,)
+            ).rowcount
+
+    # Add this run's attempts to the batch's history; returns True when the
+    # batch is dead-lettered: rejected outright, or out of attempts
+    def record_failure(self, batch_id, attempts, error):
+        with self.conn:
+            self.conn.execute(
+                f"""
+                INSERT INTO {OUTBOX_BATCHES_TABLE} (batch_id, attempts, last_error, failed_at)
+                VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT (batch_id) DO UPDATE SET
+                    attempts = attempts + excluded.attempts,
+                    last_error = excluded.last_error,
+                    failed_at = excluded.failed_at
+                """,
+                (batch_id, attempts, str(error)),
+            )
+            (total,) = self.conn.execute(
+                f"SELECT attempts FROM {OUTBOX_BATCHES_TABLE} WHERE batch_id = ?",
+                (batch_id,),
+            ).fetchone()
+            dead = not error.retryable or total >= self.dead_letter_attempts
+            if dead:
+                self.conn.execute(
+                    f"UPDATE {OUTBOX_BATCHES_TABLE} SET dead_at = datetime('now') "
+                    "WHERE batch_id = ?",
+                    (batch_id,),
+                )
+        return dead
+
+    # (batch_id, sets, attempts, last_error) of every dead-lettered batch
+    def dead_letters(self):
+        return self.conn.execute(
+            f"""
+            SELECT b.batch_id, COUNT(o.id), b.attempts, b.last_error
+            FROM {OUTBOX_BATCHES_TABLE} b JOIN {OUTBOX_TABLE} o ON o.batch_id = b.batch_id
+            WHERE b.dead_at IS NOT NULL
+            GROUP BY b.batch_id
+            ORDER BY b.dead_at
+            """
+        ).fetchall()
+
+    # ♻️ Put dead-lettered batches back in line, e.g. once the sink or the
+    # payload is fixed; they go out on the next run with a fresh attempt count
+    def requeue_dead(self):
+        with self.conn:
+            return self.conn.execute(
+                f"UPDATE {OUTBOX_BATCHES_TABLE} SET dead_at = NULL, attempts = 0 "
+                "WHERE dead_at IS NOT NULL"
+            ).rowcount
+
+    def deliver(self, batch_id, sets):
+        # Runs on a sender thread: rate limit, send, back off and retry.
+        # Returns (attempts, None) once delivered, else (attempts, last SinkError).
+        delay = self.backoff_seconds
+        for attempt in range(1, self.max_attempts + 1):
+            self.bucket.acquire()
+            try:
+                self.sink.send(batch_id, sets)
+                return attempt, None
+            except SinkError as e:
+                if not e.retryable or attempt == self.max_attempts:
+                    logger.error(
+                        f"❌ Batch {batch_id} ({len(sets)} set(s)) not delivered after "
+                        f"{attempt} attempt(s): {e}"
+                    )
+                    return attempt, e
+                self._count("retries")
+                # The sink's Retry-After wins over our backoff, up to the same cap
+                wait_for = e.retry_after if e.retry_after is not None else delay
+                wait_for = min(wait_for, MAX_BACKOFF_SECONDS)
+                logger.warning(f"⚠️ Batch {batch_id} attempt {attempt} failed, retry in {wait_for:.1f}s: {e}")
+                time.sleep(wait_for)
+                delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+    # 🚚 Resend batches left over from earlier runs, then push everything new.
+    # Batches that still fail stay in outbox_pending for the next run, unless
+    # they are dead-lettered.
+    def run(self, limit=None):
+        started = time.perf_counter()
+        dead = self.dead_letters()
+        if dead:
+            logger.warning(
+                f"☠️ Skipping {len(dead)} dead-lettered batch(es) "
+                f"({sum(n for _, n, _, _ in dead)} set(s)); latest error: {dead[-1][3]}"
+            )
+        resend = self.pending_batches()
+        todo = self.find_unpushed()
+        if limit is not None:
+            todo = min(todo, limit)
+        logger.info(
+            f"📤 Pushing {todo} new set(s) to {self.sink.name}, "
+            f"resending {len(resend)} unacknowledged batch(es)"
+        )
+
+        after_seq, claimed, in_flight = 0, 0, {}
+        resend = list(resend.items())
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="outbox") as pool:
+            while True:
+                while len(in_flight) < self.concurrency:
+                    if resend:
+                        batch_id, ids = resend.pop(0)
+                        self._count("resent_batches")
+                    elif claimed < todo:
+                        size = min(self.batch_size, todo - claimed)
+                        batch_id, after_seq, ids = self.claim(after_seq, size)
+                        if batch_id is None:
+                            break
+                        claimed += len(ids)
+                    else:
+                        break
+                    sets = self._payload(ids)
+                    future = pool.submit(self.deliver, batch_id, sets)
+                    in_flight[future] = (batch_id, len(sets))
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_id, n_sets = in_flight.pop(future)
+                    attempts, error = future.result()
+                    if error is None:
+                        self.acknowledge(batch_id)
+                        self._count("batches")
+                        self._count("sets", n_sets)
+                        continue
+                    self._count("failed_batches")
+                    if self.record_failure(batch_id, attempts, error):
+                        self._count("dead_lettered")
+                        logger.error(f"☠️ Dead-lettered batch {batch_id} ({n_sets} set(s))")
+
+        elapsed = time.perf_counter() - started
+        metrics = {**self.counters, "dead_letters": len(self.dead_letters()), "seconds": elapsed}
+        rate = metrics["sets"] / elapsed if elapsed > 0 else float("inf")
+        logger.info(f"📤 Outbox run: {metrics} ({rate:,.0f} sets/sec)", extra=CONSOLE)
+        return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push new enriched sets to a downstream sink.")
+    parser.add_argument("url", help="HTTP endpoint that accepts batches of sets")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=RATE_PER_SECOND,
+        help="requests per second (0 for no limit)",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="push at most this many new sets")
+    parser.add_argument(
+        "--requeue-dead",
+        action="store_true",
+        help="send dead-lettered batches again on this run",
+    )
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    setup_db(conn)
+    try:
+        box = Outbox(
+            conn,
+            HttpSink(args.url),
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            rate=args.rate,
+        )
+        if args.requeue_dead:
+            logger.info(f"♻️ Requeued {box.requeue_dead()} dead-lettered batch(es)")
+        metrics = box.run(limit=args.limit)
+    finally:
+        conn.close()
+    if metrics["failed_batches"]:
+        raise SystemExit(1)
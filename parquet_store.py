@@ -0,0 +1,181 @@
+# parquet_store.py
+# Columnar sidecar of the enriched sets: one Parquet file per year/month under a
+# hive-style tree (year=2024/month=3/part-0.parquet), with dictionary-encoded name
+# and muscle-group columns. SQLite stays the source of truth; months are rewritten
+# from it when they change.
+import contextlib
+import glob
+import os
+import shutil
+import tempfile
+
+from frames import compact
+from log_config import get_logger
+from schema import ENRICHED_TABLE
+
+logger = get_logger("parquet_store")
+
+PARQUET_DIR = "enriched_sets"
+PART_NAME = "part-0.parquet"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+COLUMNS = [
+    "id",
+    "date",
+    "exercise_name",
+    "set_order",
+    "set_index",
+    "is_warmup",
+    "muscle_group_primary",
+    "muscle_group_secondary",
+]
+
+MONTH_SQL = "CAST(strftime('%Y', {0}) AS INTEGER), CAST(strftime('%m', {0}) AS INTEGER)"
+
+
+def arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("date", pa.timestamp("s")),
+            ("exercise_name", pa.dictionary(pa.int32(), pa.string())),
+            # Mostly 1, 2, 3 and -1 for warmups, but Strong also exports "FAILURE"
+            ("set_order", pa.dictionary(pa.int8(), pa.string())),
+            ("set_index", pa.int16()),
+            ("is_warmup", pa.int8()),
+            ("muscle_group_primary", pa.dictionary(pa.int8(), pa.string())),
+            ("muscle_group_secondary", pa.dictionary(pa.int8(), pa.string())),
+        ]
+    )
+
+
+def partition_path(root, year, month):
+    return os.path.join(root, f"year={year}", f"month={month}", PART_NAME)
+
+
+def _month_table(conn, year, month):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    start = f"{year:04d}-{month:02d}-01"
+    end = f"{year + month // 12:04d}-{month % 12 + 1:02d}-01"
+    # Range on date so the idx_enriched_date index does the work
+    rows = conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM {ENRICHED_TABLE} "
+        "WHERE date >= ? AND date < ? ORDER BY date, set_index",
+        (start, end),
+    ).fetchall()
+    if not rows:
+        return None
+
+    schema = arrow_schema()
+    columns = dict(zip(COLUMNS, zip(*rows)))
+    arrays = []
+    for field in schema:
+        values = list(columns[field.name])
+        if field.name == "date":
+            array = pc.strptime(pa.array(values, pa.string()), format=DATE_FORMAT, unit="s")
+        elif pa.types.is_dictionary(field.type):
+            values = [None if v is None else str(v) for v in values]
+            array = pa.array(values, pa.string()).dictionary_encode().cast(field.type)
+        else:
+            array = pa.array(values, field.type)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write_month(conn, root, year, month):
+    import pyarrow.parquet as pq
+
+    path = partition_path(root, year, month)
+    table = _month_table(conn, year, month)
+    if table is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return 0
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Readers see either the old month or the new one, never a partial file
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def all_months(conn):
+    return conn.execute(
+        f"SELECT DISTINCT {MONTH_SQL.format('date')} FROM {ENRICHED_TABLE} "
+        "WHERE date IS NOT NULL"
+    ).fetchall()
+
+
+# The year=*/month=* directories this module writes; anything else under root
+# belongs to someone else and is never touched
+def _partitions(root):
+    return sorted(glob.glob(os.path.join(glob.escape(root), "year=*", "month=*")))
+
+
+def _move(path, src_root, dst_root):
+    dst = os.path.join(dst_root, os.path.relpath(path, src_root))
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.replace(path, dst)
+
+
+# Write every month into a sibling staging tree, then swap the partitions in: a
+# failed export leaves the old store in place, not an empty one
+def _rebuild(conn, root, months):
+    root = os.path.abspath(root)
+    parent, name = os.path.split(root)
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{name}-new-", dir=parent)
+    retired = tempfile.mkdtemp(prefix=f".{name}-old-", dir=parent)
+    try:
+        rows = 0
+        for year, month in sorted(months):
+            rows += _write_month(conn, staging, year, month)
+        for path in _partitions(root):
+            _move(path, root, retired)
+            with contextlib.suppress(OSError):  # the year directory, once empty
+                os.rmdir(os.path.dirname(path))
+        for path in _partitions(staging):
+            _move(path, staging, root)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(retired, ignore_errors=True)
+    return rows
+
+
+# 🗂 Rewrite the given (year, month) partitions, or rebuild every month when
+# months is None
+def write_enriched(conn, root=PARQUET_DIR, months=None):
+    if months is None:
+        months = all_months(conn)
+        rows = _rebuild(conn, root, months)
+    else:
+        rows = 0
+        for year, month in sorted(months):
+            rows += _write_month(conn, root, year, month)
+    logger.info(f"🗂 Wrote {rows} set(s) across {len(months)} month partition(s) to {root}")
+    return rows
+
+
+# 📖 Enriched sets as a DataFrame, memory-mapped straight from the Parquet files.
+# Dictionary columns arrive as categoricals and ids stay Arrow-backed strings
+# rather than one Python object per row; filters prune whole partitions,
+# e.g. filters=[("year", ">=", 2024)].
+def load_enriched_sets(root=PARQUET_DIR, columns=None, filters=None):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Only the partition files, so other files kept under root don't break the read
+    files = [os.path.join(path, PART_NAME) for path in _partitions(root)]
+    if not files:
+        raise FileNotFoundError(f"No Parquet partitions under {root}")
+    table = pq.read_table(
+        files, columns=columns, filters=filters, memory_map=True, partitioning="hive"
+    )
+    arrow_strings = {pa.string(): pd.StringDtype("pyarrow")}
+    return compact(table.to_pandas(types_mapper=arrow_strings.get, split_blocks=True))
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# pipeline.py
+# download → ingest → enrich → rollup → strength in one process over one SQLite connection.
+# Each stage commits its own work before the next starts, so a failure leaves
+# the earlier stages' results in place for the next run to build on.
+import argparse
+import os
+import signal
+import sqlite3
+import tempfile
+import threading
+import time
+
+import import_sets
+import instrument
+import process_sets
+from log_config import CONSOLE, get_logger
+from schema import RAW_TABLE
+from setup_db import setup_db
+
+logger = get_logger("pipeline")
+
+DB_PATH = "synced_workouts.db"
+STAGES = ["download", "ingest", "enrich", "rollup", "strength", "parquet"]
+
+# Watch mode: run every INTERVAL seconds, or sooner when a local export changes
+DEFAULT_INTERVAL = 15 * 60
+POLL_SECONDS = 1.0
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    setup_db(conn)
+    return conn
+
+
+class Pipeline:
+    def __init__(
+        self,
+        conn,
+        dbx=None,
+        stream=False,
+        max_memory_mb=import_sets.DEFAULT_MAX_MEMORY_MB,
+        cache_path=import_sets.METADATA_CACHE_PATH,
+        notifier=None,
+        parquet_dir=None,
+    ):
+        self.conn = conn
+        self.dbx = dbx
+        self.stream = stream
+        self.max_memory_mb = max_memory_mb
+        self.cache_path = cache_path
+        self.notifier = notifier
+        self.parquet_dir = parquet_dir
+        self.runs = 0
+
+    # Returns (new sets, distinct workout dates among them)
+    def _ingest(self, csv, metadata):
+        (last_rowid,) = self.conn.execute(
+            f"SELECT IFNULL(MAX(rowid), 0) FROM {RAW_TABLE}"
+        ).fetchone()
+        if self.stream:
+            new_rows = import_sets.sync_to_sqlite_streaming(
+                csv, max_memory_mb=self.max_memory_mb, conn=self.conn
+            )
+        else:
+            new_rows = import_sets.sync_to_sqlite(csv, conn=self.conn)
+        # Only after the rows are committed, so a failed ingest is retried next run
+        import_sets.remember_export(metadata, cache_path=self.cache_path)
+        # New sets get rowids past the old maximum
+        (workouts,) = self.conn.execute(
+            f"SELECT COUNT(DISTINCT date) FROM {RAW_TABLE} WHERE rowid > ?", (last_rowid,)
+        ).fetchone()
+        return new_rows, workouts
+
+    # 🏃 One pass through every stage; returns {stage: seconds} for the stages that ran
+    def run_once(self, force=False, full=False):
+        # One metrics run per pass; the stage spans and the counters the
+        # stages record all land in it
+        with instrument.run("pipeline"):
+            return self._run_stages(force, full)
+
+    def _run_stages(self, force, full):
+        timings = {}
+
+        def timed(stage, fn, *args):
+            with instrument.span(stage) as span:
+                result = fn(*args)
+            timings[stage] = span.seconds
+            return result
+
+        with tempfile.TemporaryDirectory() as tmp:
+            to_path = os.path.join(tmp, "strong_workouts.csv") if self.stream else None
+            csv, metadata = timed(
+                "download",
+                lambda: import_sets.download_csv(
+                    to_path=to_path, dbx=self.dbx, cache_path=self.cache_path, force=force
+                ),
+            )
+            new_rows, workouts = (
+                timed("ingest", self._ingest, csv, metadata) if csv is not None else (0, 0)
+            )
+
+        # Raw sets only change through ingest, and rules only change on restart,
+        # so idle runs after the first can stop here.
+        if new_rows or full or self.runs == 0:
+            written, remapped, n_dates = timed(
+                "enrich", process_sets.enrich_sets, self.conn, full
+            )
+            full = full or n_dates is None
+            if full or n_dates or remapped:
+                timed("rollup", process_sets.rollup_weeks, self.conn, full, remapped)
+            if full or n_dates or process_sets.needs_backfill(self.conn):
+                timed(
+                    "strength",
+                    process_sets.refresh_strength,
+                    self.conn,
+                    None if full else process_sets.AFFECTED_TABLE,
+                )
+            changed = full or n_dates or remapped
+            if self.parquet_dir and (changed or not os.path.isdir(self.parquet_dir)):
+                timed(
+                    "parquet",
+                    process_sets.export_parquet,
+                    self.conn,
+                    self.parquet_dir,
+                    full,
+                    remapped,
+                )
+            if self.notifier is not None and new_rows:
+                # Queued, not sent: a slow push never holds up the next stage
+                self.notifier.submit(kind="sync", sets=new_rows, workouts=workouts)
+
+        self.runs += 1
+        report_timings(timings)
+        return timings
+
+    # 👀 Run until stopped, waking on the schedule or when the local export changes
+    def watch(
+        self, interval=DEFAULT_INTERVAL, stop=None, watch_path=None, force=False, full=False
+    ):
+        stop = stop or threading.Event()
+        trigger = f" and on changes to {watch_path}" if watch_path else ""
+        logger.info(f"👀 Watching every {interval}s{trigger}")
+        while not stop.is_set():
+            stamp = _mtime(watch_path)
+            try:
+                # --force / --full apply to the first run only
+                self.run_once(force=force, full=full)
+                force = full = False
+            except Exception as e:
+                # Keep the daemon alive; the next run retries from the last commit
+                logger.exception(f"❌ Pipeline run failed: {e}")
+            wait_for_change(watch_path, stamp, interval, stop)
+
+
+def _mtime(path):
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+# Sleep up to timeout seconds; True if path changed since stamp, False otherwise
+def wait_for_change(path, stamp, timeout, stop, poll=POLL_SECONDS):
+    deadline = time.monotonic() + timeout
+    while not stop.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if path is not None and _mtime(path) != stamp:
+            return True
+        stop.wait(min(poll, remaining))
+    return False
+
+
+def report_timings(timings):
+    total = sum(timings.values())
+    summary = " • ".join(
+        f"{stage} {timings[stage]:.2f}s" for stage in STAGES if stage in timings
+    )
+    logger.info(f"⏱ Pipeline stages: {summary} (total {total:.2f}s)", extra=CONSOLE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Download, ingest, enrich and roll up Strong workouts in one process."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--local-root",
+        help="serve the export from this directory instead of Dropbox",
+    )
+    parser.add_argument("--stream", action="store_true", help="ingest in bounded chunks")
+    parser.add_argument(
+        "--max-memory-mb", type=int, default=import_sets.DEFAULT_MAX_MEMORY_MB
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="download and ingest even if the export is unchanged",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="rebuild the enriched and rollup tables",
+    )
+    parser.add_argument(
+        "--parquet",
+        metavar="DIR",
+        help="also keep a year/month partitioned Parquet copy of the enriched sets",
+    )
+    parser.add_argument("--watch", action="store_true", help="keep running as a daemon")
+    parser.add_argument(
+        "--notify",
+        action="store_true",
+        help="send a Pushover summary when new sets are synced",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="seconds between runs in --watch mode",
+    )
+    args = parser.parse_args()
+
+    dbx = watch_path = None
+    if args.local_root:
+        from local_dropbox import LocalDropbox
+
+        dbx = LocalDropbox(args.local_root)
+        watch_path = os.path.join(args.local_root, import_sets.DROPBOX_FILE_PATH.lstrip("/"))
+
+    notifier = None
+    if args.notify:
+        import notify
+
+        notifier = notify.get_dispatcher()
+
+    conn = connect(args.db)
+    pipeline = Pipeline(
+        conn,
+        dbx=dbx,
+        stream=args.stream,
+        max_memory_mb=args.max_memory_mb,
+        notifier=notifier,
+        parquet_dir=args.parquet,
+    )
+    try:
+        if args.watch:
+            if dbx is None:
+                from dropbox_auth import get_provider
+
+                # Keep the token fresh between runs instead of refreshing mid-download
+                get_provider().start_background_refresh()
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            pipeline.watch(
+                args.interval, stop, watch_path, force=args.force, full=args.full
+            )
+        else:
+            pipeline.run_once(force=args.force, full=args.full)
+    except KeyboardInterrupt:
+        logger.info("🛑 Pipeline stopped.")
+    finally:
+        conn.close()
+        if notifier is not None:
+            notifier.close()
@@ -1,84 +1,176 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
 import sqlite3
 
-import pandas as pd
-
-from muscle_mapping import map_exercise_to_muscle_groups
-from log_config import get_logger
+import instrument
+from detect_warmups import (
+    RAMP_SHARE,
+    RULE_VERSION,
+    WORKING_SHARE,
+    detect_warmups,
+    infer_warmups,
+    session_codes,
+)
+from frames import compact
+from muscle_mapping import classifier
+from parquet_store import MONTH_SQL, write_enriched
+from queries import ENRICHED_TABLE, ROLLUP_TABLE, WEEK_START_SQL, weekly_volume_sql
+from schema import MAP_TABLE, derived_version, migrate, optimize, set_derived_version
+from strength import needs_backfill, refresh_strength
+from log_config import CONSOLE, get_logger
 
 logger = get_logger("process_sets")
 
 DB_PATH = "synced_workouts.db"
 RAW_TABLE = "workout_sets"
-ENRICHED_TABLE = "workout_sets_enriched"  # new table
+AFFECTED_TABLE = "temp.enrich_affected_dates"
+CHANGED_TABLE = "temp.remapped_exercises"
+AFFECTED_WEEKS_TABLE = "temp.rollup_affected_weeks"
+WARMUPS_TABLE = "temp.inferred_warmups"
 
+# Sort muscle groups for visual clarity / priority
+group_priority = {
+    "Chest": 1,
+    "Back": 1,
+    "Delts": 2,
+    "Legs": 2,
+    "Biceps": 3,
+    "Triceps": 3,
+    "Abs": 4,
+    "Forearms": 4,
+}
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
 
-    # Create the enriched table (idempotent)
-    conn.execute(
+def sort_groups(g):
+    if isinstance(g, list):
+        return sorted(g, key=lambda x: group_priority.get(x, 99))
+    return [g] if isinstance(g, str) else []
+
+
+# Split into primary/secondary
+def split_groups(groups):
+    if not groups:
+        return None, None
+    if len(groups) == 1:
+        return groups[0], None
+    return groups[0], groups[1]
+
+
+# Version of the persisted exercise mapping: the rule table plus the priority order
+def rule_version():
+    payload = json.dumps([classifier.version, sorted(group_priority.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# Version of the warmup inference written into enriched is_warmup
+def warmup_rule_version():
+    payload = json.dumps([RULE_VERSION, WORKING_SHARE, RAMP_SHARE])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# True when the enriched rows were flagged under another warmup rule, which
+# only re-inferring every workout can fix; weekly volume would otherwise mix
+# old and new warmup definitions. An empty enriched table is simply stamped.
+def warmups_outdated(conn, version=None):
+    version = version or warmup_rule_version()
+    if derived_version(conn, "warmups") == version:
+        return False
+    if conn.execute(f"SELECT 1 FROM {ENRICHED_TABLE} LIMIT 1").fetchone() is None:
+        with conn:
+            set_derived_version(conn, "warmups", version)
+        return False
+    return True
+
+
+def classify_exercise(name):
+    groups = sort_groups(list(classifier.classify(name)))
+    primary, secondary = split_groups(groups)
+    return ",".join(groups), primary, secondary
+
+
+def create_enriched_table(conn):
+    # Enriched, mapping and rollup tables plus their indexes live in schema.py
+    migrate(conn)
+
+
+# 🗺 Classify exercise names that are new or were mapped by older rules.
+# Returns the names whose mapping actually changed.
+def sync_muscle_map(conn, version=None):
+    version = version or rule_version()
+    rows = conn.execute(
         f"""
-    CREATE TABLE IF NOT EXISTS {ENRICHED_TABLE} (
-        id TEXT PRIMARY KEY,
-        date TEXT,
-        exercise_name TEXT,
-        set_order INTEGER,
-        set_index INTEGER,
-        is_warmup INTEGER,
-        muscle_group_primary TEXT,
-        muscle_group_secondary TEXT
-    )
-    """
+        SELECT DISTINCT w.exercise_name, m.muscle_groups,
+            m.muscle_group_primary, m.muscle_group_secondary, m.rule_version
+        FROM {RAW_TABLE} w
+        LEFT JOIN {MAP_TABLE} m ON m.exercise_name = w.exercise_name
+        WHERE w.exercise_name IS NOT NULL
+          AND (m.rule_version IS NULL OR m.rule_version != ?)
+        """,
+        (version,),
+    ).fetchall()
+
+    mapped, changed = [], []
+    for name, *stored, stored_version in rows:
+        current = classify_exercise(name)
+        mapped.append((name, *current, version))
+        if stored_version is not None and tuple(stored) != current:
+            changed.append(name)
+
+    with conn:
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO {MAP_TABLE} (exercise_name, muscle_groups,
+            muscle_group_primary, muscle_group_secondary, rule_version)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            mapped,
+        )
+    if mapped:
+        logger.info(f"🗺 Mapped {len(mapped)} exercise name(s), {len(changed)} changed.")
+    return changed
+
+
+# 🔁 Push changed mappings into already-enriched rows of those exercises only
+def apply_remapped(conn, names):
+    conn.execute(f"DROP TABLE IF EXISTS {CHANGED_TABLE}")
+    conn.execute(f"CREATE TABLE {CHANGED_TABLE} (exercise_name TEXT PRIMARY KEY)")
+    conn.executemany(
+        f"INSERT INTO {CHANGED_TABLE} VALUES (?)", [(name,) for name in names]
     )
-    conn.commit()
+    with conn:
+        cur = conn.execute(
+            f"""
+            UPDATE {ENRICHED_TABLE} SET
+                muscle_group_primary = (
+                    SELECT m.muscle_group_primary FROM {MAP_TABLE} m
+                    WHERE m.exercise_name = {ENRICHED_TABLE}.exercise_name),
+                muscle_group_secondary = (
+                    SELECT m.muscle_group_secondary FROM {MAP_TABLE} m
+                    WHERE m.exercise_name = {ENRICHED_TABLE}.exercise_name)
+            WHERE exercise_name IN (SELECT exercise_name FROM {CHANGED_TABLE})
+            """
+        )
+    return cur.rowcount
 
-    # Pull all raw sets (switch to incremental if desired)
-    df = pd.read_sql_query(f"SELECT * FROM {RAW_TABLE} ORDER BY date ASC", conn)
 
-    if df.empty:
-        print("✅ No rows found in raw table.")
-        conn.close()
-        return
+# 🧮 Enrich raw sets; df must hold every set of each workout date it touches
+def enrich(df):
+    df = df.copy()
 
     # Compute set_index per workout date
     df["set_index"] = df.groupby("date").cumcount()
 
-    # Map muscle groups
-    df["muscle_groups"] = df["exercise_name"].apply(map_exercise_to_muscle_groups)
-
-    # Sort muscle groups for visual clarity / priority
-    group_priority = {
-        "Chest": 1,
-        "Back": 1,
-        "Delts": 2,
-        "Legs": 2,
-        "Biceps": 3,
-        "Triceps": 3,
-        "Abs": 4,
-        "Forearms": 4,
-    }
-
-    def sort_groups(g):
-        if isinstance(g, list):
-            return sorted(g, key=lambda x: group_priority.get(x, 99))
-        return [g] if isinstance(g, str) else []
-
-    df["muscle_groups"] = df["muscle_groups"].apply(sort_groups)
-
-    # Split into primary/secondary
-    def split_groups(groups):
-        if not groups:
-            return None, None
-        if len(groups) == 1:
-            return groups[0], None
-        return groups[0], groups[1]
-
-    df[["muscle_group_primary", "muscle_group_secondary"]] = df["muscle_groups"].apply(
-        lambda g: pd.Series(split_groups(g))
-    )
+    # Classify each distinct name once, as sync_muscle_map does for the SQL path
+    mapped = {name: classify_exercise(name) for name in df["exercise_name"].dropna().unique()}
+    for col, i in (("muscle_group_primary", 1), ("muscle_group_secondary", 2)):
+        df[col] = df["exercise_name"].map({name: m[i] for name, m in mapped.items()})
 
-    # Handle warmup flag if it exists in raw table
+    # Strong's WARM_UP flag, plus inferred ramp-up sets when loads are known
+    if {"weight", "reps"} <= set(df.columns):
+        df["is_warmup"] = detect_warmups(df)["is_warmup"]
     is_warmup_col = "is_warmup" if "is_warmup" in df.columns else None
 
     cols = [
@@ -93,21 +185,263 @@ def main():
     if is_warmup_col:
         cols.insert(5, "is_warmup")  # after set_index
 
-    out = df[cols].copy()
+    return compact(df[cols].copy())
+
 
-    # Upsert into enriched table
-    placeholders = ",".join(["?"] * len(cols))
-    collist = ",".join(cols)
-    cursor = conn.cursor()
-    cursor.executemany(
-        f"INSERT OR REPLACE INTO {ENRICHED_TABLE} ({collist}) VALUES ({placeholders})",
-        out.itertuples(index=False, name=None),
+# 🔎 Workout dates with sets missing from the enriched table, or enriched sets gone from raw
+def find_affected_dates(conn):
+    conn.execute(f"DROP TABLE IF EXISTS {AFFECTED_TABLE}")
+    conn.execute(
+        f"""
+        CREATE TABLE {AFFECTED_TABLE} AS
+        SELECT w.date FROM {RAW_TABLE} w
+        LEFT JOIN {ENRICHED_TABLE} e ON e.id = w.id
+        WHERE e.id IS NULL
+        UNION
+        SELECT e.date FROM {ENRICHED_TABLE} e
+        LEFT JOIN {RAW_TABLE} w ON w.id = e.id
+        WHERE w.id IS NULL
+        """
+    )
+    return conn.execute(f"SELECT COUNT(*) FROM {AFFECTED_TABLE}").fetchone()[0]
+
+
+# 🔥 Raw rowids of ramp-up sets Strong didn't mark, on the affected workout
+# dates or on every date. Read before the enrich transaction; applied inside it.
+# Only unmarked, loaded sets are read: Strong's warmups and unloaded sets are
+# never inferred and never working sets, so no session's result changes.
+def find_inferred_warmups(conn, only_affected=True):
+    import numpy as np
+    import pandas as pd
+
+    where = f"AND date IN (SELECT date FROM {AFFECTED_TABLE})" if only_affected else ""
+    df = pd.read_sql_query(
+        f"SELECT rowid, date, exercise_name, weight, reps FROM {RAW_TABLE} "
+        f"WHERE is_warmup = 0 AND weight > 0 {where} ORDER BY rowid",
+        conn,
     )
-    conn.commit()
+    groups = session_codes(df["date"], df["exercise_name"])
+    inferred = infer_warmups(groups, df["weight"], df["reps"], np.zeros(len(df), dtype=bool))
+    return df["rowid"].to_numpy()[inferred].tolist()
 
-    logger.debug(f"✅ Upserted {cursor.rowcount} rows into {ENRICHED_TABLE}.")
-    conn.close()
+
+def mark_inferred_warmups(conn, rowids):
+    conn.execute(f"DROP TABLE IF EXISTS {WARMUPS_TABLE}")
+    conn.execute(f"CREATE TABLE {WARMUPS_TABLE} (raw_rowid INTEGER PRIMARY KEY)")
+    conn.executemany(f"INSERT INTO {WARMUPS_TABLE} VALUES (?)", [(r,) for r in rowids])
+    cur = conn.execute(
+        f"""
+        UPDATE {ENRICHED_TABLE} SET is_warmup = 1
+        WHERE id IN (
+            -- CROSS JOIN keeps the short temp table outermost: one rowid lookup
+            -- per warmup instead of a scan of every raw set
+            SELECT w.id FROM {WARMUPS_TABLE} t
+            CROSS JOIN {RAW_TABLE} w ON w.rowid = t.raw_rowid
+        )
+        """
+    )
+    return cur.rowcount
+
+
+# Enrichment is a join against the persisted exercise map; set_index counts sets per workout date
+ENRICH_SELECT = f"""
+    SELECT
+        w.id,
+        w.date,
+        w.exercise_name,
+        w.set_order,
+        ROW_NUMBER() OVER (PARTITION BY w.date ORDER BY w.rowid) - 1 AS set_index,
+        w.is_warmup,
+        m.muscle_group_primary,
+        m.muscle_group_secondary
+    FROM {RAW_TABLE} w
+    LEFT JOIN {MAP_TABLE} m ON m.exercise_name = w.exercise_name
+"""
+ENRICHED_COLUMNS = (
+    "id, date, exercise_name, set_order, set_index, is_warmup, "
+    "muscle_group_primary, muscle_group_secondary"
+)
+
+
+# 📊 Recompute the weekly rollup, for every week or only the affected ones
+def refresh_weekly_volume(conn, only_affected=True):
+    weeks_table = None
+    with conn:
+        if only_affected:
+            conn.execute(
+                f"DELETE FROM {ROLLUP_TABLE} WHERE week_start IN "
+                f"(SELECT week_start FROM {AFFECTED_WEEKS_TABLE})"
+            )
+            # Range join so each affected week is a date range scan, not a table scan
+            weeks_table = AFFECTED_WEEKS_TABLE
+        else:
+            conn.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        cur = conn.execute(
+            f"INSERT INTO {ROLLUP_TABLE} (week_start, muscle_group, volume) "
+            + weekly_volume_sql(weeks_table=weeks_table)
+        )
+    return cur.rowcount
+
+
+def find_affected_weeks(conn, remapped):
+    conn.execute(f"DROP TABLE IF EXISTS {AFFECTED_WEEKS_TABLE}")
+    remapped_weeks = ""
+    if remapped:
+        remapped_weeks = f"""
+        UNION
+        SELECT {WEEK_START_SQL.format("date")} FROM {ENRICHED_TABLE}
+        WHERE exercise_name IN (SELECT exercise_name FROM {CHANGED_TABLE})
+        """
+    conn.execute(
+        f"""
+        CREATE TABLE {AFFECTED_WEEKS_TABLE} AS
+        SELECT DISTINCT {WEEK_START_SQL.format("date")} AS week_start FROM {AFFECTED_TABLE}
+        {remapped_weeks}
+        """
+    )
+    return conn.execute(f"SELECT COUNT(*) FROM {AFFECTED_WEEKS_TABLE}").fetchone()[0]
+
+
+# 🧮 Enrich stage: bring the enriched table up to date with raw sets and rules.
+# Returns (rows written, remapped sets, affected dates); dates is None after a
+# full rebuild, which a warmup rule change forces too, so callers rebuild the
+# later stages in full when they see None.
+def enrich_sets(conn, full=False):
+    # Create the enriched, mapping and rollup tables (idempotent)
+    create_enriched_table(conn)
+
+    changed = sync_muscle_map(conn)
+
+    if not full and warmups_outdated(conn):
+        logger.info("🔥 Warmup inference rule changed; re-enriching every workout.")
+        full = True
+
+    if full:
+        # Rebuild everything from scratch
+        warmups = find_inferred_warmups(conn, only_affected=False)
+        with conn:
+            conn.execute(f"DELETE FROM {ENRICHED_TABLE}")
+            cur = conn.execute(
+                f"INSERT INTO {ENRICHED_TABLE} ({ENRICHED_COLUMNS}) {ENRICH_SELECT}"
+            )
+            inferred = mark_inferred_warmups(conn, warmups)
+            set_derived_version(conn, "warmups", warmup_rule_version())
+        instrument.count("inferred_warmups", inferred)
+        logger.info(
+            f"✅ Rebuilt {ENRICHED_TABLE} with {cur.rowcount} rows "
+            f"({inferred} inferred warmup(s))."
+        )
+        return cur.rowcount, 0, None
+
+    n_dates = find_affected_dates(conn)
+    remapped = apply_remapped(conn, changed) if changed else 0
+    if remapped:
+        logger.info(f"🔁 Remapped {remapped} enriched set(s).")
+        instrument.count("remapped_sets", remapped)
+    if n_dates == 0 and remapped == 0:
+        logger.info("✅ Enriched table is up to date.", extra=CONSOLE)
+        return 0, 0, 0
+
+    # Replace the affected workout dates in one transaction
+    written = 0
+    if n_dates:
+        logger.info(f"🔄 Re-enriching {n_dates} workout date(s).")
+        instrument.count("workout_dates", n_dates)
+        warmups = find_inferred_warmups(conn)
+        with conn:
+            conn.execute(
+                f"DELETE FROM {ENRICHED_TABLE} WHERE date IN (SELECT date FROM {AFFECTED_TABLE})"
+            )
+            cur = conn.execute(
+                f"""
+                INSERT OR REPLACE INTO {ENRICHED_TABLE} ({ENRICHED_COLUMNS})
+                {ENRICH_SELECT}
+                WHERE w.date IN (SELECT date FROM {AFFECTED_TABLE})
+                """
+            )
+            inferred = mark_inferred_warmups(conn, warmups)
+        written = cur.rowcount
+        instrument.count("inferred_warmups", inferred)
+        logger.info(
+            f"✅ Upserted {written} rows into {ENRICHED_TABLE} ({inferred} inferred warmup(s))."
+        )
+    return written, remapped, n_dates
+
+
+# 📊 Rollup stage: refresh the weeks touched by enrich_sets on the same connection
+def rollup_weeks(conn, full=False, remapped=0):
+    if full:
+        refresh_weekly_volume(conn, only_affected=False)
+    else:
+        n_weeks = find_affected_weeks(conn, remapped)
+        refresh_weekly_volume(conn)
+        logger.info(f"📊 Refreshed {n_weeks} week(s) of {ROLLUP_TABLE}.")
+    optimize(conn)
+
+
+# (year, month) partitions touched by the last enrich_sets run on this connection
+def find_affected_months(conn, remapped):
+    remapped_months = ""
+    if remapped:
+        remapped_months = f"""
+        UNION
+        SELECT {MONTH_SQL.format("date")} FROM {ENRICHED_TABLE}
+        WHERE exercise_name IN (SELECT exercise_name FROM {CHANGED_TABLE})
+        """
+    return conn.execute(
+        f"""
+        SELECT DISTINCT {MONTH_SQL.format("date")} FROM {AFFECTED_TABLE}
+        WHERE date IS NOT NULL
+        {remapped_months}
+        """
+    ).fetchall()
+
+
+# 🗂 Parquet stage: mirror the changed months of the enriched table into the sidecar.
+# A missing sidecar is written in full.
+def export_parquet(conn, root, full=False, remapped=0):
+    full = full or not os.path.isdir(root)
+    months = None if full else find_affected_months(conn, remapped)
+    return write_enriched(conn, root, months)
+
+
+def main(full=False, db_path=DB_PATH, conn=None, parquet_dir=None):
+    owned = conn is None
+    conn = conn or sqlite3.connect(db_path)
+
+    with instrument.run("process_sets"):
+        with instrument.span("enrich") as span:
+            written, remapped, n_dates = enrich_sets(conn, full)
+            span.rows = written
+        full = full or n_dates is None
+        changed = full or n_dates or remapped
+        if changed:
+            with instrument.span("rollup"):
+                rollup_weeks(conn, full, remapped)
+        # Muscle groups don't enter e1RM or tonnage, so remaps alone skip this
+        if full or n_dates or needs_backfill(conn):
+            with instrument.span("strength") as span:
+                _, span.rows = refresh_strength(conn, None if full else AFFECTED_TABLE)
+        if parquet_dir and (changed or not os.path.isdir(parquet_dir)):
+            with instrument.span("parquet") as span:
+                span.rows = export_parquet(conn, parquet_dir, full, remapped)
+
+    if owned:
+        conn.close()
+    return written
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Enrich synced sets with muscle groups.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="rebuild the enriched and rollup tables instead of only new workout dates",
+    )
+    parser.add_argument(
+        "--parquet",
+        metavar="DIR",
+        help="also keep a year/month partitioned Parquet copy of the enriched sets",
+    )
+    args = parser.parse_args()
+    main(full=args.full, parquet_dir=args.parquet)
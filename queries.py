@@ -0,0 +1,166 @@
+# queries.py
+# SQL shared by process_sets and the dashboard. Aggregation happens in SQLite so
+# only per-week rows ever reach pandas.
+from frames import compact
+from schema import E1RM_TABLE, ENRICHED_TABLE, ROLLUP_TABLE, TONNAGE_TABLE
+
+# Monday of the week a Strong timestamp falls in
+WEEK_START_SQL = "date({}, 'weekday 0', '-6 days')"
+
+# Weighted sets per week and muscle group: primary counts 1.0, secondary 0.5.
+# Warmups and sets whose primary group is Rehab are left out.
+# {source} and {where} narrow the enriched rows, e.g. to a set of weeks or a date range.
+WEEKLY_VOLUME_SQL = f"""
+    SELECT week_start, muscle_group, SUM(weight) AS volume
+    FROM (
+        SELECT {WEEK_START_SQL.format("e.date")} AS week_start,
+            e.muscle_group_primary AS muscle_group, 1.0 AS weight
+        FROM {{source}}
+        WHERE e.is_warmup = 0
+          AND e.muscle_group_primary IS NOT NULL
+          AND e.muscle_group_primary != 'Rehab' {{where}}
+        UNION ALL
+        SELECT {WEEK_START_SQL.format("e.date")} AS week_start,
+            e.muscle_group_secondary AS muscle_group, 0.5 AS weight
+        FROM {{source}}
+        WHERE e.is_warmup = 0
+          AND e.muscle_group_secondary IS NOT NULL
+          AND (e.muscle_group_primary IS NULL OR e.muscle_group_primary != 'Rehab') {{where}}
+    )
+    GROUP BY week_start, muscle_group
+"""
+
+
+def weekly_volume_sql(weeks_table=None, since=None):
+    source, where = f"{ENRICHED_TABLE} e", ""
+    if weeks_table is not None:
+        # Pin the plan to one idx_enriched_date range scan per affected week. Left
+        # to itself (e.g. before ANALYZE) the planner may instead walk the
+        # covering weekly index once per week, i.e. every row for every week.
+        source = f"{weeks_table} a CROSS JOIN {ENRICHED_TABLE} e INDEXED BY idx_enriched_date"
+        where = "AND e.date >= a.week_start AND e.date < date(a.week_start, '+7 days')"
+    if since is not None:
+        # Whole weeks, as the rollup path: back to the Monday of :since
+        where += f" AND e.date >= {WEEK_START_SQL.format(':since')}"
+    return WEEKLY_VOLUME_SQL.format(source=source, where=where)
+
+
+def has_table(conn, name):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+# 📊 Weekly volume as a small frame: the maintained rollup if present, otherwise
+# aggregated on the fly from the enriched sets.
+def load_weekly_volume(conn, since=None):
+    import pandas as pd
+
+    params = {"since": since} if since is not None else {}
+    if has_table(conn, ROLLUP_TABLE):
+        where = ""
+        if since is not None:
+            where = f"WHERE week_start >= {WEEK_START_SQL.format(':since')}"
+        q = f"""
+        SELECT week_start, muscle_group, volume
+        FROM {ROLLUP_TABLE} {where}
+        ORDER BY week_start ASC
+        """
+    elif has_table(conn, ENRICHED_TABLE):
+        q = f"{weekly_volume_sql(since=since)} ORDER BY week_start ASC"
+    else:
+        return pd.DataFrame(
+            {
+                "week_start": pd.Series(dtype="datetime64[ns]"),
+                "muscle_group": pd.Series(dtype="category"),
+                "volume": pd.Series(dtype=float),
+            }
+        )
+    return compact(pd.read_sql(q, conn, params=params, parse_dates=["week_start"]))
+
+
+# 🍩 Per-week slices of the weekly volume frame, keyed by week_start; the
+# dashboard's donut chart reads one week at a time
+def weekly_breakdown(weekly):
+    return {
+        week: frame.reset_index(drop=True)
+        for week, frame in weekly.groupby("week_start", observed=True)
+    }
+
+
+# 📖 Every enriched set as a DataFrame, read through sqlite3; the Parquet sidecar
+# (parquet_store.load_enriched_sets) serves the same rows without the SQL round trip.
+def load_enriched_sets(conn):
+    import pandas as pd
+
+    return compact(pd.read_sql(f"SELECT * FROM {ENRICHED_TABLE}", conn, parse_dates=["date"]))
+
+
+# 🏋️ Strength charts read the tables strength.py maintains; each query is one
+# primary-key or index range, so a chart costs the same at any history length.
+# Databases process_sets hasn't migrated yet give empty frames.
+def _read_strength(conn, table, q, params=(), parse_dates=None):
+    import pandas as pd
+
+    if not has_table(conn, table):
+        return pd.DataFrame()
+    return compact(pd.read_sql(q, conn, params=params, parse_dates=parse_dates))
+
+
+# Exercises with e1RM history, most trained first
+def load_strength_exercises(conn):
+    frame = _read_strength(
+        conn,
+        E1RM_TABLE,
+        f"""
+        SELECT exercise_name, COUNT(*) AS workouts FROM {E1RM_TABLE}
+        GROUP BY exercise_name ORDER BY workouts DESC, exercise_name
+        """,
+    )
+    return frame["exercise_name"].tolist() if len(frame) else []
+
+
+# Best estimated 1RM per workout, the running record and the PR count so far
+def load_e1rm(conn, exercise_name):
+    return _read_strength(
+        conn,
+        E1RM_TABLE,
+        f"""
+        SELECT date, e1rm, weight, reps, best_e1rm, is_pr, pr_count
+        FROM {E1RM_TABLE} WHERE exercise_name = ? ORDER BY date
+        """,
+        (exercise_name,),
+        ["date"],
+    )
+
+
+# Weekly tonnage (weight x reps of working sets) of one exercise, or summed
+# over every exercise
+def load_weekly_tonnage(conn, exercise_name=None):
+    if exercise_name is None:
+        q = f"""
+        SELECT week_start, SUM(tonnage) AS tonnage FROM {TONNAGE_TABLE}
+        GROUP BY week_start ORDER BY week_start
+        """
+        params = ()
+    else:
+        q = f"""
+        SELECT week_start, tonnage, sets FROM {TONNAGE_TABLE}
+        WHERE exercise_name = ? ORDER BY week_start
+        """
+        params = (exercise_name,)
+    return _read_strength(conn, TONNAGE_TABLE, q, params, ["week_start"])
+
+
+def load_recent_prs(conn, limit=10):
+    return _read_strength(
+        conn,
+        E1RM_TABLE,
+        f"""
+        SELECT date, exercise_name, e1rm, weight, reps FROM {E1RM_TABLE}
+        WHERE is_pr = 1 ORDER BY date DESC LIMIT ?
+        """,
+        (limit,),
+        ["date"],
+    )
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# run_stats.py
+# Summarize the last runs recorded by instrument.py: per-stage seconds, rows
+# and rows/sec, and each run's counters, read back from the rotating log.
+#
+#   python run_stats.py              # last 5 runs of anything
+#   python run_stats.py -n 20 --script process_sets
+import argparse
+import json
+import statistics
+from pathlib import Path
+
+from instrument import METRICS_LOGGER
+from log_config import BACKUP_COUNT, LOG_PATH
+
+_MARKER = f"] [{METRICS_LOGGER}] ["
+
+
+def log_files(path=LOG_PATH, backups=BACKUP_COUNT):
+    # Oldest first: fitness_pipeline.log.3 ... .1, then the live file
+    path = Path(path)
+    rotated = [Path(f"{path}.{i}") for i in range(backups, 0, -1)]
+    return [p for p in rotated + [path] if p.exists()]
+
+
+def read_records(paths):
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if _MARKER not in line:
+                    continue
+                # [time] [metrics] [LEVEL] {json}
+                try:
+                    yield json.loads(line.split("] ", 3)[3])
+                except (IndexError, ValueError):
+                    continue  # a line cut short by rotation or a crash
+
+
+# 🧾 Runs in log order, each {"run", "script", "spans", ...}; a run whose
+# closing record is missing (still running, or killed) has status "incomplete"
+def collect_runs(records):
+    runs = {}
+    for record in records:
+        run = runs.setdefault(
+            record["run"],
+            {"run": record["run"], "script": record["script"], "spans": [],
+             "status": "incomplete", "counters": {}},
+        )
+        if record.get("event") == "span":
+            run["spans"].append(record)
+        elif record.get("event") == "run":
+            run.update(
+                started=record.get("started"),
+                seconds=record.get("seconds"),
+                status=record.get("status", "ok"),
+                counters=record.get("counters") or {},
+            )
+    return list(runs.values())
+
+
+def last_runs(runs, n=5, script=None):
+    if script is not None:
+        runs = [r for r in runs if r["script"] == script]
+    return runs[-n:] if n else runs
+
+
+def _rows(span):
+    if span.get("rows") is None:
+        return f"{'':>12} {'':>14}"
+    rate = span.get("rows_per_sec")
+    rate = f"{rate:>10,.0f} r/s" if rate is not None else f"{'':>14}"
+    return f"{span['rows']:>7,} rows {rate}"
+
+
+def report(runs):
+    if not runs:
+        print("No instrumented runs in the log yet.")
+        return
+    for run in runs:
+        seconds = f"{run['seconds']:.2f}s" if run.get("seconds") is not None else "—"
+        print(
+            f"🏃 {run['script']:<14} {run.get('started') or '':<20} "
+            f"{seconds:>9}  {run['status']}  [{run['run']}]"
+        )
+        for span in run["spans"]:
+            print(f"    {span['span']:<16} {span['seconds']:>9.3f}s {_rows(span)}")
+        if run["counters"]:
+            counters = ", ".join(f"{k}={v:,}" for k, v in sorted(run["counters"].items()))
+            print(f"    {counters}")
+
+    # Median per stage across the runs shown, for a quick read on drift
+    by_stage = {}
+    for run in runs:
+        for span in run["spans"]:
+            by_stage.setdefault((run["script"], span["span"]), []).append(span)
+    print(f"\n{'script':<14} {'stage':<16} {'runs':>5} {'median s':>10} {'median r/s':>12}")
+    for (script, stage), spans in sorted(by_stage.items()):
+        seconds = statistics.median(s["seconds"] for s in spans)
+        rates = [s["rows_per_sec"] for s in spans if s.get("rows_per_sec") is not None]
+        rate = f"{statistics.median(rates):>12,.0f}" if rates else f"{'—':>12}"
+        print(f"{script:<14} {stage:<16} {len(spans):>5} {seconds:>10.3f} {rate}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize recent instrumented runs.")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="how many runs (0 for all)")
+    parser.add_argument("--script", help="only runs of this script, e.g. process_sets")
+    parser.add_argument("--log", default=LOG_PATH, help="log file; its rotated backups are read too")
+    args = parser.parse_args()
+
+    report(last_runs(collect_runs(read_records(log_files(args.log))), args.runs, args.script))
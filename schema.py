@@ -0,0 +1,380 @@
+# schema.py
+# Versioned schema for synced_workouts.db. PRAGMA user_version records the last
+# migration applied, so an up-to-date database costs one pragma read per connect.
+from log_config import get_logger
+
+logger = get_logger("schema")
+
+RAW_TABLE = "workout_sets"
+ENRICHED_TABLE = "workout_sets_enriched"
+MAP_TABLE = "exercise_muscle_map"
+ROLLUP_TABLE = "weekly_muscle_volume"
+PUSHED_TABLE = "pushed_set_ids"
+OUTBOX_TABLE = "outbox_pending"
+OUTBOX_BATCHES_TABLE = "outbox_batches"
+E1RM_TABLE = "exercise_e1rm"
+TONNAGE_TABLE = "weekly_tonnage"
+DERIVED_TABLE = "derived_versions"
+
+WORKOUT_SETS_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {RAW_TABLE} (
+        id TEXT PRIMARY KEY,
+        date TEXT,
+        workout_name TEXT,
+        duration TEXT,
+        exercise_name TEXT,
+        set_order INTEGER,
+        is_warmup GENERATED ALWAYS AS (
+            CASE WHEN set_order = -1 THEN 1 ELSE 0 END
+        ) VIRTUAL,
+        weight REAL,
+        reps INTEGER,
+        distance REAL,
+        seconds INTEGER,
+        notes TEXT,
+        workout_notes TEXT,
+        rpe REAL
+    )
+"""
+
+TABLES = [
+    WORKOUT_SETS_SQL,
+    # Simple, id-only record of sets pushed downstream
+    f"""
+    CREATE TABLE IF NOT EXISTS {PUSHED_TABLE} (
+        id TEXT PRIMARY KEY
+    )
+    """,
+    # Watermark for incremental imports, one row per export source
+    """
+    CREATE TABLE IF NOT EXISTS sync_state (
+        source TEXT PRIMARY KEY,
+        last_workout INTEGER,
+        last_date TEXT,
+        byte_offset INTEGER,
+        prefix_sha256 TEXT,
+        column_dtypes TEXT,
+        updated_at TEXT
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {ENRICHED_TABLE} (
+        id TEXT PRIMARY KEY,
+        date TEXT,
+        exercise_name TEXT,
+        set_order INTEGER,
+        set_index INTEGER,
+        is_warmup INTEGER,
+        muscle_group_primary TEXT,
+        muscle_group_secondary TEXT
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {MAP_TABLE} (
+        exercise_name TEXT PRIMARY KEY,
+        muscle_groups TEXT,
+        muscle_group_primary TEXT,
+        muscle_group_secondary TEXT,
+        rule_version TEXT
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        week_start TEXT,
+        muscle_group TEXT,
+        volume REAL,
+        PRIMARY KEY (week_start, muscle_group)
+    )
+    """,
+]
+
+# name -> (table, indexed columns or expressions)
+INDEXES = {
+    # Incremental enrichment reads whole workout dates
+    "idx_workout_sets_date": (RAW_TABLE, "date"),
+    # "Today's sets" lookups: WHERE DATE(date) = DATE('now', 'localtime')
+    "idx_workout_sets_day": (RAW_TABLE, "date(date)"),
+    # SELECT DISTINCT exercise_name and the exercise map join
+    "idx_workout_sets_exercise": (RAW_TABLE, "exercise_name"),
+    # Rollup refresh range-joins affected weeks on date
+    "idx_enriched_date": (ENRICHED_TABLE, "date"),
+    # Covers the weekly aggregation: filter columns first, then what it reads
+    "idx_enriched_weekly": (
+        ENRICHED_TABLE,
+        "is_warmup, muscle_group_primary, date, muscle_group_secondary",
+    ),
+    # Remapping an exercise touches only its rows; strength refreshes read
+    # one exercise's tail of dates
+    "idx_enriched_exercise_date": (ENRICHED_TABLE, "exercise_name, date"),
+}
+
+# Indexes created by earlier versions and replaced by one above
+RETIRED_INDEXES = ["idx_enriched_warmup_primary", "idx_enriched_exercise"]
+
+# Generated columns need SQLite >= 3.31.0 (2020-01-22)
+MIN_SQLITE_VERSION = (3, 31, 0)
+
+# Rows copied per transaction by batched migrations; each batch holds the
+# write lock only briefly so imports and the dashboard keep working.
+MIGRATION_BATCH_ROWS = 5_000
+
+# Columns stored in workout_sets (is_warmup is generated, never copied)
+RAW_COLUMNS = [
+    "id", "date", "workout_name", "duration", "exercise_name", "set_order",
+    "weight", "reps", "distance", "seconds", "notes", "workout_notes", "rpe",
+]
+
+# Resume point for batched migrations interrupted mid-copy
+PROGRESS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migration_progress (
+        version INTEGER PRIMARY KEY,
+        last_rowid INTEGER
+    )
+"""
+
+
+def create_tables(conn):
+    for sql in TABLES:
+        conn.execute(sql)
+
+
+def create_indexes(conn):
+    for name, (table, columns) in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def _check_sqlite_version(conn):
+    ver = conn.execute("SELECT sqlite_version()").fetchone()[0]
+    if tuple(int(p) for p in ver.split(".")[:3]) < MIN_SQLITE_VERSION:
+        raise RuntimeError(f"SQLite {ver} is too old; generated columns need 3.31.0+")
+
+
+def _v1_base_tables(conn):
+    _check_sqlite_version(conn)
+    create_tables(conn)
+
+
+def _has_generated_warmup(conn):
+    # table_xinfo marks generated columns as hidden = 2 (virtual) or 3 (stored)
+    for _, name, *_, hidden in conn.execute(f"PRAGMA table_xinfo({RAW_TABLE})"):
+        if name == "is_warmup":
+            return hidden in (2, 3)
+    return False
+
+
+def _copy_batch(conn, target, after_rowid, limit=None):
+    columns = ", ".join(RAW_COLUMNS)
+    limit_sql = "" if limit is None else f"LIMIT {int(limit)}"
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO {target} (rowid, {columns})
+        SELECT rowid, {columns} FROM {RAW_TABLE}
+        WHERE rowid > ? ORDER BY rowid {limit_sql}
+        """,
+        (after_rowid,),
+    )
+    return conn.execute(f"SELECT MAX(rowid) FROM {target}").fetchone()[0] or 0
+
+
+def _v3_generated_warmup(conn, batch_rows=None):
+    # Databases from before is_warmup became a generated column: rebuild
+    # workout_sets in rowid batches, then swap in one short transaction.
+    if _has_generated_warmup(conn):
+        return
+
+    batch_rows = batch_rows or MIGRATION_BATCH_ROWS
+    target = f"{RAW_TABLE}_new"
+    with conn:
+        conn.execute(PROGRESS_SQL)
+        conn.execute(WORKOUT_SETS_SQL.replace(RAW_TABLE, target, 1))
+        row = conn.execute(
+            "SELECT last_rowid FROM schema_migration_progress WHERE version = 3"
+        ).fetchone()
+    last_rowid = row[0] if row else 0
+    total = conn.execute(f"SELECT COUNT(*) FROM {RAW_TABLE}").fetchone()[0]
+    logger.info(f"🧱 Rebuilding {RAW_TABLE} ({total} rows) from rowid {last_rowid}")
+
+    while True:
+        with conn:
+            copied_to = _copy_batch(conn, target, last_rowid, batch_rows)
+            if copied_to == last_rowid:
+                break
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_migration_progress VALUES (3, ?)",
+                (copied_to,),
+            )
+        last_rowid = copied_to
+        logger.debug(f"🧱 Copied {RAW_TABLE} up to rowid {last_rowid}")
+
+    # Rows imported while we copied are picked up under the swap's write lock
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _copy_batch(conn, target, last_rowid)
+        conn.execute(f"DROP TABLE {RAW_TABLE}")
+        conn.execute(f"ALTER TABLE {target} RENAME TO {RAW_TABLE}")
+        # The old table's indexes went with it
+        create_indexes(conn)
+        conn.execute("DELETE FROM schema_migration_progress WHERE version = 3")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute(f"ANALYZE {RAW_TABLE}")
+
+
+# Sets claimed by an outbox batch but not yet acknowledged by the sink
+OUTBOX_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {OUTBOX_TABLE} (
+        id TEXT PRIMARY KEY,
+        batch_id TEXT NOT NULL,
+        claimed_at TEXT
+    )
+"""
+
+# Delivery history of outbox batches that failed at least once. A batch with
+# dead_at set is dead-lettered: later runs skip it until it is requeued.
+OUTBOX_BATCHES_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {OUTBOX_BATCHES_TABLE} (
+        batch_id TEXT PRIMARY KEY,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        failed_at TEXT,
+        dead_at TEXT
+    )
+"""
+
+
+# Strength analytics, maintained by strength.py. One row per exercise per
+# workout: the best set's estimated 1RM and the running personal record.
+E1RM_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {E1RM_TABLE} (
+        exercise_name TEXT,
+        date TEXT,
+        e1rm REAL,
+        weight REAL,
+        reps INTEGER,
+        best_e1rm REAL,
+        is_pr INTEGER,
+        pr_count INTEGER,
+        PRIMARY KEY (exercise_name, date)
+    )
+"""
+
+TONNAGE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {TONNAGE_TABLE} (
+        exercise_name TEXT,
+        week_start TEXT,
+        tonnage REAL,
+        sets INTEGER,
+        PRIMARY KEY (exercise_name, week_start)
+    )
+"""
+
+STRENGTH_INDEXES = {
+    # Affected workout dates and recent PRs across every exercise
+    "idx_e1rm_date": (E1RM_TABLE, "date"),
+    # Total tonnage per week
+    "idx_tonnage_week": (TONNAGE_TABLE, "week_start, tonnage"),
+}
+
+
+# Rule version each derived table was last rebuilt from the whole history with;
+# a table whose recorded version isn't the code's is rebuilt on the next run
+DERIVED_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {DERIVED_TABLE} (
+        name TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        built_at TEXT
+    )
+"""
+
+
+def derived_version(conn, name):
+    row = conn.execute(
+        f"SELECT version FROM {DERIVED_TABLE} WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def set_derived_version(conn, name, version):
+    conn.execute(
+        f"INSERT OR REPLACE INTO {DERIVED_TABLE} (name, version, built_at) "
+        "VALUES (?, ?, datetime('now'))",
+        (name, version),
+    )
+
+
+def _v2_indexes(conn):
+    for name in RETIRED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    create_indexes(conn)
+    # Give the planner real row counts for the new indexes
+    conn.execute("ANALYZE")
+
+
+def _v4_outbox(conn):
+    conn.execute(OUTBOX_SQL)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_outbox_batch ON {OUTBOX_TABLE} (batch_id)"
+    )
+
+
+def _v5_strength(conn):
+    conn.execute(E1RM_SQL)
+    conn.execute(TONNAGE_SQL)
+    for name, (table, columns) in STRENGTH_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    # Swaps the exercise index for the (exercise_name, date) one
+    _v2_indexes(conn)
+
+
+def _v6_outbox_batches(conn):
+    conn.execute(OUTBOX_BATCHES_SQL)
+
+
+def _v7_derived_versions(conn):
+    conn.execute(DERIVED_SQL)
+
+
+# (version, description, step, batched); each step must be safe to re-run.
+# Append only: a database records the last version it applied, so steps are
+# never renumbered or reordered.
+# Batched steps manage their own short transactions and can resume after
+# an interruption; the rest run inside a single transaction.
+MIGRATIONS = [
+    (1, "base tables", _v1_base_tables, False),
+    (2, "query indexes", _v2_indexes, False),
+    (3, "generated is_warmup column", _v3_generated_warmup, True),
+    (4, "outbox for downstream pushes", _v4_outbox, False),
+    (5, "strength analytics tables", _v5_strength, False),
+    (6, "outbox batch attempts and dead letters", _v6_outbox_batches, False),
+    (7, "derived table versions", _v7_derived_versions, False),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    version = schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    for target, description, step, batched in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info(f"🧱 Migrating schema to v{target}: {description}")
+        if batched:
+            step(conn)
+        with conn:
+            if not batched:
+                step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+    return SCHEMA_VERSION
+
+
+def optimize(conn):
+    # Cheap when nothing changed; refreshes planner stats after big loads
+    conn.execute("PRAGMA optimize")
@@ -0,0 +1,203 @@
+# strength.py
+# Strength analytics kept next to the enriched sets: each exercise's best
+# estimated 1RM per workout with a running personal record, and its weekly
+# tonnage. process_sets refreshes them after enrichment; a new workout only
+# recomputes the tail of each exercise it contains, from its date onward.
+from log_config import get_logger
+from queries import WEEK_START_SQL
+from schema import (
+    E1RM_TABLE,
+    ENRICHED_TABLE,
+    RAW_TABLE,
+    TONNAGE_TABLE,
+    derived_version,
+    set_derived_version,
+)
+
+logger = get_logger("strength")
+
+TAILS_TABLE = "temp.strength_tails"
+SETS_TABLE = "temp.strength_sets"
+# Bump when e1RM, PR or tonnage rules change: every exercise is then rebuilt once
+STRENGTH_VERSION = "1"
+
+# Epley, as detect_warmups.e1rm; only loaded sets with reps count
+E1RM_EXPR = "weight * (1 + reps / 30.0)"
+WORKING_SETS = "e.is_warmup = 0 AND w.weight > 0 AND w.reps > 0"
+
+
+# 🔎 (exercise_name, since) for every exercise with sets on the affected
+# workout dates, or for every exercise when affected_table is None
+def find_tails(conn, affected_table=None):
+    conn.execute(f"DROP TABLE IF EXISTS {TAILS_TABLE}")
+    if affected_table is None:
+        source = f"""
+        SELECT exercise_name, MIN(date) FROM {ENRICHED_TABLE}
+        WHERE exercise_name IS NOT NULL
+        GROUP BY exercise_name
+        """
+    else:
+        # Stored rows count too, so a workout whose sets were deleted drops out
+        source = f"""
+        SELECT exercise_name, MIN(date) FROM (
+            SELECT e.exercise_name, e.date FROM {affected_table} a
+            JOIN {ENRICHED_TABLE} e ON e.date = a.date
+            UNION ALL
+            SELECT s.exercise_name, s.date FROM {affected_table} a
+            JOIN {E1RM_TABLE} s ON s.date = a.date
+        )
+        WHERE exercise_name IS NOT NULL
+        GROUP BY exercise_name
+        """
+        # Row counts for the temp table; without them the planner takes it for a
+        # big one and builds Bloom filters over the whole enriched and raw tables
+        conn.execute(f"ANALYZE {affected_table}")
+    conn.execute(
+        f"CREATE TABLE {TAILS_TABLE} (exercise_name TEXT PRIMARY KEY, since TEXT NOT NULL)"
+    )
+    conn.execute(f"INSERT INTO {TAILS_TABLE} (exercise_name, since) {source}")
+    conn.execute(f"ANALYZE {TAILS_TABLE}")
+    return conn.execute(f"SELECT COUNT(*) FROM {TAILS_TABLE}").fetchone()[0]
+
+
+# 📥 The working sets the refresh reads, copied once for both aggregates: every
+# one for a rebuild, else each tail from the Monday of its first workout so
+# tonnage gets whole weeks
+def collect_sets(conn, full=False):
+    conn.execute(f"DROP TABLE IF EXISTS {SETS_TABLE}")
+    conn.execute(
+        f"CREATE TABLE {SETS_TABLE} (exercise_name TEXT, date TEXT, weight REAL, reps INTEGER)"
+    )
+    if full:
+        # Raw in rowid order with a lookup into the enriched table; far cheaper
+        # than reaching into raw in exercise order
+        source = f"""
+        FROM {RAW_TABLE} w CROSS JOIN {ENRICHED_TABLE} e ON e.id = w.id
+        WHERE {WORKING_SETS}
+        """
+    else:
+        source = f"""
+        FROM {TAILS_TABLE} t
+        CROSS JOIN {ENRICHED_TABLE} e INDEXED BY idx_enriched_exercise_date
+        CROSS JOIN {RAW_TABLE} w ON w.id = e.id
+        WHERE e.exercise_name = t.exercise_name
+          AND e.date >= {WEEK_START_SQL.format("t.since")}
+          AND {WORKING_SETS}
+        """
+    cur = conn.execute(
+        f"INSERT INTO {SETS_TABLE} SELECT e.exercise_name, e.date, w.weight, w.reps {source}"
+    )
+    return cur.rowcount
+
+
+# Best set per exercise per workout from `since` on, then running records
+# carried forward from the last workout before the tail
+E1RM_TAIL_SQL = f"""
+    WITH sessions AS (
+        SELECT s.exercise_name, s.date, MAX({E1RM_EXPR}) AS e1rm, s.weight, s.reps
+        FROM {SETS_TABLE} s JOIN {TAILS_TABLE} t ON t.exercise_name = s.exercise_name
+        WHERE s.date >= t.since
+        GROUP BY s.exercise_name, s.date
+    ),
+    prior AS (
+        SELECT t.exercise_name,
+            IFNULL(p.best_e1rm, 0) AS best_e1rm,
+            IFNULL(p.pr_count, 0) AS pr_count
+        FROM {TAILS_TABLE} t
+        LEFT JOIN {E1RM_TABLE} p ON p.exercise_name = t.exercise_name AND p.date = (
+            SELECT MAX(date) FROM {E1RM_TABLE}
+            WHERE exercise_name = t.exercise_name AND date < t.since
+        )
+    ),
+    running AS (
+        SELECT s.*, p.pr_count AS prior_prs,
+            MAX(p.best_e1rm, IFNULL(MAX(s.e1rm) OVER (
+                PARTITION BY s.exercise_name ORDER BY s.date
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ), 0)) AS best_before
+        FROM sessions s JOIN prior p ON p.exercise_name = s.exercise_name
+    ),
+    flagged AS (
+        SELECT *, e1rm > best_before AS is_pr FROM running
+    )
+    SELECT exercise_name, date, e1rm, weight, reps,
+        MAX(best_before, e1rm) AS best_e1rm,
+        is_pr,
+        prior_prs + SUM(is_pr) OVER (PARTITION BY exercise_name ORDER BY date) AS pr_count
+    FROM flagged
+"""
+
+TONNAGE_TAIL_SQL = f"""
+    SELECT exercise_name, {WEEK_START_SQL.format("date")} AS week_start,
+        SUM(weight * reps) AS tonnage, COUNT(*) AS sets
+    FROM {SETS_TABLE}
+    GROUP BY exercise_name, week_start
+"""
+
+
+def refresh_e1rm(conn):
+    conn.execute(
+        f"""
+        DELETE FROM {E1RM_TABLE} WHERE rowid IN (
+            SELECT s.rowid FROM {TAILS_TABLE} t
+            JOIN {E1RM_TABLE} s ON s.exercise_name = t.exercise_name AND s.date >= t.since
+        )
+        """
+    )
+    cur = conn.execute(
+        f"""
+        INSERT INTO {E1RM_TABLE} (exercise_name, date, e1rm, weight, reps,
+            best_e1rm, is_pr, pr_count)
+        {E1RM_TAIL_SQL}
+        """
+    )
+    return cur.rowcount
+
+
+def refresh_tonnage(conn):
+    # Whole weeks: the tail starts on the Monday of its first workout
+    conn.execute(
+        f"""
+        DELETE FROM {TONNAGE_TABLE} WHERE rowid IN (
+            SELECT s.rowid FROM {TAILS_TABLE} t
+            JOIN {TONNAGE_TABLE} s ON s.exercise_name = t.exercise_name
+             AND s.week_start >= {WEEK_START_SQL.format("t.since")}
+        )
+        """
+    )
+    cur = conn.execute(
+        f"INSERT INTO {TONNAGE_TABLE} (exercise_name, week_start, tonnage, sets) "
+        + TONNAGE_TAIL_SQL
+    )
+    return cur.rowcount
+
+
+# True until the strength tables have been rebuilt from the whole history under
+# STRENGTH_VERSION: on a database upgraded to v5 they start empty, and a tail
+# refresh there would miss every earlier record. Recorded, not inferred from
+# empty tables, so a history with no loaded sets isn't rebuilt every run.
+def needs_backfill(conn):
+    return derived_version(conn, "strength") != STRENGTH_VERSION
+
+
+# 🏋️ Strength stage: bring e1RM, PRs and tonnage up to date with the enriched
+# sets. affected_table lists the workout dates enrich_sets just rewrote; None
+# rebuilds every exercise, as does the first refresh under a new STRENGTH_VERSION.
+# Returns (exercises, workout rows written).
+def refresh_strength(conn, affected_table=None):
+    if affected_table is not None and needs_backfill(conn):
+        logger.info(f"🏋️ Strength tables predate v{STRENGTH_VERSION}; backfilling every exercise.")
+        affected_table = None
+    with conn:
+        if affected_table is None:
+            conn.execute(f"DELETE FROM {E1RM_TABLE}")
+            conn.execute(f"DELETE FROM {TONNAGE_TABLE}")
+            set_derived_version(conn, "strength", STRENGTH_VERSION)
+        n_exercises = find_tails(conn, affected_table)
+        collect_sets(conn, full=affected_table is None)
+        written = refresh_e1rm(conn)
+        refresh_tonnage(conn)
+    logger.info(
+        f"🏋️ Refreshed strength stats of {n_exercises} exercise(s), {written} workout row(s)."
+    )
+    return n_exercises, written
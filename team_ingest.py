@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# team_ingest.py
+# Ingest a whole team's Strong exports: one SQLite DB per athlete, listed in a
+# JSON manifest. Downloading, parsing and hashing run in a process pool; this
+# process is the only writer and stores each result as it comes back.
+#
+#   {"athletes": [{"id": "alice", "source": "/alice/strong_workouts.csv"}, ...]}
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import import_sets
+from log_config import get_logger
+from setup_db import setup_db
+
+logger = get_logger("team_ingest")
+
+DATA_DIR = "athletes"
+DB_NAME = "synced_workouts.db"
+CACHE_NAME = "dropbox_metadata.json"
+# Parsed exports waiting for the writer, per worker; bounds parent memory
+IN_FLIGHT_PER_WORKER = 2
+
+_ATHLETE_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+Athlete = namedtuple("Athlete", "id source")
+Parsed = namedtuple("Parsed", "athlete records sync rows metadata seconds")
+
+
+def load_manifest(path):
+    with open(path) as f:
+        manifest = json.load(f)
+
+    athletes, seen = [], set()
+    for entry in manifest["athletes"]:
+        athlete_id = str(entry["id"])
+        # The id names the athlete's directory, so keep it a plain file name
+        if not _ATHLETE_ID.match(athlete_id) or athlete_id in (".", ".."):
+            raise ValueError(f"Invalid athlete id in {path}: {athlete_id!r}")
+        if athlete_id in seen:
+            raise ValueError(f"Duplicate athlete id in {path}: {athlete_id!r}")
+        seen.add(athlete_id)
+        athletes.append(Athlete(athlete_id, entry.get("source", import_sets.DROPBOX_FILE_PATH)))
+    return athletes
+
+
+def athlete_dir(data_dir, athlete_id):
+    return os.path.join(data_dir, athlete_id)
+
+
+def athlete_db(data_dir, athlete_id):
+    return os.path.join(athlete_dir(data_dir, athlete_id), DB_NAME)
+
+
+def _read_state(db_path, source):
+    # Read-only, so a worker never takes a write lock on the athlete's DB
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+            return import_sets.read_sync_state(conn, source)
+    except sqlite3.OperationalError:
+        return None  # no sync_state table yet
+
+
+def _client(local_root):
+    if local_root:
+        from local_dropbox import LocalDropbox
+
+        return LocalDropbox(local_root)
+    return import_sets.get_dropbox_client()
+
+
+# 🧵 Worker: download, parse and hash one athlete's export. No DB writes here;
+# None when the export hasn't changed since the last ingest.
+def parse_athlete(athlete, data_dir, local_root=None, force=False):
+    started = time.perf_counter()
+    try:
+        os.makedirs(athlete_dir(data_dir, athlete.id), exist_ok=True)
+        csv_io, metadata = import_sets.download_csv(
+            dbx=_client(local_root),
+            cache_path=os.path.join(athlete_dir(data_dir, athlete.id), CACHE_NAME),
+            force=force,
+            source=athlete.source,
+        )
+        if csv_io is None:
+            return None
+
+        state = _read_state(athlete_db(data_dir, athlete.id), athlete.source)
+        records, sync, rows = import_sets.parse_export(csv_io.getvalue(), state, athlete.source)
+    except Exception as e:
+        # Dropbox's ApiError can't be unpickled in the parent, which would
+        # break the whole pool; send back a plain error with the same message
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    return Parsed(athlete, records, sync, rows, metadata, time.perf_counter() - started)
+
+
+# 💾 Writer: the only process that opens athlete DBs for writing
+def write_athlete(parsed, data_dir):
+    conn = sqlite3.connect(athlete_db(data_dir, parsed.athlete.id))
+    try:
+        setup_db(conn)
+        new_rows = import_sets.write_export(
+            conn, parsed.athlete.source, parsed.records, parsed.sync
+        )
+    finally:
+        conn.close()
+    import_sets.remember_export(
+        parsed.metadata,
+        os.path.join(athlete_dir(data_dir, parsed.athlete.id), CACHE_NAME),
+    )
+    return new_rows
+
+
+def enrich_athlete(athlete, data_dir, parquet=False):
+    import process_sets
+
+    parquet_dir = None
+    if parquet:
+        parquet_dir = os.path.join(athlete_dir(data_dir, athlete.id), "enriched_sets")
+    return process_sets.main(db_path=athlete_db(data_dir, athlete.id), parquet_dir=parquet_dir)
+
+
+def _result(athlete, status, rows=0, new_rows=0, seconds=0.0, error=None):
+    return {
+        "athlete": athlete.id,
+        "status": status,
+        "rows": rows,
+        "new_rows": new_rows,
+        "seconds": seconds,
+        "error": error,
+    }
+
+
+def _finish(future, athlete, data_dir):
+    try:
+        parsed = future.result()
+        if parsed is None:
+            return _result(athlete, "unchanged")
+        new_rows = write_athlete(parsed, data_dir)
+    except Exception as e:
+        # One athlete's bad export or outage shouldn't hold up the team
+        logger.error(f"❌ Ingest failed for {athlete.id}: {e}")
+        return _result(athlete, "failed", error=str(e))
+    logger.info(f"✅ {athlete.id}: {new_rows} new set(s) of {parsed.rows}")
+    return _result(athlete, "synced", parsed.rows, new_rows, parsed.seconds)
+
+
+class _Inline:
+    # Stand-in for the pool when workers=1: same code path, no pickling
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# 🏃 Ingest every athlete in the manifest, then optionally enrich their DBs.
+# Returns one result dict per athlete, in manifest order.
+def ingest_team(
+    athletes,
+    data_dir=DATA_DIR,
+    workers=None,
+    local_root=None,
+    force=False,
+    enrich=False,
+    parquet=False,
+):
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    os.makedirs(data_dir, exist_ok=True)
+    executor = ProcessPoolExecutor(workers) if workers > 1 else _Inline()
+
+    results = {}
+    with executor:
+        queue, pending = list(athletes), {}
+        while queue or pending:
+            # Keep the pool busy without parsing far ahead of the writer
+            while queue and len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                athlete = queue.pop(0)
+                future = executor.submit(parse_athlete, athlete, data_dir, local_root, force)
+                pending[future] = athlete
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                athlete = pending.pop(future)
+                results[athlete.id] = _finish(future, athlete, data_dir)
+
+        if enrich:
+            # Every DB that ingested cleanly, not just the ones with new rows: a
+            # DB whose last enrichment failed or never ran (ingested without
+            # --enrich) catches up, and process_sets finds nothing to do on the rest.
+            # Each DB is enriched by exactly one worker, so it still has one writer.
+            ready = [
+                a
+                for a in athletes
+                if results[a.id]["status"] != "failed"
+                and os.path.exists(athlete_db(data_dir, a.id))
+            ]
+            futures = {executor.submit(enrich_athlete, a, data_dir, parquet): a for a in ready}
+            for future, athlete in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"❌ Enrichment failed for {athlete.id}: {e}")
+                    results[athlete.id].update(status="failed", error=str(e))
+
+    elapsed = time.perf_counter() - started
+    rows = sum(r["rows"] for r in results.values())
+    rate = rows / elapsed if elapsed > 0 else float("inf")
+    logger.info(
+        f"⏱ Ingested {len(athletes)} athlete(s), {rows} row(s) in {elapsed:.2f}s "
+        f"({rate:,.0f} rows/sec, {workers} worker(s))"
+    )
+    return [results[a.id] for a in athletes]
+
+
+def report(results):
+    print(f"{'athlete':<20} {'status':<10} {'rows':>10} {'new':>10} {'seconds':>8}")
+    for r in results:
+        print(
+            f"{r['athlete']:<20} {r['status']:<10} {r['rows']:>10} "
+            f"{r['new_rows']:>10} {r['seconds']:>8.2f}"
+        )
+        if r["error"]:
+            print(f"    ❌ {r['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingest every athlete's Strong export listed in a manifest."
+    )
+    parser.add_argument("manifest", help="JSON file listing athlete ids and export paths")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="one sub-directory per athlete")
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    parser.add_argument(
+        "--local-root",
+        help="serve the exports from this directory instead of Dropbox",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="download and ingest even if an export is unchanged",
+    )
+    parser.add_argument("--enrich", action="store_true", help="run process_sets on each athlete's DB")
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="with --enrich, also keep each athlete's Parquet copy",
+    )
+    args = parser.parse_args()
+
+    results = ingest_team(
+        load_manifest(args.manifest),
+        data_dir=args.data_dir,
+        workers=args.workers,
+        local_root=args.local_root,
+        force=args.force,
+        enrich=args.enrich,
+        parquet=args.parquet,
+    )
+    report(results)
+    if any(r["status"] == "failed" for r in results):
+        raise SystemExit(1)
@@ -0,0 +1,83 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import log_config  # noqa: E402
+
+SAMPLE_CSV = ROOT / "strong_workouts.csv"
+
+# Manual scripts that run against a live synced_workouts.db
+collect_ignore = ["sync_push_batch.py", "test_push.py", "validate_muscle_mapping.py"]
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call(item):
+    # Console records are printed by the listener thread; drain it while the
+    # test's output is still being captured, not during pytest's own reporting
+    yield
+    log_config.flush_logs()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _session_log_path(tmp_path_factory):
+    # Module-scoped fixtures log before any per-test redirect is in place
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(log_config, "LOG_PATH", tmp_path_factory.mktemp("logs") / "pipeline.log")
+        yield
+        log_config.flush_logs()
+
+
+@pytest.fixture(autouse=True)
+def log_path(tmp_path_factory, monkeypatch):
+    # Every test logs (and records metrics) into its own file, never the real
+    # fitness_pipeline.log; the listener is stopped so the next test reopens it.
+    # Kept out of tmp_path, which some tests expect to hold only their files.
+    path = tmp_path_factory.mktemp("logs") / "pipeline.log"
+    log_config.flush_logs()
+    monkeypatch.setattr(log_config, "LOG_PATH", path)
+    yield path
+    log_config.flush_logs()
+
+
+@pytest.fixture
+def import_sets():
+    # Importing no longer fetches a Dropbox token, so no credentials are needed
+    return importlib.import_module("import_sets")
+
+
+@pytest.fixture
+def sample_csv_bytes():
+    return SAMPLE_CSV.read_bytes()
+
+
+@pytest.fixture(scope="module")
+def sample_csv_bytes_module():
+    return SAMPLE_CSV.read_bytes()
+
+
+class FakePushClient:
+    # Records pushes; optionally fails the first few or blocks until released
+    def __init__(self, fail_times=0, gate=None):
+        self.sent = []
+        self.attempts = 0
+        self.fail_times = fail_times
+        self.gate = gate
+
+    def send_message(self, message, title=None):
+        self.attempts += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.attempts <= self.fail_times:
+            raise ConnectionError("pushover unavailable")
+        self.sent.append((title, message))
+
+
+@pytest.fixture
+def push_client():
+    # Factory, so a test can set it up: push_client(fail_times=2, gate=event)
+    return FakePushClient
@@ -0,0 +1,132 @@
+import sqlite3
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import process_sets
+from detect_warmups import detect_warmups
+
+
+def _session(sets, date="2024-03-04 18:00:00", exercise="Bench Press (Barbell)"):
+    # sets: (weight, reps) or (weight, reps, "WARM_UP")
+    return pd.DataFrame(
+        {
+            "date": date,
+            "exercise_name": exercise,
+            "set_order": [s[2] if len(s) > 2 else str(i + 1) for i, s in enumerate(sets)],
+            "weight": [s[0] for s in sets],
+            "reps": [s[1] for s in sets],
+        }
+    )
+
+
+def _flags(df):
+    return detect_warmups(df)["is_warmup"].tolist()
+
+
+def test_ramp_up_sets_before_the_working_weight_are_warmups():
+    ramp = _session([(40, 10), (60, 5), (80, 3), (100, 5), (100, 5), (95, 6)])
+    assert _flags(ramp) == [1, 1, 1, 0, 0, 0]
+
+
+def test_sets_after_the_first_working_set_are_never_warmups():
+    back_off = _session([(100, 5), (100, 5), (60, 12), (40, 20)])
+    assert _flags(back_off) == [0, 0, 0, 0]
+
+
+def test_light_sets_of_many_reps_are_not_mistaken_for_ramp_ups():
+    # 60 x 20 estimates the same 1RM as 80 x 8
+    assert _flags(_session([(60, 20), (80, 8), (80, 8)])) == [0, 0, 0]
+
+
+def test_strong_warmups_stay_flagged_and_do_not_set_the_top_weight():
+    marked = _session([(150, 1, "WARM_UP"), (50, 8), (100, 5), (100, 5)])
+    assert _flags(marked) == [1, 1, 0, 0]
+
+
+def test_bodyweight_sets_are_left_alone():
+    pull_ups = _session([(np.nan, 5), (0.0, 8), (np.nan, 8)], exercise="Pull Up")
+    assert _flags(pull_ups) == [0, 0, 0]
+
+
+def test_sessions_are_grouped_by_date_and_exercise():
+    # Interleaved (supersets) and split across days: each session ramps on its own
+    df = pd.concat(
+        [
+            _session([(20, 10), (50, 8)], exercise="Curl"),
+            _session([(60, 10), (100, 5)], exercise="Row"),
+            _session([(50, 8), (50, 8)], exercise="Curl", date="2024-03-06 18:00:00"),
+        ],
+        ignore_index=True,
+    ).iloc[[0, 2, 1, 3, 4, 5]]
+    assert _flags(df.reset_index(drop=True)) == [1, 1, 0, 0, 0, 0]
+
+
+def test_enrichment_flags_ramp_ups_incrementally(import_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+
+    header = sample_csv_bytes.splitlines()[0].decode()
+    new_workout = "\n".join(
+        [header]
+        + [
+            f'"999";"2030-01-07 18:00:00";"Push";"3600";"Bench Press (Barbell)";"{i}";"{w}";"{r}";"";"";"";"";""'
+            for i, (w, r) in enumerate([(40, 10), (70, 5), (100, 5), (100, 5)], 1)
+        ]
+    )
+    import_sets.sync_to_sqlite(BytesIO(new_workout.encode()), db_path=db, incremental=False)
+    process_sets.main(db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        flags = conn.execute(
+            "SELECT e.is_warmup, w.is_warmup FROM workout_sets_enriched e "
+            "JOIN workout_sets w ON w.id = e.id "
+            "WHERE e.date = '2030-01-07 18:00:00' ORDER BY e.set_index"
+        ).fetchall()
+        inferred_before = conn.execute(
+            "SELECT COUNT(*) FROM workout_sets_enriched "
+            "WHERE is_warmup = 1 AND set_order <> -1 AND date < '2030-01-01'"
+        ).fetchone()[0]
+
+    # Enriched rows carry the inferred flag; raw rows keep Strong's own
+    assert flags == [(1, 0), (1, 0), (0, 0), (0, 0)]
+    assert inferred_before > 0
+
+
+def _derived(db):
+    with sqlite3.connect(db) as conn:
+        return [
+            conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+            for table in [
+                "workout_sets_enriched",
+                "weekly_muscle_volume",
+                "exercise_e1rm",
+                "weekly_tonnage",
+            ]
+        ]
+
+
+def test_warmup_rule_change_reinfers_the_whole_history(import_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+    expected = _derived(db)
+
+    # As enriched before inference existed: Strong's flags only, and the
+    # rollup built from them, with no warmup rule recorded
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "UPDATE workout_sets_enriched SET is_warmup = "
+            "(SELECT w.is_warmup FROM workout_sets w WHERE w.id = workout_sets_enriched.id)"
+        )
+        process_sets.refresh_weekly_volume(conn, only_affected=False)
+        conn.execute("DELETE FROM derived_versions WHERE name = 'warmups'")
+    assert _derived(db)[:2] != expected[:2]
+
+    # Nothing new synced: the next run re-infers every workout by itself
+    process_sets.main(db_path=db)
+    assert _derived(db) == expected
+    with sqlite3.connect(db) as conn:
+        assert not process_sets.warmups_outdated(conn)
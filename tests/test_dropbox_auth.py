@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+import dropbox_auth
+
+
+class StubTokenEndpoint(ThreadingHTTPServer):
+    # Local stand-in for https://api.dropboxapi.com/oauth2/token
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _TokenHandler)
+        self.requests = []
+        self.delay = 0.0
+        self.status = 200
+        self.expires_in = 14400
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/oauth2/token"
+
+
+class _TokenHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        server.requests.append((parse_qs(body), self.headers.get("Authorization")))
+        time.sleep(server.delay)
+        if server.status == 200:
+            payload = {
+                "access_token": f"token-{len(server.requests)}",
+                "expires_in": server.expires_in,
+            }
+        else:
+            payload = {"error": "invalid_grant"}
+        data = json.dumps(payload).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = StubTokenEndpoint()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _token_file(tmp_path, expires_at):
+    path = tmp_path / "dropbox_token.json"
+    path.write_text(
+        json.dumps(
+            {
+                "access_token": "token-0",
+                "expires_at": expires_at,
+                "refresh_token": "refresh",
+                "app_key": "key",
+                "app_secret": "secret",
+            }
+        )
+    )
+    return path
+
+
+def _provider(path, endpoint, **kwargs):
+    return dropbox_auth.TokenProvider(token_file=str(path), token_url=endpoint.url, **kwargs)
+
+
+def test_fresh_token_is_served_from_memory(tmp_path, endpoint):
+    path = _token_file(tmp_path, time.time() + 3600)
+    provider = _provider(path, endpoint)
+    assert provider.token() == "token-0"
+
+    path.unlink()
+    assert provider.token() == "token-0"
+    assert endpoint.requests == []
+
+
+def test_concurrent_callers_share_one_refresh(tmp_path, endpoint):
+    path = _token_file(tmp_path, 0)
+    provider = _provider(path, endpoint)
+    endpoint.delay = 0.2
+
+    tokens = []
+    threads = [
+        threading.Thread(target=lambda: tokens.append(provider.token())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ["token-1"] * 8
+    assert len(endpoint.requests) == 1
+    form, auth = endpoint.requests[0]
+    assert form == {"grant_type": ["refresh_token"], "refresh_token": ["refresh"]}
+    assert auth.startswith("Basic ")
+
+    saved = json.loads(path.read_text())
+    assert saved["access_token"] == "token-1"
+    assert saved["expires_at"] > time.time() + 3600
+    assert saved["refresh_token"] == "refresh"
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_refreshes_ahead_of_expiry(tmp_path, endpoint):
+    # Still valid for a minute, but inside the refresh margin
+    path = _token_file(tmp_path, time.time() + 60)
+    provider = _provider(path, endpoint, refresh_margin=300)
+    assert provider.token() == "token-1"
+
+
+def test_token_refreshed_by_another_process_is_reused(tmp_path, endpoint):
+    path = _token_file(tmp_path, 0)
+    provider = _provider(path, endpoint)
+    provider._data = json.loads(path.read_text())
+
+    _token_file(tmp_path, time.time() + 3600)
+    assert provider.token() == "token-0"
+    assert endpoint.requests == []
+
+
+def test_background_refresh_runs_before_callers_need_it(tmp_path, endpoint):
+    path = _token_file(tmp_path, time.time() + 300.2)
+    provider = _provider(path, endpoint, refresh_margin=300)
+    provider.start_background_refresh()
+    try:
+        deadline = time.monotonic() + 5
+        while not endpoint.requests and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(endpoint.requests) == 1
+        # The caller finds the refreshed token already in memory
+        for _ in range(50):
+            if provider._data["access_token"] == "token-1":
+                break
+            time.sleep(0.02)
+        assert provider.token() == "token-1"
+        assert len(endpoint.requests) == 1
+    finally:
+        provider.stop()
+
+
+def test_failed_refresh_raises_and_keeps_file(tmp_path, endpoint):
+    path = _token_file(tmp_path, 0)
+    before = path.read_text()
+    endpoint.status = 400
+    provider = _provider(path, endpoint)
+
+    with pytest.raises(Exception, match="Failed to refresh Dropbox token"):
+        provider.token()
+    assert path.read_text() == before
@@ -0,0 +1,76 @@
+import sqlite3
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import frames
+import parquet_store
+import process_sets
+import queries
+
+N_ROWS = 1_000_000
+
+
+@pytest.fixture(scope="module")
+def history_1m(sample_csv_bytes_module):
+    # A 1M-set enriched history shaped like pd.read_sql output: object strings
+    # and int64 counters, with names drawn from the sample export
+    sample = pd.read_csv(BytesIO(sample_csv_bytes_module), delimiter=";")
+    rng = np.random.default_rng(0)
+    names = rng.choice(sample["Exercise Name"].unique(), N_ROWS)
+    groups = np.array(["Chest", "Back", "Legs", "Delts", "Biceps", "Triceps", None], dtype=object)
+    set_order = rng.choice(np.array([1, 2, 3, 4, -1, "FAILURE"], dtype=object), N_ROWS)
+    return pd.DataFrame(
+        {
+            "id": [f"{i:064x}" for i in range(N_ROWS)],
+            "date": pd.Timestamp("2020-01-01") + pd.to_timedelta(np.arange(N_ROWS) // 12, "h"),
+            "exercise_name": names.astype(object),
+            "set_order": set_order,
+            "set_index": np.arange(N_ROWS) % 12,
+            "is_warmup": (set_order == -1).astype(np.int64),
+            "muscle_group_primary": rng.choice(groups[:-1], N_ROWS),
+            "muscle_group_secondary": rng.choice(groups, N_ROWS),
+        }
+    )
+
+
+def test_compact_shrinks_a_million_set_history(history_1m):
+    before = frames.memory_mb(history_1m)
+    compacted = frames.compact(history_1m.copy())
+    after = frames.memory_mb(compacted)
+
+    assert after * 4 < before, f"{before:.0f} MB -> {after:.0f} MB"
+    assert compacted["exercise_name"].dtype == "category"
+    assert compacted["muscle_group_secondary"].dtype == "category"
+    assert compacted["set_order"].dtype == "int16"
+    assert compacted["set_index"].dtype == "int16"
+    assert compacted["is_warmup"].dtype == "int8"
+    assert not (compacted.dtypes == object).any()
+
+    failures = history_1m["set_order"] == "FAILURE"
+    assert (compacted.loc[failures, "set_order"] == frames.SET_ORDER_CODES["FAILURE"]).all()
+    assert compacted.loc[~failures, "set_order"].tolist() == history_1m.loc[~failures, "set_order"].tolist()
+    assert compacted["muscle_group_secondary"].isna().sum() == history_1m["muscle_group_secondary"].isna().sum()
+
+
+def test_loaders_hand_out_the_same_compact_dtypes(import_sets, sample_csv_bytes, tmp_path):
+    db, root = tmp_path / "sets.db", tmp_path / "parquet"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db, parquet_dir=root)
+
+    with sqlite3.connect(db) as conn:
+        from_sqlite = queries.load_enriched_sets(conn)
+        weekly = queries.load_weekly_volume(conn)
+        raw = pd.read_sql_query("SELECT * FROM workout_sets ORDER BY date, rowid", conn)
+    from_parquet = parquet_store.load_enriched_sets(root, columns=parquet_store.COLUMNS)
+    from_frame = process_sets.enrich(raw)
+
+    expected = from_sqlite.dtypes.astype(str).to_dict()
+    for df in (from_parquet, from_frame):
+        dtypes = df.dtypes.astype(str).to_dict()
+        for col in ["id", "exercise_name", "set_order", "set_index", "is_warmup"]:
+            assert dtypes[col] == expected[col], col
+    assert weekly["muscle_group"].dtype == "category"
+    assert not (from_sqlite.dtypes == object).any()
@@ -0,0 +1,178 @@
+import sqlite3
+from io import BytesIO
+
+
+def _dump(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return [line for line in conn.iterdump() if "workout_sets" in line]
+
+
+def test_bulk_sync_matches_row_by_row(import_sets, sample_csv_bytes, tmp_path):
+    rows_db = tmp_path / "rows.db"
+    bulk_db = tmp_path / "bulk.db"
+
+    n_rows = import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=rows_db, bulk=False)
+    n_bulk = import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=bulk_db)
+
+    assert n_rows == n_bulk > 0
+    assert _dump(rows_db) == _dump(bulk_db)
+
+
+def test_bulk_sync_is_idempotent(import_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    first = import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    second = import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+
+    assert first > 0
+    assert second == 0
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()[0] == first
+
+
+def _exports(sample_csv_bytes, cuts):
+    lines = sample_csv_bytes.split(b"\n")
+    return [b"\n".join(lines[:cut]) for cut in cuts] + [sample_csv_bytes]
+
+
+def _sync_all(import_sets, exports, db, incremental):
+    return [
+        import_sets.sync_to_sqlite(BytesIO(data), db_path=db, incremental=incremental)
+        for data in exports
+    ]
+
+
+def test_incremental_sync_matches_full_resync(import_sets, sample_csv_bytes, tmp_path):
+    exports = _exports(sample_csv_bytes, [200, 3000, 3001, 7000])
+
+    full = _sync_all(import_sets, exports, tmp_path / "full.db", incremental=False)
+    incr = _sync_all(import_sets, exports, tmp_path / "incr.db", incremental=True)
+
+    assert incr == full
+    assert _dump(tmp_path / "incr.db") == _dump(tmp_path / "full.db")
+
+
+def test_incremental_sync_only_parses_tail(import_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    prefix = _exports(sample_csv_bytes, [5000])[0]
+    import_sets.sync_to_sqlite(BytesIO(prefix), db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        state = import_sets.read_sync_state(conn, import_sets.DROPBOX_FILE_PATH)
+    assert state["byte_offset"] == len(prefix)
+
+    tail, _, reason = import_sets.read_new_rows(sample_csv_bytes, state)
+    assert reason is None
+    assert len(tail) == sample_csv_bytes.count(b"\n") + 1 - 5000
+
+
+def test_changed_prefix_falls_back_to_full_resync(import_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    with sqlite3.connect(db) as conn:
+        state = import_sets.read_sync_state(conn, import_sets.DROPBOX_FILE_PATH)
+
+    edited = sample_csv_bytes.replace(b"Hypertrophy 1", b"Hypertrophy X", 1)
+    tail, _, reason = import_sets.read_new_rows(edited, state)
+    assert tail is None
+    assert reason == "prefix changed"
+
+    assert import_sets.sync_to_sqlite(BytesIO(edited), db_path=db) > 0
+
+
+def test_out_of_order_export_falls_back_to_full_resync(
+    import_sets, sample_csv_bytes, tmp_path, caplog
+):
+    lines = sample_csv_bytes.split(b"\n")
+    prefix = b"\n".join(lines[:3000])
+    # Sets appended under an earlier, re-used workout number
+    renumbered = [b'"5"' + line[line.index(b";"):] for line in lines[3000:3010]]
+    edited = b"\n".join([prefix, *renumbered])
+    csv_path = tmp_path / "export.csv"
+    csv_path.write_bytes(edited)
+
+    for name in ["mem.db", "stream.db"]:
+        import_sets.sync_to_sqlite(BytesIO(prefix), db_path=tmp_path / name)
+    with sqlite3.connect(tmp_path / "mem.db") as conn:
+        state = import_sets.read_sync_state(conn, import_sets.DROPBOX_FILE_PATH)
+    tail, _, reason = import_sets.read_new_rows(edited, state)
+    assert tail is None
+    assert reason == "workouts out of order"
+
+    caplog.clear()
+    in_memory = import_sets.sync_to_sqlite(BytesIO(edited), db_path=tmp_path / "mem.db")
+    streamed = import_sets.sync_to_sqlite_streaming(csv_path, db_path=tmp_path / "stream.db")
+    resyncs = [r.getMessage() for r in caplog.records if "Full resync" in r.getMessage()]
+    assert len(resyncs) == 2 and all("workouts out of order" in m for m in resyncs)
+    assert in_memory == streamed == 10
+    assert _dump(tmp_path / "stream.db") == _dump(tmp_path / "mem.db")
+
+
+def test_streaming_sync_matches_in_memory(import_sets, sample_csv_bytes, tmp_path):
+    exports = _exports(sample_csv_bytes, [200, 3000, 7000])
+    csv_path = tmp_path / "export.csv"
+
+    for data in exports:
+        csv_path.write_bytes(data)
+        streamed = import_sets.sync_to_sqlite_streaming(
+            csv_path, db_path=tmp_path / "stream.db", max_memory_mb=1, commit_every=500
+        )
+        in_memory = import_sets.sync_to_sqlite(BytesIO(data), db_path=tmp_path / "mem.db")
+        assert streamed == in_memory
+
+    assert _dump(tmp_path / "stream.db") == _dump(tmp_path / "mem.db")
+    assert import_sets.sync_to_sqlite_streaming(csv_path, db_path=tmp_path / "stream.db") == 0
+    with sqlite3.connect(tmp_path / "stream.db") as s, sqlite3.connect(tmp_path / "mem.db") as m:
+        query = "SELECT * FROM sync_state"
+        assert s.execute(query).fetchall()[0][:-1] == m.execute(query).fetchall()[0][:-1]
+
+
+def test_chunk_rows_respects_memory_ceiling(import_sets):
+    assert import_sets.chunk_rows_for(1, 10_000_000) == import_sets.MIN_CHUNK_ROWS
+    assert import_sets.chunk_rows_for(10_000, 1) == import_sets.MAX_CHUNK_ROWS
+    assert import_sets.chunk_rows_for(64, 1024) == 64 * 1024 // import_sets.CHUNK_OVERHEAD
+
+
+def _app_folder(tmp_path, data):
+    folder = tmp_path / "app"
+    folder.mkdir(exist_ok=True)
+    (folder / "strong_workouts.csv").write_bytes(data)
+    return folder
+
+
+def test_unchanged_export_is_not_downloaded(import_sets, sample_csv_bytes, tmp_path):
+    from local_dropbox import LocalDropbox
+
+    dbx = LocalDropbox(_app_folder(tmp_path, sample_csv_bytes))
+    cache_path = tmp_path / "meta.json"
+
+    csv_io, metadata = import_sets.download_csv(dbx=dbx, cache_path=cache_path)
+    assert csv_io.getvalue() == sample_csv_bytes
+    import_sets.remember_export(metadata, cache_path=cache_path)
+
+    csv_io, _ = import_sets.download_csv(dbx=dbx, cache_path=cache_path)
+    assert csv_io is None
+    assert dbx.calls == {"files_get_metadata": 3, "files_download": 1}
+
+    cache = import_sets.load_metadata_cache(cache_path)
+    assert cache["downloads"] == 1
+    assert cache["downloads_skipped"] == 1
+    assert cache["bytes_avoided"] == len(sample_csv_bytes)
+
+
+def test_export_is_downloaded_until_ingested_or_changed(import_sets, sample_csv_bytes, tmp_path):
+    from local_dropbox import LocalDropbox
+
+    folder = _app_folder(tmp_path, sample_csv_bytes)
+    dbx = LocalDropbox(folder)
+    cache_path = tmp_path / "meta.json"
+
+    # Not remembered (e.g. the sync failed), so the next tick downloads again
+    import_sets.download_csv(dbx=dbx, cache_path=cache_path)
+    csv_io, metadata = import_sets.download_csv(dbx=dbx, cache_path=cache_path)
+    assert csv_io is not None
+    import_sets.remember_export(metadata, cache_path=cache_path)
+
+    (folder / "strong_workouts.csv").write_bytes(sample_csv_bytes + b'\n"999";"x"')
+    csv_io, _ = import_sets.download_csv(dbx=dbx, cache_path=cache_path)
+    assert csv_io is not None
+    assert import_sets.load_metadata_cache(cache_path)["downloads"] == 3
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import bench_import_time  # noqa: E402
+
+
+def test_pipeline_modules_import_without_side_effects(tmp_path):
+    # No token file, .env or network here: importing must still work and stay quiet
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); "
+        f"import {', '.join(bench_import_time.MODULES)}; "
+        f"print([m for m in {bench_import_time.HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code, str(ROOT)],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.strip() == "[]"
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("module", bench_import_time.MODULES)
+def test_import_time_budget(module):
+    total_ms, times = bench_import_time.measure(module)
+    slowest = sorted(times, key=lambda name: times[name][0], reverse=True)[:5]
+    assert total_ms <= bench_import_time.BUDGET_MS, (
+        f"{module}: {total_ms:.1f} ms, slowest {slowest}"
+    )
@@ -0,0 +1,131 @@
+import json
+import logging
+import multiprocessing
+
+import pytest
+
+import instrument
+import log_config
+import run_stats
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def metrics():
+    handler = _Records()
+    logger = logging.getLogger(instrument.METRICS_LOGGER)
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+
+
+def _log_in_child(message):
+    log_config.get_logger("child").info(message)
+
+
+def test_spans_and_counters_are_grouped_into_a_run(metrics):
+    with instrument.run("process_sets"):
+        with instrument.span("enrich") as span:
+            span.rows = 1000
+        instrument.count("inferred_warmups", 3)
+        instrument.count("inferred_warmups")
+
+    span, run = metrics
+    assert span["event"] == "span" and span["span"] == "enrich" and span["rows"] == 1000
+    assert span["rows_per_sec"] > 0
+    assert run["event"] == "run" and run["run"] == span["run"]
+    assert run["status"] == "ok" and run["counters"] == {"inferred_warmups": 4}
+    assert instrument.current_run() is None
+
+
+def test_nested_runs_join_the_outer_one(metrics):
+    with instrument.run("pipeline") as outer:
+        with instrument.run("process_sets") as inner:
+            instrument.record("sync", 0.5, rows=100)
+    assert inner is outer
+    assert [r["script"] for r in metrics] == ["pipeline", "pipeline"]
+    assert metrics[0]["rows_per_sec"] == 200
+
+
+def test_lone_span_gets_its_own_run_and_failures_are_marked(metrics):
+    with pytest.raises(ValueError):
+        with instrument.span("download"):
+            raise ValueError("offline")
+
+    span, run = metrics
+    assert span["run"] == run["run"] and run["script"] == "download"
+    assert run["status"] == "failed"
+
+
+def test_records_reach_the_file_through_the_queue(log_path):
+    logger = log_config.get_logger("pipeline")
+    assert all(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers)
+
+    logger.info("queued, not written")
+    log_config.flush_logs()
+    assert "queued, not written" in log_path.read_text()
+
+
+def test_console_records_go_to_stdout_and_the_file(log_path, capsys):
+    logger = log_config.get_logger("pipeline")
+    logger.info("file only")
+    logger.info("shown too", extra=log_config.CONSOLE)
+    log_config.flush_logs()
+
+    assert capsys.readouterr().out == "shown too\n"
+    text = log_path.read_text()
+    assert "file only" in text and "[pipeline] [INFO] shown too" in text
+
+
+def test_forked_workers_write_directly(log_path):
+    # Pool workers leave through os._exit, so a queue there would never drain
+    child = multiprocessing.get_context("fork").Process(target=_log_in_child, args=("from child",))
+    child.start()
+    child.join()
+    assert "from child" in log_path.read_text()
+
+
+def test_run_stats_summarizes_the_last_runs(log_path, capsys):
+    formatter = logging.Formatter(log_config.LOG_FORMAT, datefmt=log_config.DATE_FORMAT)
+
+    def line(record):
+        message = json.dumps(record) if isinstance(record, dict) else record
+        return formatter.format(logging.makeLogRecord(
+            {"name": "metrics", "levelname": "INFO", "msg": message}
+        ))
+
+    runs = [
+        {"event": "span", "run": "a", "script": "process_sets", "span": "enrich",
+         "seconds": 2.0, "rows": 100, "rows_per_sec": 50.0},
+        {"event": "run", "run": "a", "script": "process_sets", "started": "2026-01-01T00:00:00",
+         "seconds": 2.5, "status": "ok", "counters": {"inferred_warmups": 7}},
+        {"event": "span", "run": "b", "script": "import_sets", "span": "sync",
+         "seconds": 1.0, "rows": 10, "rows_per_sec": 10.0},
+        {"event": "span", "run": "c", "script": "process_sets", "span": "enrich",
+         "seconds": 4.0, "rows": 100, "rows_per_sec": 25.0},
+    ]
+    old = [line(r) for r in runs[:2]]
+    new = [line(r) for r in runs[2:]]
+    (log_path.parent / "pipeline.log.1").write_text("\n".join(old) + "\n")
+    log_path.write_text(
+        "\n".join(new + ["[2026-01-01T00:00:00] [metrics] [INFO] {\"event\": \"sp"]) + "\n"
+    )
+
+    collected = run_stats.collect_runs(run_stats.read_records(run_stats.log_files(log_path)))
+    assert [r["run"] for r in collected] == ["a", "b", "c"]
+    assert collected[2]["status"] == "incomplete"
+
+    shown = run_stats.last_runs(collected, n=2, script="process_sets")
+    assert [r["run"] for r in shown] == ["a", "c"]
+    run_stats.report(shown)
+    out = capsys.readouterr().out
+    assert "inferred_warmups=7" in out
+    assert "enrich" in out and "incomplete" in out
@@ -0,0 +1,121 @@
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from muscle_mapping import (
+    MuscleGroupClassifier,
+    map_exercise_column,
+    map_exercise_to_muscle_groups,
+)
+
+
+# The per-call implementation the compiled classifier replaced, kept verbatim for parity
+def legacy_map_exercise_to_muscle_groups(exercise_name: str):
+    name = re.sub(r"[^a-z ]", "", exercise_name.lower())  # remove non-alpha
+    name = re.sub(r"\s+", " ", name).strip()              # clean spaces
+
+    groups = set()
+
+    if any(term in name for term in ["bench", "press", "dip", "bulgarian pushup", "pushup", "push up", "rto", "ring hold", "pec deck"]) and "leg" not in name and "row" not in name and "overhead" not in name and "shoulder" not in name and "calf" not in name:
+        groups.add("Chest")
+        groups.add("Triceps")
+
+    if any(term in name for term in ["fly", "pec"]) and "rear delt" not in name:
+        groups.add("Chest")
+
+    if any(term in name for term in ["row", "pulldown", "pull up", "pullup", "chinup", "chin up"]):
+        groups.add("Back")
+        groups.add("Biceps")
+
+    if "curl" in name and "hamstring" not in name and "leg" not in name and "tricep" not in name:
+        groups.add("Biceps")
+    if any(term in name for term in ["bicep", "biceps"]):
+        groups.add("Biceps")
+
+    if any(term in name for term in ["triceps", "tricep", "extension", "katana", "cross cable extension", "skullcrusher", "skull crusher", "dumbbell kickback", "kickback", "press"]) and "leg" not in name and "calf" not in name and "overhead" not in name and "shoulder" not in name and not ("back" in name and "kickback" not in name):
+        groups.add("Triceps")
+
+    if any(term in name for term in ["lateral", "overhead", "raise", "face pull", "rear delt", "shoulder"]) and "leg" not in name and "row" not in name and "chest" not in name and "calf" not in name and "unilateral cable fly" not in name:
+        groups.add("Delts")
+
+    if any(term in name for term in ["squat", "lunge", "leg press", "rdl", "deadlift", "hamstring" "leg curl", "leg extension", "hip adductor", "seated leg curl", "lying leg curl", "back extension", "calf"]) and "forearm leg raise" not in name:
+        groups.add("Legs")
+
+    if any(term in name for term in ["crunch", "plank", "rollout", "gar hammer", "l sit", "leg raise"]) or re.search(r"\babs\b", name):  # catches " abs ", avoids "cable abs"
+        groups.add("Abs")
+
+    if any(term in name for term in ["rotator cuff", "band pull", "external rotation", "ytw", "physio", "serratus walks", "pec stretch", "timeout", "trx", "foam", "thoracic", "mobilization"]):
+        groups.add("Rehab")
+        #if in any other group, remove it
+        if "Chest" in groups:
+            groups.remove("Chest")
+        if "Back" in groups:
+            groups.remove("Back")
+        if "Delts" in groups:
+            groups.remove("Delts")
+        if "Legs" in groups:
+            groups.remove("Legs")
+        if "Triceps" in groups:
+            groups.remove("Triceps")
+        if "Biceps" in groups:
+            groups.remove("Biceps")
+        if "Forearms" in groups:
+            groups.remove("Forearms")
+        if "Abs" in groups:
+            groups.remove("Abs")
+
+    if any(term in name for term in ["dead hang", "forearm", "false grip hang"]) and "leg" not in name:
+        groups.add("Forearms")
+
+    return list(groups)
+
+
+EDGE_NAMES = [
+    "Back Extension",
+    "Cable Kickback",
+    "Back Kickback Press",
+    "Overhead Press (Barbell)",
+    "Hanging Leg Raise",
+    "Forearm Leg Raise",
+    "Cable Abs",
+    "Abs Wheel",
+    "Rotator Cuff Row",
+    "TRX Forearm Curl",
+    "Unilateral Cable Fly",
+    "Rear Delt Fly",
+    "Hamstring Curl",
+    "",
+]
+
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent / "strong_workouts.csv"
+
+
+@pytest.fixture(scope="module")
+def distinct_names():
+    names = pd.read_csv(SAMPLE_CSV, delimiter=";")["Exercise Name"].dropna().unique()
+    return sorted(names) + EDGE_NAMES
+
+
+def test_classifier_matches_legacy_for_every_name(distinct_names):
+    for name in distinct_names:
+        assert map_exercise_to_muscle_groups(name) == legacy_map_exercise_to_muscle_groups(name), name
+
+
+def test_map_column_matches_row_by_row_apply(distinct_names):
+    names = pd.Series(distinct_names * 3, name="exercise_name")
+    expected = names.apply(legacy_map_exercise_to_muscle_groups)
+    mapped = map_exercise_column(names)
+    assert mapped.tolist() == expected.tolist()
+    assert mapped.index.equals(names.index)
+
+
+def test_cache_is_bounded_and_reused():
+    classifier = MuscleGroupClassifier(cache_size=2)
+    for name in ["Bench Press", "Bench Press", "Squat", "Deadlift"]:
+        classifier.classify(name)
+    info = classifier.classify.cache_info()
+    assert info.hits == 1
+    assert info.currsize == 2
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import notify
+
+
+def _dispatcher(client, **kwargs):
+    kwargs.setdefault("coalesce_seconds", 0.2)
+    kwargs.setdefault("backoff_seconds", 0.01)
+    return notify.Dispatcher(client=client, **kwargs)
+
+
+def test_burst_is_coalesced_into_one_summary_push(push_client):
+    client = push_client()
+    dispatcher = _dispatcher(client)
+    dispatcher.submit(kind="sync", sets=30, workouts=1)
+    dispatcher.submit(kind="sync", sets=7, workouts=1)
+    dispatcher.submit("Rollup rebuilt")
+    dispatcher.close()
+
+    assert client.sent == [
+        (notify.DEFAULT_TITLE, "Synced 37 set(s) across 2 workout(s)\nRollup rebuilt")
+    ]
+    metrics = dispatcher.metrics()
+    assert metrics["sent"] == 1
+    assert metrics["coalesced"] == 2
+    assert metrics["queue_depth"] == 0
+    assert metrics["latency_ms_last"] is not None
+
+
+def test_titles_are_pushed_separately(push_client):
+    client = push_client()
+    dispatcher = _dispatcher(client)
+    dispatcher.submit("a", title="one")
+    dispatcher.submit("b", title="two")
+    dispatcher.submit("a", title="one")
+    dispatcher.close()
+    assert sorted(client.sent) == [("one", "a"), ("two", "b")]
+
+
+def test_submit_does_not_wait_for_a_slow_endpoint(push_client):
+    gate = threading.Event()
+    client = push_client(gate=gate)
+    dispatcher = _dispatcher(client, coalesce_seconds=0)
+
+    started = time.perf_counter()
+    for i in range(5):
+        assert dispatcher.submit(f"msg {i}")
+    assert time.perf_counter() - started < 0.5
+
+    gate.set()
+    dispatcher.close()
+    assert dispatcher.metrics()["failed"] == 0
+    assert sum(message.count("msg") for _, message in client.sent) == 5
+
+
+def test_full_queue_drops_instead_of_blocking(push_client):
+    gate = threading.Event()
+    dispatcher = _dispatcher(push_client(gate=gate), maxsize=2, coalesce_seconds=0)
+    results = [dispatcher.submit(f"msg {i}") for i in range(10)]
+    assert not all(results)
+    assert dispatcher.metrics()["dropped"] == results.count(False)
+    gate.set()
+    dispatcher.close()
+
+
+def test_failed_push_is_retried_with_backoff(push_client):
+    client = push_client(fail_times=2)
+    dispatcher = _dispatcher(client)
+    dispatcher.submit("hello")
+    dispatcher.close()
+    assert client.sent == [(notify.DEFAULT_TITLE, "hello")]
+    assert dispatcher.metrics()["retries"] == 2
+
+
+def test_gives_up_after_max_attempts(push_client):
+    client = push_client(fail_times=99)
+    dispatcher = _dispatcher(client, max_attempts=3)
+    dispatcher.submit("hello")
+    dispatcher.close()
+    assert client.attempts == 3
+    assert dispatcher.metrics()["failed"] == 1
+
+
+def test_close_flushes_without_waiting_out_the_coalescing_window(push_client):
+    client = push_client()
+    dispatcher = _dispatcher(client, coalesce_seconds=30)
+    dispatcher.submit("bye")
+    started = time.perf_counter()
+    dispatcher.close()
+    assert time.perf_counter() - started < 5
+    assert client.sent == [(notify.DEFAULT_TITLE, "bye")]
+    assert not dispatcher.submit("too late")
@@ -0,0 +1,178 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from io import BytesIO
+
+import pytest
+
+import outbox
+import process_sets
+from local_sink import StubSink
+from setup_db import setup_db
+
+
+@pytest.fixture
+def sink():
+    server = StubSink().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def conn(import_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+    conn = sqlite3.connect(db)
+    setup_db(conn)
+    yield conn
+    conn.close()
+
+
+def _count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def _outbox(conn, sink, **kwargs):
+    kwargs = {"rate": 0, "backoff_seconds": 0.01, **kwargs}
+    return outbox.Outbox(conn, outbox.HttpSink(sink.url), **kwargs)
+
+
+def test_every_enriched_set_is_pushed_once(conn, sink):
+    total = _count(conn, "workout_sets_enriched")
+    metrics = _outbox(conn, sink, batch_size=250, concurrency=3).run()
+
+    assert metrics["sets"] == total
+    assert metrics["batches"] == -(-total // 250)
+    assert sorted(sink.set_ids()) == sorted(
+        i for (i,) in conn.execute("SELECT id FROM workout_sets_enriched")
+    )
+    assert _count(conn, "pushed_set_ids") == total
+    assert _count(conn, "outbox_pending") == 0
+    assert sink.max_in_flight <= 3
+
+    # Nothing left: a second run sends nothing
+    assert _outbox(conn, sink).run()["sets"] == 0
+    assert sink.requests == metrics["batches"]
+
+
+def test_payload_carries_the_set_and_its_load(conn, sink):
+    sent = []
+
+    class Recorder(outbox.Sink):
+        def send(self, batch_id, sets):
+            sent.extend(sets)
+
+    outbox.Outbox(conn, Recorder(), rate=0).run(limit=5)
+    assert len(sent) == 5
+    assert set(sent[0]) == set(outbox.PAYLOAD_KEYS)
+    assert _count(conn, "pushed_set_ids") == 5
+
+
+def test_throttled_and_failing_requests_are_retried(conn, sink):
+    sink.fail_with = [503, 429, 503]
+    metrics = _outbox(conn, sink, batch_size=1000).run()
+
+    assert metrics["retries"] == 3
+    assert metrics["failed_batches"] == 0
+    assert len(sink.set_ids()) == _count(conn, "workout_sets_enriched")
+
+
+def _http_date(delta):
+    return format_datetime(datetime.now(timezone.utc) + delta, usegmt=True)
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert outbox.parse_retry_after("120") == 120.0
+    assert 80 < outbox.parse_retry_after(_http_date(timedelta(seconds=90))) <= 90
+    assert outbox.parse_retry_after(_http_date(timedelta(minutes=-5))) == 0.0
+    assert outbox.parse_retry_after("soon") is None
+    assert outbox.parse_retry_after(None) is None
+
+
+@pytest.mark.parametrize("form", ["seconds", "http-date"])
+def test_retry_after_wait_is_capped(conn, sink, monkeypatch, form):
+    monkeypatch.setattr(outbox, "MAX_BACKOFF_SECONDS", 0.05)
+    sink.fail_with = [429]
+    sink.retry_after = "3600" if form == "seconds" else _http_date(timedelta(hours=1))
+
+    started = time.perf_counter()
+    metrics = _outbox(conn, sink, batch_size=1000).run()
+
+    assert time.perf_counter() - started < 10
+    assert metrics["retries"] == 1
+    assert len(sink.set_ids()) == _count(conn, "workout_sets_enriched")
+
+
+def test_unacknowledged_batch_stays_pending_and_goes_out_next_run(conn, sink):
+    sink.fail_with = [503] * 2
+    first = _outbox(conn, sink, batch_size=1000, concurrency=1, max_attempts=2).run()
+    assert first["failed_batches"] == 1 and first["dead_lettered"] == 0
+    left = _count(conn, "outbox_pending")
+    assert left == 1000
+
+    second = _outbox(conn, sink, batch_size=1000).run()
+    assert second["resent_batches"] == 1
+    assert second["sets"] == left
+    assert _count(conn, "outbox_pending") == 0
+    assert _count(conn, "outbox_batches") == 0
+    assert len(sink.set_ids()) == _count(conn, "workout_sets_enriched")
+
+
+def test_rejected_batch_is_dead_lettered_until_requeued(conn, sink):
+    sink.fail_with = [400]
+    first = _outbox(conn, sink, batch_size=1000, concurrency=1).run()
+    assert first["failed_batches"] == first["dead_lettered"] == 1
+    assert sink.requests - 1 == first["batches"]  # a 400 isn't retried
+
+    requests = sink.requests
+    second = _outbox(conn, sink, batch_size=1000).run()
+    assert second["resent_batches"] == 0 and second["sets"] == 0
+    assert second["dead_letters"] == 1
+    assert sink.requests == requests
+    ((_, n_sets, attempts, error),) = _outbox(conn, sink).dead_letters()
+    assert (n_sets, attempts) == (1000, 1) and "HTTP 400" in error
+
+    box = _outbox(conn, sink, batch_size=1000)
+    assert box.requeue_dead() == 1
+    third = box.run()
+    assert third["resent_batches"] == 1 and third["dead_letters"] == 0
+    assert _count(conn, "outbox_pending") == 0
+    assert len(sink.set_ids()) == _count(conn, "workout_sets_enriched")
+
+
+def test_batch_out_of_attempts_across_runs_is_dead_lettered(conn, sink):
+    kwargs = {"batch_size": 100, "max_attempts": 2, "dead_letter_attempts": 4}
+    sink.fail_with = [503] * 4
+    first = _outbox(conn, sink, **kwargs).run(limit=100)
+    assert first["failed_batches"] == 1 and first["dead_lettered"] == 0
+
+    second = _outbox(conn, sink, **kwargs).run(limit=0)
+    assert second["resent_batches"] == 1 and second["dead_lettered"] == 1
+    assert _outbox(conn, sink, **kwargs).run(limit=0)["resent_batches"] == 0
+    assert sink.requests == 4
+
+
+def test_crash_between_send_and_ack_is_not_sent_twice(conn, sink):
+    # A run that got its batch to the sink, then died before acknowledging it
+    crashed = _outbox(conn, sink, batch_size=500)
+    crashed.find_unpushed()
+    batch_id, _, ids = crashed.claim(0)
+    crashed.sink.send(batch_id, crashed._payload(ids))
+
+    metrics = _outbox(conn, sink, batch_size=500).run()
+    assert metrics["resent_batches"] == 1
+    assert sink.duplicates == 1
+    received = sink.set_ids()
+    assert len(received) == len(set(received)) == _count(conn, "workout_sets_enriched")
+
+
+def test_token_bucket_limits_request_rate(conn, sink):
+    started = time.perf_counter()
+    metrics = _outbox(conn, sink, batch_size=500, concurrency=4, rate=20, burst=1).run()
+    elapsed = time.perf_counter() - started
+
+    # 16 requests at 20/s with no burst: at least 15 refill intervals
+    assert metrics["batches"] == 16
+    assert elapsed >= 15 / 20 * 0.95
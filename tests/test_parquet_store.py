@@ -0,0 +1,113 @@
+import os
+import sqlite3
+from io import BytesIO
+
+import pyarrow as pa
+import pytest
+import pyarrow.parquet as pq
+
+import frames
+import parquet_store
+import process_sets
+
+
+def _prefix(data, n_lines):
+    return b"\n".join(data.split(b"\n")[:n_lines])
+
+
+def _sqlite_rows(db):
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute(
+            "SELECT id, date, exercise_name, set_order, set_index, is_warmup, "
+            "muscle_group_primary, muscle_group_secondary FROM workout_sets_enriched"
+        ).fetchall()
+    codes = frames.SET_ORDER_CODES
+    return sorted((i, d, e, codes.get(o, o), s, w, p, q) for i, d, e, o, s, w, p, q in rows)
+
+
+def _parquet_rows(root):
+    df = parquet_store.load_enriched_sets(root, columns=parquet_store.COLUMNS)
+    df["date"] = df["date"].dt.strftime(parquet_store.DATE_FORMAT)
+    records = df.astype(object).where(df.notna(), None).itertuples(index=False)
+    return sorted(tuple(r) for r in records)
+
+
+def test_sidecar_mirrors_enriched_table(import_sets, sample_csv_bytes, tmp_path):
+    db, root = tmp_path / "sets.db", tmp_path / "parquet"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db, parquet_dir=root)
+
+    assert _parquet_rows(root) == _sqlite_rows(db)
+
+    part = next(root.glob("year=*/month=*/part-0.parquet"))
+    schema = pq.read_schema(part)
+    for name in ["exercise_name", "muscle_group_primary", "muscle_group_secondary"]:
+        assert pa.types.is_dictionary(schema.field(name).type)
+
+    # Partition filters read only the matching months
+    year = int(part.parent.parent.name.split("=")[1])
+    df = parquet_store.load_enriched_sets(root, filters=[("year", "=", year)])
+    assert len(df) and set(df["year"].astype(int)) == {year}
+
+
+def test_incremental_export_rewrites_only_affected_months(
+    import_sets, sample_csv_bytes, tmp_path
+):
+    db, root = tmp_path / "sets.db", tmp_path / "parquet"
+    import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, 3000)), db_path=db)
+    process_sets.main(db_path=db, parquet_dir=root)
+    first = min(root.glob("year=*/month=*/part-0.parquet"))
+    stamp = os.stat(first).st_mtime_ns
+
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db, parquet_dir=root)
+
+    assert os.stat(first).st_mtime_ns == stamp
+    assert _parquet_rows(root) == _sqlite_rows(db)
+
+
+def test_missing_sidecar_is_written_in_full(import_sets, sample_csv_bytes, tmp_path):
+    db, root = tmp_path / "sets.db", tmp_path / "parquet"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+
+    # Nothing new to enrich, but the sidecar doesn't exist yet
+    process_sets.main(db_path=db, parquet_dir=root)
+    assert _parquet_rows(root) == _sqlite_rows(db)
+
+
+def test_full_export_replaces_only_the_partitions(import_sets, sample_csv_bytes, tmp_path):
+    db, root = tmp_path / "sets.db", tmp_path / "parquet"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db, parquet_dir=root)
+    notes = root / "NOTES.txt"
+    notes.write_text("not ours")
+    stale = root / "year=1999" / "month=1" / parquet_store.PART_NAME
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b"")
+
+    process_sets.main(db_path=db, parquet_dir=root, full=True)
+
+    assert notes.read_text() == "not ours"
+    assert not stale.parent.parent.exists()
+    assert _parquet_rows(root) == _sqlite_rows(db)
+    assert not list(tmp_path.glob(".parquet-*"))
+
+
+def test_failed_full_export_keeps_the_old_store(
+    import_sets, sample_csv_bytes, tmp_path, monkeypatch
+):
+    db, root = tmp_path / "sets.db", tmp_path / "parquet"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db, parquet_dir=root)
+    before = _parquet_rows(root)
+
+    def broken(conn, year, month):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(parquet_store, "_month_table", broken)
+    with sqlite3.connect(db) as conn, pytest.raises(OSError):
+        parquet_store.write_enriched(conn, str(root))
+
+    assert _parquet_rows(root) == before
+    assert not list(tmp_path.glob(".parquet-*"))
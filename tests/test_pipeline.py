@@ -0,0 +1,178 @@
+import importlib
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from local_dropbox import LocalDropbox
+
+
+@pytest.fixture
+def pipeline():
+    return importlib.import_module("pipeline")
+
+
+def _app_folder(tmp_path, data):
+    folder = tmp_path / "app"
+    folder.mkdir(exist_ok=True)
+    (folder / "strong_workouts.csv").write_bytes(data)
+    return folder
+
+
+def _counts(conn):
+    return [
+        conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("workout_sets", "workout_sets_enriched", "weekly_muscle_volume")
+    ]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_once_fills_every_stage_on_one_connection(
+    pipeline, tmp_path, sample_csv_bytes, stream
+):
+    folder = _app_folder(tmp_path, sample_csv_bytes)
+    conn = pipeline.connect(tmp_path / "sets.db")
+    runner = pipeline.Pipeline(
+        conn,
+        dbx=LocalDropbox(folder),
+        stream=stream,
+        cache_path=tmp_path / "meta.json",
+        parquet_dir=tmp_path / "parquet",
+    )
+
+    timings = runner.run_once()
+    assert list(timings) == pipeline.STAGES
+    raw, enriched, rollup = _counts(conn)
+    assert raw == enriched > 0 and rollup > 0
+
+    # Unchanged export: only the metadata check runs
+    assert list(runner.run_once()) == ["download"]
+    conn.close()
+
+
+def test_run_once_matches_separate_scripts(pipeline, import_sets, tmp_path, sample_csv_bytes):
+    from io import BytesIO
+
+    import process_sets
+
+    db = tmp_path / "scripts.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+
+    conn = pipeline.connect(tmp_path / "pipeline.db")
+    folder = _app_folder(tmp_path, sample_csv_bytes)
+    pipeline.Pipeline(conn, dbx=LocalDropbox(folder), cache_path=tmp_path / "m.json").run_once()
+
+    with sqlite3.connect(db) as expected:
+        for table in (
+            "workout_sets_enriched",
+            "weekly_muscle_volume",
+            "exercise_e1rm",
+            "weekly_tonnage",
+        ):
+            query = f"SELECT * FROM {table} ORDER BY 1, 2"
+            assert conn.execute(query).fetchall() == expected.execute(query).fetchall()
+    conn.close()
+
+
+def test_new_export_rows_flow_through_to_rollup(pipeline, tmp_path, sample_csv_bytes):
+    lines = sample_csv_bytes.splitlines(keepends=True)
+    folder = _app_folder(tmp_path, b"".join(lines[:-50]))
+    conn = pipeline.connect(tmp_path / "sets.db")
+    runner = pipeline.Pipeline(conn, dbx=LocalDropbox(folder), cache_path=tmp_path / "m.json")
+    runner.run_once()
+    before = _counts(conn)
+
+    (folder / "strong_workouts.csv").write_bytes(sample_csv_bytes)
+    timings = runner.run_once()
+    assert "ingest" in timings and "enrich" in timings
+    after = _counts(conn)
+    assert after[0] > before[0]
+    assert after[0] == after[1]
+    conn.close()
+
+
+def test_wait_for_change_wakes_on_file_change(pipeline, tmp_path):
+    path = tmp_path / "strong_workouts.csv"
+    path.write_text("a")
+    stamp = pipeline._mtime(path)
+    stop = threading.Event()
+
+    assert pipeline.wait_for_change(path, stamp, 0.1, stop, poll=0.01) is False
+
+    timer = threading.Timer(0.05, lambda: path.write_text("ab"))
+    timer.start()
+    started = time.monotonic()
+    assert pipeline.wait_for_change(path, stamp, 10, stop, poll=0.01) is True
+    assert time.monotonic() - started < 5
+    timer.join()
+
+
+def test_watch_survives_failed_run_and_stops(pipeline, tmp_path, monkeypatch):
+    conn = pipeline.connect(tmp_path / "sets.db")
+    runner = pipeline.Pipeline(conn)
+    stop = threading.Event()
+    calls = []
+
+    def flaky(force=False, full=False):
+        calls.append(force)
+        if len(calls) == 1:
+            raise RuntimeError("dropbox down")
+        stop.set()
+
+    monkeypatch.setattr(runner, "run_once", flaky)
+    runner.watch(interval=0, stop=stop, force=True)
+    assert calls == [True, True]
+    conn.close()
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test_new_sets_queue_one_sync_summary(pipeline, tmp_path, sample_csv_bytes, push_client, full):
+    import notify
+
+    client = push_client()
+    notifier = notify.Dispatcher(client=client, coalesce_seconds=0)
+    folder = _app_folder(tmp_path, sample_csv_bytes)
+    conn = pipeline.connect(tmp_path / "sets.db")
+    runner = pipeline.Pipeline(
+        conn, dbx=LocalDropbox(folder), cache_path=tmp_path / "m.json", notifier=notifier
+    )
+    runner.run_once(full=full)
+    runner.run_once(full=full)
+    notifier.close()
+
+    (raw,) = conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()
+    (dates,) = conn.execute("SELECT COUNT(DISTINCT date) FROM workout_sets").fetchone()
+    assert client.sent == [
+        (notify.DEFAULT_TITLE, f"Synced {raw} set(s) across {dates} workout(s)")
+    ]
+    conn.close()
+
+
+def test_sync_summary_counts_only_the_new_workouts(
+    pipeline, tmp_path, sample_csv_bytes, push_client
+):
+    import notify
+
+    client = push_client()
+    notifier = notify.Dispatcher(client=client, coalesce_seconds=0)
+    lines = sample_csv_bytes.splitlines(keepends=True)
+    folder = _app_folder(tmp_path, b"".join(lines[:-50]))
+    conn = pipeline.connect(tmp_path / "sets.db")
+    runner = pipeline.Pipeline(conn, dbx=LocalDropbox(folder), cache_path=tmp_path / "m.json")
+    runner.run_once()
+    # A workout deleted in Strong makes its date an orphan for the enrich stage
+    conn.execute("DELETE FROM workout_sets WHERE date = (SELECT MIN(date) FROM workout_sets)")
+    conn.commit()
+
+    runner.notifier = notifier
+    (folder / "strong_workouts.csv").write_bytes(sample_csv_bytes)
+    runner.run_once()
+    notifier.close()
+
+    # Column 2 of Strong's export is the workout's date
+    new_dates = {line.split(b";")[1] for line in lines[-50:]}
+    ((_, message),) = client.sent
+    assert message == f"Synced 50 set(s) across {len(new_dates)} workout(s)"
+    conn.close()
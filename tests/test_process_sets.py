@@ -0,0 +1,172 @@
+import sqlite3
+from io import BytesIO
+
+import pytest
+
+import frames
+
+
+@pytest.fixture
+def process_sets():
+    import process_sets
+
+    return process_sets
+
+
+def _enriched(db):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT * FROM workout_sets_enriched ORDER BY id").fetchall()
+
+
+def _prefix(data, n_lines):
+    return b"\n".join(data.split(b"\n")[:n_lines])
+
+
+def test_incremental_enrichment_matches_full_rebuild(
+    import_sets, process_sets, sample_csv_bytes, tmp_path
+):
+    incr_db = tmp_path / "incr.db"
+    for data in [_prefix(sample_csv_bytes, 4000), sample_csv_bytes]:
+        import_sets.sync_to_sqlite(BytesIO(data), db_path=incr_db)
+        process_sets.main(db_path=incr_db)
+
+    full_db = tmp_path / "full.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=full_db)
+    process_sets.main(full=True, db_path=full_db)
+
+    assert _enriched(incr_db) == _enriched(full_db)
+
+
+def test_incremental_enrichment_only_touches_new_dates(
+    import_sets, process_sets, sample_csv_bytes, tmp_path
+):
+    db = tmp_path / "sets.db"
+    synced = import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, 4000)), db_path=db)
+    assert process_sets.main(db_path=db) == synced
+    assert process_sets.main(db_path=db) == 0
+
+    # New sets re-enrich their whole workouts, not the history
+    with sqlite3.connect(db) as conn:
+        last_date = conn.execute("SELECT MAX(date) FROM workout_sets").fetchone()[0]
+    import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, 4010)), db_path=db)
+    with sqlite3.connect(db) as conn:
+        touched = conn.execute(
+            "SELECT COUNT(*) FROM workout_sets WHERE date >= ?", (last_date,)
+        ).fetchone()[0]
+    assert process_sets.main(db_path=db) == touched < 100
+
+
+def test_orphaned_enriched_rows_are_removed(import_sets, process_sets, sample_csv_bytes, tmp_path):
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, 500)), db_path=db)
+    process_sets.main(db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM workout_sets WHERE rowid = 1")
+    process_sets.main(db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        raw = conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()[0]
+    assert len(_enriched(db)) == raw
+
+
+def test_sql_enrichment_matches_frame_enrich(import_sets, process_sets, sample_csv_bytes, tmp_path):
+    import pandas as pd
+
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+
+    with sqlite3.connect(db) as conn:
+        raw = pd.read_sql_query("SELECT * FROM workout_sets ORDER BY date ASC, rowid ASC", conn)
+    out = process_sets.enrich(raw).astype(object)
+    expected = sorted(out.where(out.notna(), None).itertuples(index=False, name=None))
+    # The frame encodes FAILURE set orders as small ints, like WARM_UP's -1
+    codes = frames.SET_ORDER_CODES
+    stored = [(*row[:3], codes.get(row[3], row[3]), *row[4:]) for row in _enriched(db)]
+    assert stored == expected
+
+
+def test_rule_change_remaps_only_changed_exercises(
+    import_sets, process_sets, sample_csv_bytes, tmp_path, monkeypatch
+):
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, 2000)), db_path=db)
+    process_sets.main(db_path=db)
+    before = {row[0]: row for row in _enriched(db)}
+
+    real = process_sets.classify_exercise
+
+    def new_rules(name):
+        return ("Legs", "Legs", None) if name == "Push Up" else real(name)
+
+    monkeypatch.setattr(process_sets, "classify_exercise", new_rules)
+    monkeypatch.setattr(process_sets, "rule_version", lambda: "next")
+
+    with sqlite3.connect(db) as conn:
+        changed = process_sets.sync_muscle_map(conn)
+        assert changed == ["Push Up"]
+        assert process_sets.apply_remapped(conn, changed) > 0
+        versions = conn.execute("SELECT DISTINCT rule_version FROM exercise_muscle_map").fetchall()
+    assert versions == [("next",)]
+
+    for row in _enriched(db):
+        if row[2] == "Push Up":
+            assert row[6:] == ("Legs", None)
+        else:
+            assert row == before[row[0]]
+
+
+def _dashboard_weekly(db):
+    # The aggregation app.py used to run over every enriched set
+    import pandas as pd
+
+    with sqlite3.connect(db) as conn:
+        df = pd.read_sql(
+            """
+            SELECT date(date) AS day, muscle_group_primary AS muscle_group,
+                muscle_group_secondary
+            FROM workout_sets_enriched
+            WHERE is_warmup = 0
+              AND (muscle_group IS NULL OR muscle_group != 'Rehab')
+            """,
+            conn,
+            parse_dates=["day"],
+        )
+    df["week_start"] = df["day"] - pd.to_timedelta(df["day"].dt.weekday, unit="d")
+    primary = df.loc[df["muscle_group"].notna(), ["week_start", "muscle_group"]].copy()
+    primary["weight"] = 1.0
+    secondary = df.loc[
+        df["muscle_group_secondary"].notna(), ["week_start", "muscle_group_secondary"]
+    ].rename(columns={"muscle_group_secondary": "muscle_group"})
+    secondary["weight"] = 0.5
+    weighted = pd.concat([primary, secondary], ignore_index=True)
+    weekly = weighted.groupby(["week_start", "muscle_group"], as_index=False)["weight"].sum()
+    return sorted(
+        (ts.strftime("%Y-%m-%d"), group, volume)
+        for ts, group, volume in weekly.itertuples(index=False, name=None)
+    )
+
+
+def _rollup(db):
+    with sqlite3.connect(db) as conn:
+        return conn.execute(
+            "SELECT week_start, muscle_group, volume FROM weekly_muscle_volume "
+            "ORDER BY week_start, muscle_group"
+        ).fetchall()
+
+
+def test_weekly_rollup_matches_dashboard_aggregation(
+    import_sets, process_sets, sample_csv_bytes, tmp_path
+):
+    db = tmp_path / "sets.db"
+    for n_lines in [1500, 1510, 6000]:
+        import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, n_lines)), db_path=db)
+        process_sets.main(db_path=db)
+        assert _rollup(db) == _dashboard_weekly(db)
+
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+    incremental = _rollup(db)
+    process_sets.main(full=True, db_path=db)
+    assert incremental == _rollup(db) == _dashboard_weekly(db)
@@ -0,0 +1,65 @@
+import sqlite3
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import queries
+
+
+@pytest.fixture
+def enriched_db(import_sets, sample_csv_bytes, tmp_path):
+    import process_sets
+
+    db = tmp_path / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=db)
+    process_sets.main(db_path=db)
+    return db
+
+
+def test_live_aggregation_matches_rollup(enriched_db):
+    with sqlite3.connect(enriched_db) as conn:
+        from_rollup = queries.load_weekly_volume(conn)
+        conn.execute(f"DROP TABLE {queries.ROLLUP_TABLE}")
+        live = queries.load_weekly_volume(conn)
+
+    key = ["week_start", "muscle_group"]
+    assert not live.empty
+    assert live.sort_values(key).reset_index(drop=True).equals(
+        from_rollup.sort_values(key).reset_index(drop=True)
+    )
+
+
+def test_since_filter_keeps_whole_weeks(enriched_db):
+    with sqlite3.connect(enriched_db) as conn:
+        everything = queries.load_weekly_volume(conn)
+        week = everything["week_start"].iloc[len(everything) // 2]
+        # Mid-week cutoff: that week's Monday must still be included
+        since = (week + pd.Timedelta(days=2)).strftime("%Y-%m-%d")
+        recent = queries.load_weekly_volume(conn, since=since)
+        conn.execute(f"DROP TABLE {queries.ROLLUP_TABLE}")
+        live_recent = queries.load_weekly_volume(conn, since=since)
+
+    assert recent["week_start"].min() == week
+    assert recent.equals(everything[everything["week_start"] >= week].reset_index(drop=True))
+    key = ["week_start", "muscle_group"]
+    assert live_recent.sort_values(key).reset_index(drop=True).equals(
+        recent.sort_values(key).reset_index(drop=True)
+    )
+
+
+def test_empty_database_gives_empty_frame(tmp_path):
+    with sqlite3.connect(tmp_path / "empty.db") as conn:
+        weekly = queries.load_weekly_volume(conn)
+    assert weekly.empty
+    assert list(weekly.columns) == ["week_start", "muscle_group", "volume"]
+
+
+def test_aggregation_searches_an_index(enriched_db):
+    with sqlite3.connect(enriched_db) as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN " + queries.weekly_volume_sql(since="x"), {"since": "2025-01-01"}
+        ).fetchall()
+    details = [row[-1] for row in plan]
+    assert not any(detail.startswith("SCAN e") for detail in details)
+    assert any("USING INDEX idx_enriched_" in detail for detail in details)
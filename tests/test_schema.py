@@ -0,0 +1,241 @@
+import sqlite3
+from io import BytesIO
+
+import pytest
+
+import process_sets
+import queries
+import schema
+import strength
+
+
+@pytest.fixture(scope="module")
+def synced_db(tmp_path_factory, sample_csv_bytes_module):
+    import import_sets
+
+    db = tmp_path_factory.mktemp("schema") / "sets.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes_module), db_path=db)
+    process_sets.main(db_path=db)
+    with sqlite3.connect(db) as conn:
+        conn.execute("ANALYZE")
+    return db
+
+
+# Queries that run on every sync, enrichment or dashboard load
+HOT_QUERIES = {
+    "dashboard rollup": (
+        f"SELECT week_start, muscle_group, volume FROM {queries.ROLLUP_TABLE} "
+        "WHERE week_start >= date(:since, 'weekday 0', '-6 days') ORDER BY week_start",
+        {"since": "2025-01-01"},
+    ),
+    "live weekly aggregation": (queries.weekly_volume_sql(since="x"), {"since": "2025-01-01"}),
+    "today's sets": (
+        "SELECT * FROM workout_sets WHERE DATE(date) = DATE('now', 'localtime') ORDER BY date ASC",
+        {},
+    ),
+    "distinct exercises": ("SELECT DISTINCT exercise_name FROM workout_sets", {}),
+    "enrich affected dates": (
+        f"{process_sets.ENRICH_SELECT} WHERE w.date IN (SELECT date FROM {process_sets.AFFECTED_TABLE})",
+        {},
+    ),
+    "rollup refresh": (
+        process_sets.weekly_volume_sql(weeks_table=process_sets.AFFECTED_WEEKS_TABLE),
+        {},
+    ),
+    "remapped exercise": (
+        f"SELECT id FROM {schema.ENRICHED_TABLE} WHERE exercise_name IN ('Push Up')",
+        {},
+    ),
+    "strength tail": (strength.E1RM_TAIL_SQL, {}),
+    "e1rm chart": (
+        f"SELECT date, e1rm, best_e1rm FROM {schema.E1RM_TABLE} "
+        "WHERE exercise_name = 'Squat' ORDER BY date",
+        {},
+    ),
+    "recent PRs": (
+        f"SELECT date, exercise_name FROM {schema.E1RM_TABLE} "
+        "WHERE is_pr = 1 ORDER BY date DESC LIMIT 10",
+        {},
+    ),
+    "total weekly tonnage": (
+        f"SELECT week_start, SUM(tonnage) FROM {schema.TONNAGE_TABLE} GROUP BY week_start",
+        {},
+    ),
+}
+
+
+def _table_scans(conn, sql, params):
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    persistent = {
+        name
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    } | {"w", "e", "m"}
+    scans = []
+    for *_, detail in plan:
+        # An automatic index is built by scanning the table on every run
+        if "AUTOMATIC" in detail:
+            scans.append(detail)
+        elif detail.startswith("SCAN ") and "INDEX" not in detail:
+            if detail.split()[1] in persistent:
+                scans.append(detail)
+    return scans
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_avoids_full_table_scan(synced_db, name):
+    sql, params = HOT_QUERIES[name]
+    with sqlite3.connect(synced_db) as conn:
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {process_sets.AFFECTED_TABLE.split('.')[1]} (date TEXT)")
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {process_sets.AFFECTED_WEEKS_TABLE.split('.')[1]} (week_start TEXT)")
+        strength.find_tails(conn, process_sets.AFFECTED_TABLE)
+        strength.collect_sets(conn)
+        assert _table_scans(conn, sql, params) == []
+
+
+def test_migrate_sets_user_version_and_is_idempotent(tmp_path):
+    with sqlite3.connect(tmp_path / "fresh.db") as conn:
+        assert schema.migrate(conn) == schema.SCHEMA_VERSION
+        assert schema.schema_version(conn) == schema.SCHEMA_VERSION
+        indexes = {
+            name
+            for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        assert set(schema.INDEXES) <= indexes
+        assert schema.migrate(conn) == schema.SCHEMA_VERSION
+
+
+def test_migration_retires_superseded_index(tmp_path):
+    with sqlite3.connect(tmp_path / "old.db") as conn:
+        schema.create_tables(conn)
+        conn.execute(
+            f"CREATE INDEX idx_enriched_warmup_primary ON {schema.ENRICHED_TABLE} "
+            "(is_warmup, muscle_group_primary)"
+        )
+        conn.execute("PRAGMA user_version = 1")
+        schema.migrate(conn)
+        names = {name for (name,) in conn.execute("SELECT name FROM sqlite_master")}
+    assert "idx_enriched_warmup_primary" not in names
+    assert "idx_enriched_weekly" in names
+    assert "sqlite_stat1" in names
+
+
+LEGACY_WORKOUT_SETS_SQL = """
+    CREATE TABLE workout_sets (
+        id TEXT PRIMARY KEY, date TEXT, workout_name TEXT, duration TEXT,
+        exercise_name TEXT, set_order INTEGER, is_warmup INTEGER, weight REAL,
+        reps INTEGER, distance REAL, seconds INTEGER, notes TEXT,
+        workout_notes TEXT, rpe REAL
+    )
+"""
+
+
+def _legacy_db(path, n_rows):
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_WORKOUT_SETS_SQL)
+    conn.executemany(
+        "INSERT INTO workout_sets (id, date, exercise_name, set_order, is_warmup) "
+        "VALUES (?, ?, 'Squat', ?, 0)",
+        [(f"id{i}", f"2024-01-{i % 28 + 1:02d} 10:00:00", -1 if i % 3 else 1) for i in range(n_rows)],
+    )
+    # Leave gaps so copying by rowid has to follow the real ids
+    conn.execute("DELETE FROM workout_sets WHERE rowid % 7 = 0")
+    conn.commit()
+    return conn
+
+
+def _rows(conn):
+    return conn.execute(
+        "SELECT rowid, id, date, set_order, is_warmup FROM workout_sets ORDER BY rowid"
+    ).fetchall()
+
+
+def test_legacy_table_gets_generated_warmup_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(schema, "MIGRATION_BATCH_ROWS", 50)
+    conn = _legacy_db(tmp_path / "legacy.db", 500)
+    before = conn.execute(
+        "SELECT rowid, id, date, set_order FROM workout_sets ORDER BY rowid"
+    ).fetchall()
+
+    schema.migrate(conn)
+
+    after = _rows(conn)
+    assert [r[:4] for r in after] == before
+    assert all(r[4] == (r[3] == -1) for r in after)
+    assert schema._has_generated_warmup(conn)
+    names = {name for (name,) in conn.execute("SELECT name FROM sqlite_master")}
+    assert "workout_sets_new" not in names
+    assert set(schema.INDEXES) <= names
+    assert not conn.execute("SELECT * FROM schema_migration_progress").fetchall()
+    conn.close()
+
+
+def test_db_already_at_v2_still_gets_the_warmup_rebuild(tmp_path):
+    # v2 (query indexes) shipped before the rebuild step existed
+    conn = _legacy_db(tmp_path / "v2.db", 100)
+    schema.create_tables(conn)
+    schema._v2_indexes(conn)
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+
+    schema.migrate(conn)
+    assert schema._has_generated_warmup(conn)
+    raw_indexes = {
+        name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+            (schema.RAW_TABLE,),
+        )
+    }
+    assert {n for n, (t, _) in schema.INDEXES.items() if t == schema.RAW_TABLE} <= raw_indexes
+    conn.close()
+
+
+def test_interrupted_rebuild_resumes_where_it_stopped(tmp_path, monkeypatch):
+    monkeypatch.setattr(schema, "MIGRATION_BATCH_ROWS", 50)
+    conn = _legacy_db(tmp_path / "legacy.db", 500)
+    expected = conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()[0]
+
+    copy_batch = schema._copy_batch
+    calls = []
+    fail = [True]
+
+    def flaky_copy(conn, target, after_rowid, limit=None):
+        calls.append(after_rowid)
+        if fail[0] and len(calls) == 4:
+            raise sqlite3.OperationalError("disk I/O error")
+        return copy_batch(conn, target, after_rowid, limit)
+
+    monkeypatch.setattr(schema, "_copy_batch", flaky_copy)
+    with pytest.raises(sqlite3.OperationalError):
+        schema.migrate(conn)
+    assert schema.schema_version(conn) == 2
+    (resume_from,) = conn.execute(
+        "SELECT last_rowid FROM schema_migration_progress WHERE version = 3"
+    ).fetchone()
+    assert resume_from == calls[-1] > 0
+
+    # Sets imported between runs are still carried over
+    conn.execute(
+        "INSERT INTO workout_sets (id, date, set_order, is_warmup) "
+        "VALUES ('late', '2024-02-01 10:00:00', 1, 0)"
+    )
+    conn.commit()
+
+    calls.clear()
+    fail[0] = False
+    schema.migrate(conn)
+    assert calls[0] == resume_from
+    assert schema.schema_version(conn) == schema.SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()[0] == expected + 1
+    conn.close()
+
+
+def test_setup_db_on_current_db_only_reads_user_version(tmp_path):
+    from setup_db import setup_db
+
+    with sqlite3.connect(tmp_path / "current.db") as conn:
+        setup_db(conn)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        setup_db(conn)
+    assert not [s for s in statements if "sqlite_master" in s or "table_xinfo" in s]
+    assert [s for s in statements if not s.startswith("PRAGMA")] == []
@@ -0,0 +1,207 @@
+import sqlite3
+from io import BytesIO
+
+import pytest
+
+import process_sets
+import queries
+import schema
+import strength
+from setup_db import setup_db
+
+
+def _prefix(data, n_lines):
+    return b"\n".join(data.split(b"\n")[:n_lines])
+
+
+def _tables(db):
+    with sqlite3.connect(db) as conn:
+        return [
+            conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+            for table in (strength.E1RM_TABLE, strength.TONNAGE_TABLE)
+        ]
+
+
+@pytest.fixture
+def sets_db(tmp_path):
+    db = tmp_path / "sets.db"
+    with sqlite3.connect(db) as conn:
+        setup_db(conn)
+    return db
+
+
+def _add_workout(db, date, sets):
+    # sets: (exercise, weight, reps); ids are unique per date and position
+    with sqlite3.connect(db) as conn:
+        conn.executemany(
+            "INSERT INTO workout_sets (id, date, exercise_name, set_order, weight, reps) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"{date}-{i}", date, name, i + 1, w, r) for i, (name, w, r) in enumerate(sets)],
+        )
+
+
+def _e1rm_rows(db, exercise):
+    with sqlite3.connect(db) as conn:
+        return conn.execute(
+            f"SELECT date, best_e1rm, is_pr, pr_count FROM {strength.E1RM_TABLE} "
+            "WHERE exercise_name = ? ORDER BY date",
+            (exercise,),
+        ).fetchall()
+
+
+def test_incremental_strength_matches_full_rebuild(import_sets, sample_csv_bytes, tmp_path):
+    incr_db = tmp_path / "incr.db"
+    for n_lines in [3000, 3010, None]:
+        data = sample_csv_bytes if n_lines is None else _prefix(sample_csv_bytes, n_lines)
+        import_sets.sync_to_sqlite(BytesIO(data), db_path=incr_db)
+        process_sets.main(db_path=incr_db)
+
+    full_db = tmp_path / "full.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=full_db)
+    process_sets.main(full=True, db_path=full_db)
+
+    e1rm, tonnage = _tables(incr_db)
+    assert e1rm and tonnage
+    assert [e1rm, tonnage] == _tables(full_db)
+
+
+def _as_upgraded(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute(f"DELETE FROM {strength.E1RM_TABLE}")
+        conn.execute(f"DELETE FROM {strength.TONNAGE_TABLE}")
+        conn.execute(f"DROP TABLE {schema.DERIVED_TABLE}")
+        conn.execute("PRAGMA user_version = 6")
+
+
+def test_upgraded_db_backfills_the_strength_tables(import_sets, sample_csv_bytes, tmp_path):
+    upgraded_db = tmp_path / "upgraded.db"
+    import_sets.sync_to_sqlite(BytesIO(_prefix(sample_csv_bytes, 3000)), db_path=upgraded_db)
+    process_sets.main(db_path=upgraded_db)
+    # As left by a v4 database after the v5 migration: tables there, rows
+    # not, and no record of a strength build
+    _as_upgraded(upgraded_db)
+
+    # Nothing new synced: the next run still fills them
+    process_sets.main(db_path=upgraded_db)
+    assert all(_tables(upgraded_db))
+
+    _as_upgraded(upgraded_db)
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=upgraded_db)
+    process_sets.main(db_path=upgraded_db)
+
+    fresh_db = tmp_path / "fresh.db"
+    import_sets.sync_to_sqlite(BytesIO(sample_csv_bytes), db_path=fresh_db)
+    process_sets.main(db_path=fresh_db)
+    assert _tables(upgraded_db) == _tables(fresh_db)
+
+
+def test_history_without_loaded_sets_is_backfilled_once(sets_db, monkeypatch):
+    _add_workout(sets_db, "2024-03-04 18:00:00", [("Push Up", 0, 20), ("Plank", 0, 0)])
+    process_sets.main(db_path=sets_db)
+
+    with sqlite3.connect(sets_db) as conn:
+        assert conn.execute(f"SELECT COUNT(*) FROM {strength.E1RM_TABLE}").fetchone()[0] == 0
+        assert not strength.needs_backfill(conn)
+    refreshed = []
+    monkeypatch.setattr(process_sets, "refresh_strength", lambda *a: refreshed.append(a))
+    process_sets.main(db_path=sets_db)
+    assert refreshed == []
+
+
+def test_running_record_and_pr_count(sets_db):
+    # e1RM 120, 110, 126: the second workout isn't a PR, the third is
+    _add_workout(sets_db, "2024-03-04 18:00:00", [("Squat", 90, 10), ("Squat", 100, 5)])
+    _add_workout(sets_db, "2024-03-06 18:00:00", [("Squat", 100, 3)])
+    _add_workout(sets_db, "2024-03-08 18:00:00", [("Squat", 105, 6)])
+    process_sets.main(db_path=sets_db)
+
+    assert _e1rm_rows(sets_db, "Squat") == [
+        ("2024-03-04 18:00:00", 120.0, 1, 1),
+        ("2024-03-06 18:00:00", 120.0, 0, 1),
+        ("2024-03-08 18:00:00", 126.0, 1, 2),
+    ]
+    with sqlite3.connect(sets_db) as conn:
+        assert conn.execute(
+            f"SELECT week_start, tonnage, sets FROM {strength.TONNAGE_TABLE}"
+        ).fetchall() == [("2024-03-04", 900 + 500 + 300 + 630, 4)]
+
+
+def test_warmups_and_unloaded_sets_are_left_out(sets_db):
+    _add_workout(
+        sets_db,
+        "2024-03-04 18:00:00",
+        [("Bench", 40, 10), ("Bench", 100, 5), ("Pull Up", None, 8), ("Pull Up", 0, 8)],
+    )
+    process_sets.main(db_path=sets_db)
+
+    with sqlite3.connect(sets_db) as conn:
+        tonnage = conn.execute(
+            f"SELECT exercise_name, tonnage, sets FROM {strength.TONNAGE_TABLE}"
+        ).fetchall()
+    # 40 x 10 is an inferred ramp-up set; Pull Up has no load at all
+    assert tonnage == [("Bench", 500.0, 1)]
+    assert _e1rm_rows(sets_db, "Pull Up") == []
+
+
+def test_new_workout_touches_only_its_exercises_tail(sets_db):
+    for day in range(1, 8):
+        _add_workout(
+            sets_db,
+            f"2024-03-0{day} 18:00:00",
+            [("Squat", 100 + day, 5), ("Row", 60, 8), ("Curl", 20 + day % 3, 10)],
+        )
+    process_sets.main(db_path=sets_db)
+    before = _tables(sets_db)
+
+    with sqlite3.connect(sets_db) as conn:
+        rowids = dict(
+            conn.execute(f"SELECT exercise_name || date, rowid FROM {strength.E1RM_TABLE}")
+        )
+        _add_workout(sets_db, "2024-03-09 18:00:00", [("Squat", 110, 5)])
+        process_sets.enrich_sets(conn)
+        assert strength.refresh_strength(conn, process_sets.AFFECTED_TABLE) == (1, 1)
+        # Every earlier row, of any exercise, is the same row as before
+        kept = dict(
+            conn.execute(
+                f"SELECT exercise_name || date, rowid FROM {strength.E1RM_TABLE} "
+                "WHERE date < '2024-03-09'"
+            )
+        )
+    assert kept == rowids
+    assert _tables(sets_db)[0] == sorted(before[0] + [
+        ("Squat", "2024-03-09 18:00:00", 110 * (1 + 5 / 30), 110.0, 5, 110 * (1 + 5 / 30), 1, 8)
+    ])
+
+
+def test_backfilled_workout_recomputes_the_later_records(sets_db):
+    _add_workout(sets_db, "2024-03-04 18:00:00", [("Squat", 100, 5)])
+    _add_workout(sets_db, "2024-03-08 18:00:00", [("Squat", 105, 5)])
+    process_sets.main(db_path=sets_db)
+
+    # A forgotten heavier workout in between takes the PR from the later one
+    _add_workout(sets_db, "2024-03-06 18:00:00", [("Squat", 110, 5)])
+    process_sets.main(db_path=sets_db)
+
+    assert [(d[:10], pr, n) for d, _, pr, n in _e1rm_rows(sets_db, "Squat")] == [
+        ("2024-03-04", 1, 1),
+        ("2024-03-06", 1, 2),
+        ("2024-03-08", 0, 2),
+    ]
+
+
+def test_dashboard_loaders(sets_db, tmp_path):
+    _add_workout(sets_db, "2024-03-04 18:00:00", [("Squat", 100, 5), ("Row", 60, 8)])
+    _add_workout(sets_db, "2024-03-12 18:00:00", [("Squat", 105, 5)])
+    process_sets.main(db_path=sets_db)
+
+    with sqlite3.connect(sets_db) as conn:
+        assert queries.load_strength_exercises(conn) == ["Squat", "Row"]
+        assert queries.load_e1rm(conn, "Squat")["pr_count"].tolist() == [1, 2]
+        assert queries.load_weekly_tonnage(conn)["tonnage"].tolist() == [980.0, 525.0]
+        assert queries.load_weekly_tonnage(conn, "Row")["sets"].tolist() == [1]
+        assert queries.load_recent_prs(conn, limit=1)["exercise_name"].tolist() == ["Squat"]
+
+    # Databases process_sets hasn't touched yet
+    with sqlite3.connect(tmp_path / "empty.db") as conn:
+        assert queries.load_strength_exercises(conn) == []
+        assert queries.load_e1rm(conn, "Squat").empty
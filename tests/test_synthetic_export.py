@@ -0,0 +1,94 @@
+import sqlite3
+import sys
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT, SAMPLE_CSV
+
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import bench_end_to_end  # noqa: E402
+import synthetic_export  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return synthetic_export.ExportProfile()
+
+
+def read_export(path):
+    return pd.read_csv(path, delimiter=";", dtype=str, keep_default_na=False)
+
+
+def test_export_has_the_requested_sets_in_strong_format(profile, tmp_path):
+    path = tmp_path / "strong.csv"
+    assert synthetic_export.write_strong_export(path, 12_345, profile=profile) == 12_345
+
+    sample, export = read_export(SAMPLE_CSV), read_export(path)
+    assert len(export) == 12_345
+    assert list(export.columns) == list(sample.columns)
+    assert path.read_text().splitlines()[0] == SAMPLE_CSV.read_text().splitlines()[0]
+    assert set(export["Exercise Name"]) <= set(sample["Exercise Name"])
+    assert set(export["Set Order"]) <= set(sample["Set Order"])
+
+    # One date per workout, later workouts later
+    per_workout = export.groupby("Workout #", sort=False)["Date"]
+    assert (per_workout.nunique() == 1).all()
+    assert per_workout.first().is_monotonic_increasing
+
+
+def test_export_follows_the_sample_exercise_distribution(profile, tmp_path):
+    path = tmp_path / "strong.csv"
+    synthetic_export.write_strong_export(path, 200_000, profile=profile)
+
+    sample = read_export(SAMPLE_CSV)["Exercise Name"].value_counts(normalize=True)
+    export = read_export(path)["Exercise Name"].value_counts(normalize=True)
+    shares = pd.concat([sample, export], axis=1, keys=["sample", "export"]).fillna(0)
+    # Total variation distance between the two name distributions
+    assert (shares["sample"] - shares["export"]).abs().sum() / 2 < 0.05
+
+
+def test_same_seed_same_export(profile, tmp_path):
+    a, b, c = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"
+    synthetic_export.write_strong_export(a, 5_000, seed=7, profile=profile)
+    synthetic_export.write_strong_export(b, 5_000, seed=7, profile=profile)
+    synthetic_export.write_strong_export(c, 5_000, seed=8, profile=profile)
+    assert a.read_bytes() == b.read_bytes() != c.read_bytes()
+
+
+def test_export_imports_like_a_real_one(import_sets, profile, tmp_path):
+    path, db = tmp_path / "strong.csv", tmp_path / "sets.db"
+    synthetic_export.write_strong_export(path, 20_000, profile=profile)
+    new_rows = import_sets.sync_to_sqlite(BytesIO(path.read_bytes()), db_path=db)
+
+    # Strong exports repeat the odd identical set; the sample has 22 in 8,004
+    assert 0.99 * 20_000 < new_rows <= 20_000
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()[0] == new_rows
+
+
+def test_run_stages_times_every_stage(profile, tmp_path):
+    path = tmp_path / "strong.csv"
+    synthetic_export.write_strong_export(path, 3_000, profile=profile)
+    result = bench_end_to_end.run_stages(path, tmp_path / "bench.db", 3_000)
+
+    assert set(result["seconds"]) == set(bench_end_to_end.STAGES)
+    assert result["sync_mode"] == "memory"
+    assert result["weeks"] > 0
+
+
+def test_find_regressions_flags_only_real_slowdowns():
+    def run(**seconds):
+        return {"sizes": {"10000": {"seconds": seconds}}}
+
+    baseline = run(sync=1.0, process_sets=0.5, dashboard=0.01)
+    current = run(sync=1.5, process_sets=0.55, dashboard=0.03, muscle_map=9.0)
+
+    # sync is 50% slower; process_sets is within tolerance; dashboard tripled
+    # but by less than the noise floor; muscle_map has no baseline yet
+    assert bench_end_to_end.find_regressions(current, baseline) == [
+        ("10000", "sync", 1.0, 1.5)
+    ]
+    assert bench_end_to_end.find_regressions(current, run()) == []
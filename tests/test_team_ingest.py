@@ -0,0 +1,132 @@
+import json
+import sqlite3
+from io import BytesIO
+
+import pytest
+
+import team_ingest
+
+
+def _team_folder(tmp_path, exports):
+    root = tmp_path / "dropbox"
+    athletes = []
+    for athlete_id, data in exports.items():
+        (root / athlete_id).mkdir(parents=True)
+        (root / athlete_id / "strong_workouts.csv").write_bytes(data)
+        athletes.append(team_ingest.Athlete(athlete_id, f"/{athlete_id}/strong_workouts.csv"))
+    return root, athletes
+
+
+def _count(data_dir, athlete_id, table="workout_sets"):
+    with sqlite3.connect(team_ingest.athlete_db(data_dir, athlete_id)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def team(tmp_path, sample_csv_bytes):
+    # Two athletes with different histories: the full sample and its first half
+    lines = sample_csv_bytes.splitlines(keepends=True)
+    return _team_folder(
+        tmp_path,
+        {"alice": sample_csv_bytes, "bob": b"".join(lines[: len(lines) // 2])},
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_each_athlete_gets_the_db_a_single_sync_would_build(
+    import_sets, team, tmp_path, workers
+):
+    root, athletes = team
+    data_dir = tmp_path / "athletes"
+    results = team_ingest.ingest_team(athletes, data_dir, workers=workers, local_root=root)
+
+    assert [r["status"] for r in results] == ["synced", "synced"]
+    for athlete in athletes:
+        data = (root / athlete.id / "strong_workouts.csv").read_bytes()
+        expected = import_sets.sync_to_sqlite(BytesIO(data), db_path=tmp_path / f"{athlete.id}.db")
+        assert _count(data_dir, athlete.id) == expected
+    assert _count(data_dir, "alice") > _count(data_dir, "bob")
+
+
+def test_second_run_skips_unchanged_and_parses_only_appended_rows(team, tmp_path, sample_csv_bytes):
+    root, athletes = team
+    data_dir = tmp_path / "athletes"
+    team_ingest.ingest_team(athletes, data_dir, workers=2, local_root=root)
+    bob_before = _count(data_dir, "bob")
+
+    (root / "bob" / "strong_workouts.csv").write_bytes(sample_csv_bytes)
+    results = team_ingest.ingest_team(athletes, data_dir, workers=2, local_root=root)
+
+    alice, bob = results
+    assert alice["status"] == "unchanged"
+    assert bob["status"] == "synced"
+    assert bob["rows"] < len(sample_csv_bytes.splitlines()) // 2 + 1  # just the tail
+    assert _count(data_dir, "bob") == bob_before + bob["new_rows"] == _count(data_dir, "alice")
+
+
+def test_one_missing_export_does_not_stop_the_team(team, tmp_path):
+    root, athletes = team
+    athletes = athletes + [team_ingest.Athlete("carol", "/carol/strong_workouts.csv")]
+    results = team_ingest.ingest_team(athletes, tmp_path / "athletes", workers=2, local_root=root)
+
+    assert [r["status"] for r in results] == ["synced", "synced", "failed"]
+    assert "not_found" in results[2]["error"]
+
+
+def test_enrich_builds_each_changed_athlete_db(team, tmp_path):
+    root, athletes = team
+    data_dir = tmp_path / "athletes"
+    team_ingest.ingest_team(athletes, data_dir, workers=2, local_root=root, enrich=True)
+
+    for athlete in athletes:
+        assert _count(data_dir, athlete.id, "workout_sets_enriched") == _count(data_dir, athlete.id)
+
+
+def test_failed_enrichment_is_retried_on_an_unchanged_export(team, tmp_path, monkeypatch):
+    import process_sets
+
+    root, athletes = team
+    data_dir = tmp_path / "athletes"
+    main = process_sets.main
+
+    def flaky(db_path, **kwargs):
+        if "bob" in str(db_path):
+            raise sqlite3.OperationalError("database is locked")
+        return main(db_path=db_path, **kwargs)
+
+    monkeypatch.setattr(process_sets, "main", flaky)
+    first = team_ingest.ingest_team(athletes, data_dir, workers=1, local_root=root, enrich=True)
+    assert [r["status"] for r in first] == ["synced", "failed"]
+    assert _count(data_dir, "bob", "workout_sets_enriched") == 0
+
+    monkeypatch.setattr(process_sets, "main", main)
+    second = team_ingest.ingest_team(athletes, data_dir, workers=1, local_root=root, enrich=True)
+    assert [r["status"] for r in second] == ["unchanged", "unchanged"]
+    assert _count(data_dir, "bob", "workout_sets_enriched") == _count(data_dir, "bob")
+
+
+def test_enrich_catches_up_dbs_ingested_without_it(team, tmp_path):
+    root, athletes = team
+    data_dir = tmp_path / "athletes"
+    team_ingest.ingest_team(athletes, data_dir, workers=2, local_root=root)
+    team_ingest.ingest_team(athletes, data_dir, workers=2, local_root=root, enrich=True)
+
+    for athlete in athletes:
+        assert _count(data_dir, athlete.id, "workout_sets_enriched") == _count(data_dir, athlete.id)
+
+
+def test_manifest_rejects_unsafe_and_duplicate_ids(tmp_path):
+    path = tmp_path / "team.json"
+    path.write_text(json.dumps({"athletes": [{"id": "alice"}, {"id": "bob", "source": "/b.csv"}]}))
+    assert team_ingest.load_manifest(path) == [
+        team_ingest.Athlete("alice", "/strong_workouts.csv"),
+        team_ingest.Athlete("bob", "/b.csv"),
+    ]
+
+    for bad in ({"id": "../etc"}, {"id": ".."}):
+        path.write_text(json.dumps({"athletes": [bad]}))
+        with pytest.raises(ValueError, match="Invalid athlete id"):
+            team_ingest.load_manifest(path)
+    path.write_text(json.dumps({"athletes": [{"id": "a"}, {"id": "a"}]}))
+    with pytest.raises(ValueError, match="Duplicate"):
+        team_ingest.load_manifest(path)
@@ -1,6 +1,6 @@
 import sqlite3
 import pandas as pd
-from muscle_mapping import map_exercise_to_muscle_groups
+from muscle_mapping import map_exercise_column
 
 # Load all distinct exercise names from the DB
 conn = sqlite3.connect("synced_workouts.db")
@@ -8,7 +8,7 @@ df = pd.read_sql_query("SELECT DISTINCT exercise_name FROM workout_sets", conn)
 conn.close()
 
 # Map each exercise to muscle groups
-df["muscle_groups"] = df["exercise_name"].apply(map_exercise_to_muscle_groups)
+df["muscle_groups"] = map_exercise_column(df["exercise_name"])
 
 # Sort alphabetically for easier scanning
 df.sort_values("exercise_name", inplace=True)